@@ -1,7 +1,10 @@
 import streamlit as st
 
+from src import perf
 from src.graph_display import display_page
+from src.kinship_page import kinship_page
 from src.member_page import member_page
+from src.perf_panel import perf_panel, session_timing
 from src.relationship_page import add_relationship_page
 
 
@@ -10,15 +13,23 @@ def main():
     # Sidebar navigation
     st.sidebar.title("Navigation")
     page = st.sidebar.radio(
-        "Go to", options=["Home", "Add / Update Document", "Add Relationship"]
+        "Go to",
+        options=["Home", "Add / Update Document", "Add Relationship", "Kinship"],
     )
 
-    if page == "Home":
-        display_page()
-    elif page == "Add / Update Document":
-        member_page()
-    elif page == "Add Relationship":
-        add_relationship_page()
+    recorder = session_timing()
+
+    with perf.span(f"page.{page}"):
+        if page == "Home":
+            display_page()
+        elif page == "Add / Update Document":
+            member_page()
+        elif page == "Add Relationship":
+            add_relationship_page()
+        elif page == "Kinship":
+            kinship_page()
+
+    perf_panel(recorder)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,69 @@
+"""
+Payload and render time of the Home page graph with every member drawn,
+against the house/branch view from ClusterIndex (everything collapsed, and
+with the largest branch expanded), as the family grows.
+
+    python -m benchmarks.bench_clusters --sizes 1000 10000 30000
+
+Render time covers building the view graph and its pyvis page; the
+cluster index itself is built once per data version and timed separately.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+from typing import Any
+
+from src.clusters import ClusterIndex
+from src.family_graph import FamilyGraph
+from src.graph_create import load_family_members, load_relationships
+from src.graph_render import build_pyvis_html
+from src.synthetic import generate_family
+
+from .bench_validation import timed
+
+
+def bench(size: int, repeat: int) -> dict[str, Any]:
+    member_docs, relationship_docs = generate_family(size)
+    members = load_family_members(member_docs)
+    relationships = load_relationships(relationship_docs)
+    with contextlib.redirect_stdout(io.StringIO()):
+        family_graph = FamilyGraph(members, relationships)
+
+    results: dict[str, Any] = {
+        "index_ms": timed(lambda: ClusterIndex(members, relationships), repeat)
+    }
+    clusters = ClusterIndex(members, relationships)
+    largest = max(
+        (node for node in clusters.options() if node.startswith("branch:")),
+        key=lambda node: len(clusters.members[clusters._parse(node)]),
+    )
+    views = {
+        "full": lambda: family_graph.graph,
+        "collapsed": lambda: clusters.graph(family_graph),
+        "expanded": lambda: clusters.graph(family_graph, [largest]),
+    }
+    for name, view in views.items():
+
+        def render() -> str:
+            clusters._graphs.clear()
+            return build_pyvis_html(view())
+
+        results[f"{name}_nodes"] = view().number_of_nodes()
+        results[f"{name}_kb"] = round(len(render()) / 1024, 1)
+        results[f"{name}_ms"] = timed(render, repeat)
+    results["expanded_branch"] = clusters.describe(largest)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 30_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps({size: bench(size, args.repeat) for size in args.sizes}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Per-request latency of a client-per-call data layer versus the shared
+FamilyRepository, with many simulated Streamlit sessions issuing reads.
+
+Run against a real cluster:
+
+    python -m benchmarks.bench_connection_pool --uri "mongodb://localhost:27017"
+
+Without --uri the database is simulated: every new client pays a fixed
+connection/TLS/server-selection cost before its first query, and every query
+pays a fixed round trip.
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import MongoClient
+
+from src.database import (
+    DATABASE_NAME,
+    MEMBERS_COLLECTION,
+    FamilyRepository,
+    MemoryBackend,
+    MongoBackend,
+)
+
+
+class SimulatedConnections:
+    """A bounded pool of simulated server connections."""
+
+    def __init__(self, handshake_s: float, query_s: float, pool_size: int):
+        self.handshake_s = handshake_s
+        self.query_s = query_s
+        self._idle = 0
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+
+    def query(self) -> None:
+        with self._slots:
+            with self._lock:
+                reuse = self._idle > 0
+                if reuse:
+                    self._idle -= 1
+            if not reuse:
+                time.sleep(self.handshake_s)
+            time.sleep(self.query_s)
+            with self._lock:
+                self._idle += 1
+
+
+class SimulatedCollection:
+    def __init__(self, collection, connections: SimulatedConnections):
+        self._collection = collection
+        self._connections = connections
+
+    def find(self, *args, **kwargs):
+        self._connections.query()
+        return self._collection.find(*args, **kwargs)
+
+
+def simulated_per_call(members, handshake_s: float, query_s: float):
+    def request():
+        # A fresh client per call: the connection is never reused.
+        SimulatedConnections(handshake_s, query_s, pool_size=1).query()
+        return list(MemoryBackend(members).members.find({}))
+
+    return request
+
+
+def simulated_shared(members, handshake_s: float, query_s: float, pool_size: int):
+    backend = MemoryBackend(members)
+    connections = SimulatedConnections(handshake_s, query_s, pool_size)
+    backend.members = SimulatedCollection(backend.members, connections)
+    repository = FamilyRepository(backend)
+
+    def request():
+        return list(repository.members.find({}))
+
+    return request, repository
+
+
+def mongo_per_call(uri: str):
+    def request():
+        client = MongoClient(uri)
+        try:
+            return list(client[DATABASE_NAME][MEMBERS_COLLECTION].find({}))
+        finally:
+            client.close()
+
+    return request
+
+
+def mongo_shared(uri: str):
+    repository = FamilyRepository(MongoBackend(uri))
+
+    def request():
+        return list(repository.members.find({}))
+
+    return request, repository
+
+
+def measure(request, sessions: int, requests_per_session: int) -> dict[str, float]:
+    def session() -> list[float]:
+        timings = []
+        for _ in range(requests_per_session):
+            start = time.perf_counter()
+            request()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        timings = [t for result in pool.map(lambda _: session(), range(sessions)) for t in result]
+    elapsed = time.perf_counter() - start
+    timings.sort()
+    return {
+        "requests": len(timings),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "p50_ms": round(timings[len(timings) // 2], 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+        "throughput_rps": round(len(timings) / elapsed, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--uri", help="MongoDB URI; simulate the server if omitted")
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--members", type=int, default=150)
+    parser.add_argument("--handshake-ms", type=float, default=40.0)
+    parser.add_argument("--query-ms", type=float, default=3.0)
+    parser.add_argument("--pool-size", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.uri:
+        before = mongo_per_call(args.uri)
+        after, repository = mongo_shared(args.uri)
+    else:
+        members = [{"name": {"english": f"Member {i}"}} for i in range(args.members)]
+        handshake_s, query_s = args.handshake_ms / 1000, args.query_ms / 1000
+        before = simulated_per_call(members, handshake_s, query_s)
+        after, repository = simulated_shared(
+            members, handshake_s, query_s, args.pool_size
+        )
+
+    try:
+        results = {
+            "client_per_call": measure(before, args.sessions, args.requests),
+            "shared_repository": measure(after, args.sessions, args.requests),
+        }
+    finally:
+        repository.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
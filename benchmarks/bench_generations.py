@@ -0,0 +1,55 @@
+"""
+Time GenerationIndex: the full topological pass, and adding one child
+relationship incrementally against inferring everything again.
+
+    python -m benchmarks.bench_generations --sizes 10000 100000
+"""
+
+import argparse
+import json
+from typing import Any
+
+from bson import ObjectId
+
+from src.generations import GenerationIndex
+from src.graph_create import load_family_members, load_relationships
+from src.models import Relationship
+from src.synthetic import generate_family
+
+from .bench_validation import timed
+
+
+def bench(size: int, repeat: int) -> dict[str, Any]:
+    member_docs, relationship_docs = generate_family(size)
+    members = load_family_members(member_docs)
+    relationships = load_relationships(relationship_docs)
+    index = GenerationIndex(members, relationships)
+    # A new child for a member halfway down the forest.
+    parent = members[len(members) // 2].id
+    child = members[-1].id
+    rel = Relationship(_id=ObjectId(), source_id=parent, target=child, type="child")
+
+    def incremental() -> None:
+        index.copy().add_relationship(rel)
+
+    return {
+        "build_ms": timed(lambda: GenerationIndex(members, relationships), repeat),
+        "copy_ms": timed(index.copy, repeat),
+        "incremental_ms": timed(incremental, repeat),
+        "rebuild_ms": timed(
+            lambda: GenerationIndex(members, [*relationships, rel]), repeat
+        ),
+        "conflicts": len(index.conflicts()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps({size: bench(size, args.repeat) for size in args.sizes}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
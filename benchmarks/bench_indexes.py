@@ -0,0 +1,56 @@
+"""
+Time the relationship lookups FamilyRepository pushes to the database, with
+and without the secondary indexes from ensure_indexes(): the relationships
+touching one member, and those touching a batch of 50 members (the check
+the relationship page runs before a batch is written).
+
+    python -m benchmarks.bench_indexes --sizes 10000 100000
+"""
+
+import argparse
+import json
+from typing import Any
+
+from src.database import FamilyRepository, MemoryBackend
+from src.synthetic import generate_family
+
+from .bench_validation import timed
+
+
+def bench(size: int, repeat: int) -> dict[str, Any]:
+    members, relationships = generate_family(size)
+    middle = len(members) // 2
+    member_id = members[middle]["_id"]
+    batch = [member["_id"] for member in members[middle : middle + 50]]
+    queries = {
+        "member": lambda repository: repository.find_relationships([member_id]),
+        "batch": lambda repository: repository.find_relationships(batch, ["child"]),
+    }
+
+    results: dict[str, Any] = {}
+    for indexed in (False, True):
+        repository = FamilyRepository(MemoryBackend(members, relationships))
+        if indexed:
+            repository.ensure_indexes()
+        label = "indexed" if indexed else "scan"
+        for name, query in queries.items():
+            results[f"{name}_{label}_ms"] = timed(lambda: query(repository), repeat)
+    for name in queries:
+        results[f"{name}_speedup"] = round(
+            results[f"{name}_scan_ms"] / max(results[f"{name}_indexed_ms"], 0.1), 1
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {size: bench(size, args.repeat) for size in args.sizes}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Time to first render of the Home page graph: the old sequential path (read
+members, then relationships, validate both, build the graph) against
+load_snapshot, which streams cursor batches into validation, fetches the
+two collections concurrently and starts the graph on the members.
+
+    python -m benchmarks.bench_loading --sizes 10000 100000
+    python -m benchmarks.bench_loading --uri "mongodb://localhost:27017"
+
+Without --uri the in-memory backend is wrapped so that every cursor batch
+waits like a network round trip (--latency-ms plus --per-doc-us per
+document, with the GIL released), which is what a local mongod costs.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+from typing import Any, Callable
+
+from pymongo import MongoClient
+
+from src import graph_create
+from src.database import FamilyRepository, MemoryBackend, MongoBackend
+from src.family_graph import FamilyGraph
+from src.graph_create import load_family_members, load_relationships
+from src.graph_render import build_pyvis_html
+from src.snapshot import LOAD_BATCH_SIZE, load_snapshot
+from src.synthetic import generate_family
+
+
+class LatencyCollection:
+    """Wraps a collection so each batch of a cursor arrives after a delay."""
+
+    def __init__(self, collection, latency: float, per_doc: float):
+        self._collection = collection
+        self._latency = latency
+        self._per_doc = per_doc
+
+    def find(self, query=None, projection=None, batch_size: int = 0):
+        batch_size = batch_size or 101  # MongoDB's default first batch
+        for index, document in enumerate(
+            self._collection.find(query, projection, batch_size=batch_size)
+        ):
+            if index % batch_size == 0:
+                time.sleep(self._latency + self._per_doc * batch_size)
+            yield document
+
+
+class LatencyBackend:
+    concurrent_reads = True
+
+    def __init__(self, backend, latency: float, per_doc: float):
+        self.members = LatencyCollection(backend.members, latency, per_doc)
+        self.relationships = LatencyCollection(backend.relationships, latency, per_doc)
+
+    def close(self) -> None:
+        pass
+
+
+def cold_models() -> None:
+    """Forget the validated models so every run validates from scratch."""
+    graph_create._member_loader._validated = {}
+    graph_create._relationship_loader._validated = {}
+
+
+def sequential(repository: FamilyRepository) -> FamilyGraph:
+    member_docs, relationship_docs = repository.load_documents()
+    members = load_family_members(member_docs, trusted=True)
+    relationships = load_relationships(relationship_docs, trusted=True)
+    return FamilyGraph(members, relationships)
+
+
+def streamed(repository: FamilyRepository) -> FamilyGraph:
+    return load_snapshot(repository, 0).family_graph(None)
+
+
+def first_render(
+    load: Callable[[FamilyRepository], FamilyGraph],
+    repository: FamilyRepository,
+    repeat: int,
+) -> tuple[float, float]:
+    """Best (graph ready, first render) times over repeat cold runs, in ms."""
+    best_graph = best_render = float("inf")
+    for _ in range(repeat):
+        cold_models()
+        started = time.perf_counter()
+        family_graph = load(repository)
+        graph_ready = time.perf_counter()
+        build_pyvis_html(family_graph.graph)
+        rendered = time.perf_counter()
+        best_graph = min(best_graph, graph_ready - started)
+        best_render = min(best_render, rendered - started)
+    return round(best_graph * 1000, 1), round(best_render * 1000, 1)
+
+
+def bench(backend, repeat: int) -> dict[str, Any]:
+    repository = FamilyRepository(backend)
+    results: dict[str, Any] = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, load in (("sequential", sequential), ("streamed", streamed)):
+            graph_ms, render_ms = first_render(load, repository, repeat)
+            results[f"{name}_graph_ms"] = graph_ms
+            results[f"{name}_first_render_ms"] = render_ms
+    results["graph_speedup"] = round(
+        results["sequential_graph_ms"] / results["streamed_graph_ms"], 2
+    )
+    results["first_render_speedup"] = round(
+        results["sequential_first_render_ms"] / results["streamed_first_render_ms"], 2
+    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    parser.add_argument("--per-doc-us", type=float, default=10.0)
+    parser.add_argument(
+        "--uri",
+        help="Load each size into a scratch database on this MongoDB server",
+    )
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        members, relationships = generate_family(size)
+        if args.uri:
+            database = "wufeng_bench_loading"
+            MongoClient(args.uri).drop_database(database)
+            backend = MongoBackend(args.uri, database)
+            backend.members.insert_many(members)
+            backend.relationships.insert_many(relationships)
+        else:
+            backend = LatencyBackend(
+                MemoryBackend(members, relationships),
+                args.latency_ms / 1000,
+                args.per_doc_us / 1e6,
+            )
+        results[size] = {"batch_size": LOAD_BATCH_SIZE, **bench(backend, args.repeat)}
+        if args.uri:
+            backend.client.drop_database(database)
+            backend.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Time each stage of drawing the family graph on synthetic forests: model
+loading, networkx graph building, pyvis HTML generation and Graphviz DOT
+building.
+
+    python -m benchmarks.bench_pipeline --sizes 1000 10000 --output new.json
+    python -m benchmarks.bench_pipeline --compare old.json new.json
+
+Results are JSON with the commit they were taken at; --compare prints the
+ratio of every timing between two result files so regressions stand out.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+from typing import Any
+
+from src.graph_create import (
+    create_family_graph,
+    load_family_members,
+    load_relationships,
+)
+from src.graph_render import build_pyvis_html
+from src.render_family_graph_graphviz import build_family_dot
+from src.synthetic import ForestShape, generate_family
+
+from .bench_validation import timed
+
+# Ratios above this are reported as regressions by --compare.
+REGRESSION_THRESHOLD = 1.10
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench(size: int, seed: int, repeat: int, image_rate: float) -> dict[str, Any]:
+    member_docs, relationship_docs = generate_family(
+        size, seed, ForestShape(image_rate=image_rate)
+    )
+    members = load_family_members(member_docs)
+    relationships = load_relationships(relationship_docs)
+    with contextlib.redirect_stdout(io.StringIO()):
+        graph = create_family_graph(members, relationships)
+        timings = {
+            "load_family_members_ms": timed(
+                lambda: load_family_members(member_docs), repeat
+            ),
+            "load_relationships_ms": timed(
+                lambda: load_relationships(relationship_docs), repeat
+            ),
+            "create_family_graph_ms": timed(
+                lambda: create_family_graph(members, relationships), repeat
+            ),
+            "pyvis_html_ms": timed(lambda: build_pyvis_html(graph), repeat),
+            "pyvis_html_hierarchical_ms": timed(
+                lambda: build_pyvis_html(graph, "hierarchical"), repeat
+            ),
+            "graphviz_dot_ms": timed(
+                lambda: build_family_dot(members, relationships).source, repeat
+            ),
+        }
+    return {
+        "members": len(members),
+        "relationships": len(relationships),
+        "timings": timings,
+    }
+
+
+def compare(old: dict[str, Any], new: dict[str, Any]) -> int:
+    """Print new/old for every timing; return 1 if any regressed."""
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    regressed = False
+    for size, result in new["results"].items():
+        baseline = old["results"].get(size)
+        if baseline is None:
+            continue
+        for name, value in result["timings"].items():
+            before = baseline["timings"].get(name)
+            if not before:
+                continue
+            ratio = value / before
+            flag = ""
+            if ratio > REGRESSION_THRESHOLD:
+                flag, regressed = "  REGRESSION", True
+            print(f"{size:>8} {name:<28} {before:>10.1f} {value:>10.1f} {ratio:>6.2f}x{flag}")
+    return 1 if regressed else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--image-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="Also write the results to this file")
+    parser.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("OLD", "NEW"),
+        help="Compare two result files instead of running",
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        old, new = (json.load(open(path)) for path in args.compare)
+        return compare(old, new)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "image_rate": args.image_rate,
+        "results": {
+            str(size): bench(size, args.seed, args.repeat, args.image_rate)
+            for size in args.sizes
+        },
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as out:
+            out.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Cost of opening the member edit page with no snapshot cached: the old
+path (read and validate every member and relationship, index the names,
+take the edited member from the index) against the member directory
+(projected names and houses) plus one point lookup by _id.
+
+    python -m benchmarks.bench_projection --sizes 1000 10000 100000
+    python -m benchmarks.bench_projection --uri "mongodb://localhost:27017"
+
+Bytes are the BSON size of the documents each path receives, i.e. what a
+MongoDB server would send.
+"""
+
+import argparse
+import json
+from typing import Any
+
+import bson
+from pymongo import MongoClient
+
+from src.database import FamilyRepository, MemoryBackend, MongoBackend
+from src.graph_create import load_family_members, load_relationships
+from src.snapshot import load_member_directory, load_snapshot
+from src.synthetic import generate_family
+
+from .bench_validation import timed
+
+
+class CountingCollection:
+    """Wraps a collection and adds up the BSON size of every document read."""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.bytes = 0
+
+    def find(self, *args, **kwargs):
+        for document in self._collection.find(*args, **kwargs):
+            self.bytes += len(bson.encode(document))
+            yield document
+
+    def find_one(self, *args, **kwargs):
+        document = self._collection.find_one(*args, **kwargs)
+        if document is not None:
+            self.bytes += len(bson.encode(document))
+        return document
+
+
+class CountingBackend:
+    def __init__(self, backend):
+        self.members = CountingCollection(backend.members)
+        self.relationships = CountingCollection(backend.relationships)
+
+    @property
+    def bytes(self) -> int:
+        return self.members.bytes + self.relationships.bytes
+
+    def close(self) -> None:
+        pass
+
+
+def fetch_old(repository: FamilyRepository, member_id: Any) -> None:
+    members, relationships = repository.load_documents()
+    load_family_members(members)
+    load_relationships(relationships)
+
+
+def fetch_new(repository: FamilyRepository, member_id: Any) -> None:
+    load_family_members(repository.member_summaries())
+    repository.get_member(member_id)
+
+
+def open_old(repository: FamilyRepository, member_id: Any) -> None:
+    snapshot = load_snapshot(repository, 0)
+    snapshot.name_index.member(str(member_id))
+
+
+def open_new(repository: FamilyRepository, member_id: Any) -> None:
+    load_member_directory(repository, 0)
+    repository.get_member(member_id)
+
+
+def bench(backend, member_id: Any, repeat: int) -> dict[str, Any]:
+    """
+    *_kb: data read; *_fetch_ms: reading and validating it; *_page_ms: the
+    whole page load, including building the name index.
+    """
+    results = {}
+    repository = FamilyRepository(backend)
+    for name, fetch, open_page in (
+        ("full_scan", fetch_old, open_old),
+        ("projected", fetch_new, open_new),
+    ):
+        counting = CountingBackend(backend)
+        fetch(FamilyRepository(counting), member_id)
+        results[f"{name}_kb"] = round(counting.bytes / 1024, 1)
+        results[f"{name}_fetch_ms"] = timed(lambda: fetch(repository, member_id), repeat)
+        results[f"{name}_page_ms"] = timed(
+            lambda: open_page(repository, member_id), repeat
+        )
+    results["bytes_ratio"] = round(results["full_scan_kb"] / results["projected_kb"], 1)
+    results["fetch_speedup"] = round(
+        results["full_scan_fetch_ms"] / results["projected_fetch_ms"], 1
+    )
+    results["page_speedup"] = round(
+        results["full_scan_page_ms"] / results["projected_page_ms"], 1
+    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--uri",
+        help="Load each size into a scratch database on this MongoDB server",
+    )
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        members, relationships = generate_family(size)
+        member_id = members[len(members) // 2]["_id"]
+        if args.uri:
+            database = "wufeng_bench_projection"
+            MongoClient(args.uri).drop_database(database)
+            backend = MongoBackend(args.uri, database)
+            backend.members.insert_many(members)
+            backend.relationships.insert_many(relationships)
+        else:
+            backend = MemoryBackend(members, relationships)
+        results[size] = bench(backend, member_id, args.repeat)
+        if args.uri:
+            backend.client.drop_database(database)
+            backend.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
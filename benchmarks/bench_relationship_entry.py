@@ -0,0 +1,96 @@
+"""
+Wall-clock time to enter one parent's children on the Add Relationship
+page, driven through Streamlit's AppTest like a user would: one edge per
+submit (search the child, pick it, click Add), against batch entry (search
+and pick every child, then one click and one bulk_write).
+
+    python -m benchmarks.bench_relationship_entry --size 10000 --edges 50
+
+Every single submit bumps the data version, so the next rerun reloads the
+member directory; a batch reloads it once.
+"""
+
+import argparse
+import json
+import time
+from collections import Counter
+from typing import Any
+
+from streamlit.testing.v1 import AppTest
+
+from src.database import FamilyRepository, MemoryBackend, set_repository
+from src.graph_create import get_member_key
+from src.models import FamilyMember
+from src.snapshot import clear_snapshot_cache
+from src.synthetic import generate_family
+
+APP = "../app.py"
+
+
+def fresh_app(members: list[dict], relationships: list[dict]) -> AppTest:
+    repository = FamilyRepository(MemoryBackend(members, relationships))
+    repository.ensure_indexes()
+    set_repository(repository)
+    clear_snapshot_cache()
+    at = AppTest.from_file(APP, default_timeout=600).run()
+    at.sidebar.radio[0].set_value("Add Relationship").run()
+    return at
+
+
+def label(member: dict[str, Any]) -> str:
+    """The member as the page lists them (English, or a fallback spelling)."""
+    return get_member_key(FamilyMember.model_validate(member), "english")
+
+
+def single(at: AppTest, parent: dict, children: list[dict]) -> int:
+    at.text_input(key="relationship_source_query").set_value(label(parent)).run()
+    at.selectbox(key="relationship_source").set_value(str(parent["_id"])).run()
+    for child in children:
+        at.text_input(key="relationship_target_query").set_value(label(child)).run()
+        at.selectbox(key="relationship_target").set_value(str(child["_id"])).run()
+        at.button[0].click().run()
+    return len(at.success)
+
+
+def batch(at: AppTest, parent: dict, children: list[dict]) -> int:
+    at.radio[0].set_value("Batch").run()
+    at.text_input(key="batch_anchor_query").set_value(label(parent)).run()
+    at.selectbox(key="batch_anchor").set_value(str(parent["_id"])).run()
+    picked: list[str] = []
+    for child in children:
+        at.text_input(key="batch_members_query").set_value(label(child)).run()
+        picked.append(str(child["_id"]))
+        at.multiselect(key="batch_members").set_value(picked).run()
+    at.button[0].click().run()
+    return len(at.success)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument("--edges", type=int, default=50)
+    args = parser.parse_args()
+
+    members, relationships = generate_family(args.size)
+    # AppTest picks options by their label, so use unambiguous names.
+    labels = Counter(map(label, members))
+    named = [member for member in members if labels[label(member)] == 1]
+    parent, children = named[0], named[-args.edges :]
+
+    results: dict[str, Any] = {"members": args.size, "edges": args.edges}
+    for name, enter in (("single", single), ("batch", batch)):
+        at = fresh_app(members, relationships)
+        started = time.perf_counter()
+        enter(at, parent, children)
+        results[f"{name}_s"] = round(time.perf_counter() - started, 2)
+        assert not at.exception, at.exception
+        added = set_repository(None).find_relationships([parent["_id"]], ["child"])
+        results[f"{name}_written"] = sum(
+            rel["target"] in {child["_id"] for child in children} for rel in added
+        )
+    results["speedup"] = round(results["single_s"] / results["batch_s"], 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Time to turn stored documents into models: record-by-record model_validate
+(the old loaders), one batched TypeAdapter call, and the trusted mode used
+by the snapshot, which revalidates only documents that changed since the
+previous load.
+
+    python -m benchmarks.bench_validation --sizes 10000 100000
+"""
+
+import argparse
+import gc
+import json
+import random
+import time
+
+from src.graph_create import _ModelLoader
+from src.models import FamilyMember, Relationship
+from src.synthetic import generate_family
+
+def timed(function, repeat: int = 3) -> float:
+    """Best of repeat runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 1)
+
+
+def edited(docs: list[dict], fraction: float, seed: int = 1) -> list[dict]:
+    """Copies of docs, as a fresh query would return, with a few changed."""
+    rng = random.Random(seed)
+    copies = [dict(doc) for doc in docs]
+    for i in rng.sample(range(len(copies)), max(1, int(len(copies) * fraction))):
+        copies[i]["type" if "type" in copies[i] else "house"] = "edited"
+    return copies
+
+
+def bench(model, docs: list[dict], edit_fraction: float) -> dict[str, float]:
+    loader = _ModelLoader(model)
+    results = {
+        "per_record_ms": timed(lambda: [model.model_validate(doc) for doc in docs]),
+        "batched_ms": timed(lambda: loader.load(docs)),
+    }
+    results["trusted_cold_ms"] = timed(
+        lambda: _ModelLoader(model).load(docs, trusted=True)
+    )
+    reloaded = edited(docs, edit_fraction)
+
+    def reload():
+        loader = _ModelLoader(model)
+        loader.load(docs, trusted=True)
+        return lambda: loader.load(reloaded, trusted=True)
+
+    results["trusted_reload_ms"] = min(timed(reload(), repeat=1) for _ in range(3))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument(
+        "--edit-fraction",
+        type=float,
+        default=0.01,
+        help="Share of documents changed before the trusted reload",
+    )
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        members, relationships = generate_family(size)
+        results[size] = {
+            "members": bench(FamilyMember, members, args.edit_fraction),
+            "relationships": bench(Relationship, relationships, args.edit_fraction),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
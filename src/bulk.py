@@ -0,0 +1,275 @@
+"""
+Bulk import and export of members and relationships.
+
+    python -m src.bulk import members members_backup.json --batch-size 1000
+    python -m src.bulk import relationships relationships.ndjson --ordered
+    python -m src.bulk export members members.ndjson
+
+Imports stream JSON arrays or NDJSON, validate each chunk against the
+Pydantic models and write it with one bulk_write of upserts. Exports stream
+a cursor to NDJSON. The repository is the app's (WUFENG_DATA_DIR or the
+MongoDB secret) unless --uri or --data-dir is given.
+"""
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator, TextIO
+
+from bson import json_util
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pymongo import InsertOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from .database import (
+    FamilyRepository,
+    MongoBackend,
+    get_repository,
+)
+from .file_backend import FileBackend, iter_json_records
+from .graph_create import canonical_relationship
+from .models import FamilyMember, Relationship
+
+DEFAULT_BATCH_SIZE = 1000
+MODELS: dict[str, type[BaseModel]] = {
+    "members": FamilyMember,
+    "relationships": Relationship,
+}
+_adapters = {name: TypeAdapter(list[model]) for name, model in MODELS.items()}
+
+
+@dataclass
+class RecordError:
+    """A record that failed validation or could not be written."""
+
+    index: int
+    record_id: Any
+    message: str
+
+
+@dataclass
+class ImportReport:
+    collection: str
+    read: int = 0
+    inserted: int = 0
+    upserted: int = 0
+    matched: int = 0
+    modified: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+    errors: list[RecordError] = field(default_factory=list)
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.upserted + self.matched
+
+    @property
+    def records_per_second(self) -> float:
+        return self.read / self.seconds if self.seconds else 0.0
+
+    def add_result(self, result: dict[str, Any]) -> None:
+        """Accumulate the counts of a bulk_write (or BulkWriteError) result."""
+        self.inserted += result.get("nInserted", 0)
+        self.upserted += result.get("nUpserted", 0)
+        self.matched += result.get("nMatched", 0)
+        self.modified += result.get("nModified", 0)
+
+
+def batched(records: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    """Lists of up to size records, consuming records lazily."""
+    iterator = iter(records)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def validate_batch(
+    collection: str, records: list[dict[Any, Any]], start: int = 0
+) -> tuple[list[tuple[int, BaseModel]], list[RecordError]]:
+    """
+    Validate a chunk of raw records in one call, falling back to record by
+    record only for the chunk that contains errors.
+    Returns (position, model) pairs and the errors, both indexed from start.
+    """
+    try:
+        models = _adapters[collection].validate_python(records)
+        return list(enumerate(models, start)), []
+    except ValidationError:
+        pass
+
+    model = MODELS[collection]
+    valid, errors = [], []
+    for offset, record in enumerate(records):
+        try:
+            valid.append((start + offset, model.model_validate(record)))
+        except ValidationError as exc:
+            record_id = record.get("_id") if isinstance(record, dict) else None
+            message = "; ".join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                for error in exc.errors()
+            )
+            errors.append(RecordError(start + offset, record_id, message))
+    return valid, errors
+
+
+def write_request(model: BaseModel, upsert: bool = True) -> InsertOne | ReplaceOne:
+    """
+    Upsert by _id when the record has one, otherwise insert it.
+    Relationships are written in canonical form.
+    """
+    document = model.model_dump(by_alias=True, exclude_unset=True)
+    if isinstance(model, Relationship):
+        canonical_relationship(document)
+    if document.get("_id") is None:
+        document.pop("_id", None)
+        return InsertOne(document)
+    if not upsert:
+        return InsertOne(document)
+    return ReplaceOne({"_id": document["_id"]}, document, upsert=True)
+
+
+def import_records(
+    repository: FamilyRepository,
+    collection: str,
+    records: Iterable[dict[Any, Any]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    ordered: bool = False,
+    upsert: bool = True,
+) -> ImportReport:
+    """
+    Validate and write records in batches of batch_size.
+    With ordered=True the import stops after the first batch with a write
+    error, like an ordered bulk_write; validation errors never stop it.
+    """
+    report = ImportReport(collection)
+    started = time.perf_counter()
+    for batch in batched(records, batch_size):
+        start = report.read
+        report.read += len(batch)
+        valid, errors = validate_batch(collection, batch, start)
+        report.errors += errors
+        if not valid:
+            continue
+        positions = [position for position, _ in valid]
+        requests = [write_request(model, upsert) for _, model in valid]
+        report.batches += 1
+        try:
+            result = repository.bulk_write(collection, requests, ordered=ordered)
+            report.add_result(result.bulk_api_result)
+        except BulkWriteError as exc:
+            report.add_result(exc.details)
+            for error in exc.details.get("writeErrors", []):
+                position = positions[error["index"]]
+                record_id = valid[error["index"]][1].id
+                report.errors.append(RecordError(position, record_id, error["errmsg"]))
+            if ordered:
+                break
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def import_file(
+    repository: FamilyRepository,
+    collection: str,
+    path: str | Path,
+    **options: Any,
+) -> ImportReport:
+    """Import a JSON array or NDJSON file (MongoDB extended JSON)."""
+    return import_records(repository, collection, iter_json_records(path), **options)
+
+
+def export_records(
+    repository: FamilyRepository,
+    collection: str,
+    out: TextIO,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> int:
+    """Stream a collection to NDJSON and return the number of documents."""
+    count = 0
+    for document in repository.iter_documents(collection, batch_size=batch_size):
+        out.write(json_util.dumps(document, ensure_ascii=False))
+        out.write("\n")
+        count += 1
+    return count
+
+
+def repository_from_args(args: argparse.Namespace) -> FamilyRepository:
+    """
+    The repository a command-line tool's --uri or --data-dir option names,
+    or the app's repository when neither is given.
+    """
+    if args.uri:
+        return FamilyRepository(MongoBackend(args.uri))
+    if args.data_dir:
+        return FamilyRepository(FileBackend.from_directory(args.data_dir))
+    return get_repository()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.bulk", description=__doc__)
+    parser.add_argument("--uri", help="MongoDB URI (default: the app's repository)")
+    parser.add_argument("--data-dir", help="Use the JSON dumps in this folder")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="Import a JSON or NDJSON file")
+    importer.add_argument("collection", choices=sorted(MODELS))
+    importer.add_argument("path")
+    importer.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    importer.add_argument(
+        "--ordered", action="store_true", help="Stop at the first write error"
+    )
+    importer.add_argument(
+        "--insert-only",
+        action="store_true",
+        help="Insert records with an _id instead of replacing them",
+    )
+    importer.add_argument("--max-errors-shown", type=int, default=20)
+
+    exporter = commands.add_parser("export", help="Export a collection to NDJSON")
+    exporter.add_argument("collection", choices=sorted(MODELS))
+    exporter.add_argument("path", nargs="?", default="-")
+    exporter.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    args = parser.parse_args(argv)
+    repository = repository_from_args(args)
+
+    if args.command == "export":
+        started = time.perf_counter()
+        if args.path == "-":
+            count = export_records(repository, args.collection, sys.stdout, args.batch_size)
+        else:
+            with open(args.path, "w", encoding="utf-8") as out:
+                count = export_records(repository, args.collection, out, args.batch_size)
+        seconds = time.perf_counter() - started
+        print(
+            f"Exported {count} {args.collection} in {seconds:.2f}s",
+            file=sys.stderr,
+        )
+        return 0
+
+    report = import_file(
+        repository,
+        args.collection,
+        args.path,
+        batch_size=args.batch_size,
+        ordered=args.ordered,
+        upsert=not args.insert_only,
+    )
+    print(
+        f"Read {report.read} {args.collection} in {report.seconds:.2f}s "
+        f"({report.records_per_second:,.0f} records/s, {report.batches} batches): "
+        f"{report.inserted} inserted, {report.upserted} upserted, "
+        f"{report.matched} matched ({report.modified} modified), "
+        f"{len(report.errors)} errors."
+    )
+    for error in report.errors[: args.max_errors_shown]:
+        print(f"  record {error.index} ({error.record_id}): {error.message}")
+    if len(report.errors) > args.max_errors_shown:
+        print(f"  ... {len(report.errors) - args.max_errors_shown} more")
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
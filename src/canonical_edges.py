@@ -0,0 +1,177 @@
+"""
+One-off migration of the relationships collection to canonical form.
+
+    python -m src.canonical_edges --data-dir . --dry-run
+    python -m src.canonical_edges --uri "mongodb://localhost:27017"
+
+Relationships are written with their endpoints in canonical order
+(graph_create.canonical_endpoints): symmetric types (the spouse types and
+"other") order the pair by id, and a child relationship runs from the
+parent to the child. This streams the collection once and keeps one
+document per canonical (source_id, target, type), comparing ids as
+strings. Duplicates and mirrored copies are deleted, after filling in any
+field the kept document is missing (e.g. start_date). Kept documents that
+point the wrong way are flipped, and ids stored as hex strings are
+written back as ObjectIds. The unique source_target_type index is then
+created, so the collection stays canonical. Running it again changes
+nothing.
+"""
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from bson import ObjectId
+from pymongo import DeleteOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from . import perf
+from .bulk import DEFAULT_BATCH_SIZE, batched, repository_from_args
+from .database import FamilyRepository
+from .graph_create import canonical_endpoints
+
+ENDPOINT_FIELDS = ("_id", "source_id", "target", "type")
+
+
+@dataclass
+class MigrationReport:
+    relationships: int = 0
+    deleted: int = 0
+    flipped: int = 0
+    retyped: int = 0
+    merged: int = 0
+    seconds: float = 0.0
+
+
+def _object_id(value: Any) -> Any:
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return value
+
+
+def _canonical(rel: dict[Any, Any]) -> tuple[Any, Any]:
+    """The endpoints rel is stored with: canonical order, hex strings as ObjectIds."""
+    return canonical_endpoints(
+        _object_id(rel["source_id"]), _object_id(rel["target"]), rel["type"]
+    )
+
+
+def _is_canonical(rel: dict[Any, Any]) -> bool:
+    return _canonical(rel) == (rel["source_id"], rel["target"])
+
+
+def _merge(kept: dict[Any, Any], duplicate: dict[Any, Any]) -> bool:
+    """Copy the fields kept lacks from duplicate; returns whether any were."""
+    merged = False
+    for field, value in duplicate.items():
+        if field not in ENDPOINT_FIELDS and value is not None:
+            if kept.get(field) is None:
+                kept[field] = value
+                merged = True
+    return merged
+
+
+def _send(repository: FamilyRepository, requests: list, batch_size: int) -> int:
+    """Write requests in unordered batches; returns the documents changed."""
+    changed = 0
+    for batch in batched(requests, batch_size):
+        try:
+            result = repository.bulk_write("relationships", batch, ordered=False)
+            changed += result.deleted_count + result.modified_count
+        except BulkWriteError as exc:
+            details = exc.details
+            changed += details.get("nRemoved", 0) + details.get("nModified", 0)
+            for error in details.get("writeErrors", []):
+                print(f"  request {error['index']} failed: {error['errmsg']}")
+    return changed
+
+
+@perf.timed("canonical_edges.migrate")
+def migrate(
+    repository: FamilyRepository,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    dry_run: bool = False,
+) -> MigrationReport:
+    """Collapse duplicate relationships and store the rest in canonical form."""
+    report = MigrationReport()
+    started = time.perf_counter()
+
+    kept: dict[tuple[str, str, str], dict[Any, Any]] = {}
+    merged_ids = set()
+    deletes = []
+    for rel in repository.iter_documents("relationships", batch_size):
+        report.relationships += 1
+        source, target = _canonical(rel)
+        key = (str(source), str(target), rel["type"])
+        current = kept.get(key)
+        if current is None:
+            kept[key] = rel
+            continue
+        # Prefer a copy that is already canonical, so it needs no rewrite.
+        if _is_canonical(rel) and not _is_canonical(current):
+            kept[key], rel, current = rel, current, rel
+            merged_ids.discard(rel["_id"])
+        if _merge(current, rel):
+            merged_ids.add(current["_id"])
+        deletes.append(DeleteOne({"_id": rel["_id"]}))
+
+    updates = []
+    for rel in kept.values():
+        source, target = _canonical(rel)
+        rewrite = (source, target) != (rel["source_id"], rel["target"])
+        if not rewrite and rel["_id"] not in merged_ids:
+            continue
+        flip = rewrite and str(source) != str(rel["source_id"])
+        fields = {
+            field: value
+            for field, value in rel.items()
+            if field not in ENDPOINT_FIELDS
+        }
+        updates.append(
+            UpdateOne(
+                {"_id": rel["_id"]},
+                {"$set": {"source_id": source, "target": target, **fields}},
+            )
+        )
+        report.flipped += flip
+        report.retyped += rewrite and not flip
+        report.merged += rel["_id"] in merged_ids
+
+    if dry_run:
+        report.deleted = len(deletes)
+    else:
+        # Deletes first: a flipped document takes the key a deleted one held.
+        report.deleted = _send(repository, deletes, batch_size)
+        _send(repository, updates, batch_size)
+        repository.ensure_indexes()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.canonical_edges", description=__doc__
+    )
+    parser.add_argument("--uri", help="MongoDB URI (default: the app's repository)")
+    parser.add_argument("--data-dir", help="Use the JSON dumps in this folder")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report the changes without writing"
+    )
+    args = parser.parse_args(argv)
+
+    report = migrate(repository_from_args(args), args.batch_size, args.dry_run)
+    verb = "Would change" if args.dry_run else "Changed"
+    print(
+        f"Scanned {report.relationships} relationships in {report.seconds:.2f}s. "
+        f"{verb}: {report.deleted} duplicates deleted, {report.flipped} flipped, "
+        f"{report.retyped} given ObjectId endpoints, "
+        f"{report.merged} completed from their duplicates."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
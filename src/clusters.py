@@ -0,0 +1,280 @@
+import math
+from collections import Counter, defaultdict
+from typing import Iterable
+from urllib.parse import unquote
+
+import networkx as nx
+
+from .family_graph import FamilyGraph
+from .generations import GenerationIndex
+from .graph_create import SPOUSE_TYPES, get_color_by_house
+from .models import FamilyMember, Relationship
+from .render_cache import RenderCache
+
+# Families larger than this open the Home page graph grouped by house and branch.
+CLUSTER_THRESHOLD = 500
+UNKNOWN_HOUSE = "unknown house"
+
+# (house, branch); branch is None for members of the house itself.
+Cluster = tuple[str, str | None]
+
+
+def _escape(name: str) -> str:
+    """Percent-escape "/" (and "%") so a name cannot split a node id."""
+    return name.replace("%", "%25").replace("/", "%2F")
+
+
+def house_node(house: str) -> str:
+    return f"house:{_escape(house)}"
+
+
+def branch_node(house: str, branch: str) -> str:
+    return f"branch:{_escape(house)}/{_escape(branch)}"
+
+
+def _edge_kind(rel_type: str) -> str:
+    if rel_type == "child":
+        return "child"
+    if rel_type in SPOUSE_TYPES:
+        return "spouse"
+    return "other"
+
+
+class ClusterIndex:
+    """
+    Members grouped by house and branch, with the relationships between
+    groups counted once per data version.
+
+    A graph view collapses every house, or every branch of an expanded
+    house, into one node; only expanded branches (and members of an
+    expanded house who belong to no branch) bring their members in. The
+    work for a view is proportional to the number of groups plus the
+    members shown, not to the size of the family.
+    """
+
+    def __init__(
+        self, members: list[FamilyMember], relationships: list[Relationship]
+    ):
+        self.members: dict[Cluster, list[str]] = defaultdict(list)
+        self.branches: dict[str, list[str]] = defaultdict(list)
+        self._cluster_of: dict[str, Cluster] = {}
+        self._generations: dict[Cluster, list[int]] = {}
+        self._inferred: dict[Cluster, list[int]] | None = None
+        for member in members:
+            house = member.house or UNKNOWN_HOUSE
+            cluster = (house, member.branch)
+            member_id = str(member.id)
+            self.members[cluster].append(member_id)
+            self._cluster_of[member_id] = cluster
+            generation = member.generation or 0
+            low_high = self._generations.setdefault(cluster, [generation, generation])
+            low_high[0] = min(low_high[0], generation)
+            low_high[1] = max(low_high[1], generation)
+        for house, branch in sorted(self.members, key=lambda c: (c[0], c[1] or "")):
+            self.branches.setdefault(house, [])
+            if branch is not None:
+                self.branches[house].append(branch)
+
+        # Edges run like the family graph's: from the target to the source
+        # (child to parent).
+        self._pairs: dict[tuple[Cluster, Cluster], Counter] = defaultdict(Counter)
+        self._incident: dict[str, list[tuple[str, str, bool]]] = defaultdict(list)
+        for rel in relationships:
+            source_id, target_id = str(rel.source_id), str(rel.target)
+            if source_id not in self._cluster_of or target_id not in self._cluster_of:
+                continue
+            kind = _edge_kind(rel.type)
+            pair = (self._cluster_of[target_id], self._cluster_of[source_id])
+            self._pairs[pair][kind] += 1
+            self._incident[target_id].append((source_id, kind, True))
+            self._incident[source_id].append((target_id, kind, False))
+
+        self._graphs = RenderCache(maxsize=16)
+
+    def options(self) -> list[str]:
+        """Node ids of every house, each followed by its branches."""
+        options = []
+        for house, branches in self.branches.items():
+            options.append(house_node(house))
+            options.extend(branch_node(house, branch) for branch in branches)
+        return options
+
+    def describe(self, node: str) -> str:
+        """Display label of a house or branch node, with its member count."""
+        house, branch = self._parse(node)
+        if branch is None:
+            branches = [None, *self.branches[house]]
+            count = sum(len(self.members.get((house, b), ())) for b in branches)
+            return f"{house} ({count})"
+        return f"{branch} ({len(self.members[(house, branch)])})"
+
+    def expanded(self, nodes: Iterable[str]) -> frozenset[str]:
+        """The expanded nodes, plus the house of every expanded branch."""
+        expanded = set(nodes)
+        for node in list(expanded):
+            expanded.add(house_node(self._parse(node)[0]))
+        return frozenset(expanded)
+
+    def graph(
+        self,
+        family_graph: FamilyGraph,
+        expanded: Iterable[str] = (),
+        generations: GenerationIndex | None = None,
+    ) -> nx.DiGraph:
+        """
+        The family graph with everything but the expanded houses and
+        branches collapsed, built once per name key and expansion. With
+        generations (the index of the same data version), members and
+        groups carry the inferred generations instead of the stored ones.
+        """
+        expanded = self.expanded(expanded)
+        return self._graphs.get_or_create(
+            (family_graph.name_display_type, expanded, generations is not None),
+            lambda: self._build(family_graph, expanded, generations),
+        )
+
+    # Internals
+
+    @staticmethod
+    def _parse(node: str) -> Cluster:
+        kind, _, name = node.partition(":")
+        if kind == "house":
+            return unquote(name), None
+        house, _, branch = name.partition("/")
+        return unquote(house), unquote(branch)
+
+    @staticmethod
+    def _node(cluster: Cluster, expanded: frozenset[str]) -> str | None:
+        """The collapsed node standing for a group, or None if it is shown."""
+        house, branch = cluster
+        if house_node(house) not in expanded:
+            return house_node(house)
+        if branch is None or branch_node(house, branch) in expanded:
+            return None
+        return branch_node(house, branch)
+
+    def _inferred_generations(
+        self, generations: GenerationIndex
+    ) -> dict[Cluster, list[int]]:
+        """Lowest and highest inferred generation of each group, computed once."""
+        if self._inferred is None:
+            inferred: dict[Cluster, list[int]] = {}
+            for cluster, member_ids in self.members.items():
+                levels = [
+                    level
+                    for member_id in member_ids
+                    if (level := generations.level(member_id)) is not None
+                ]
+                # Groups caught in a cycle keep their stored generations.
+                inferred[cluster] = (
+                    [min(levels), max(levels)] if levels else self._generations[cluster]
+                )
+            self._inferred = inferred
+        return self._inferred
+
+    def _build(
+        self,
+        family_graph: FamilyGraph,
+        expanded: frozenset[str],
+        generations: GenerationIndex | None,
+    ) -> nx.DiGraph:
+        low_high = self._generations
+        if generations is not None:
+            low_high = self._inferred_generations(generations)
+        graph = nx.DiGraph()
+        collapsed: dict[str, list[Cluster]] = defaultdict(list)
+        shown: list[str] = []
+        for cluster, member_ids in self.members.items():
+            node = self._node(cluster, expanded)
+            if node is None:
+                shown.extend(member_ids)
+            else:
+                collapsed[node].append(cluster)
+
+        for node, clusters in collapsed.items():
+            graph.add_node(node, **self._node_attributes(node, clusters, low_high))
+        for member_id in shown:
+            if member_id in family_graph.graph:
+                graph.add_node(member_id, **family_graph.graph.nodes[member_id])
+                level = generations.level(member_id) if generations else None
+                if level is not None:
+                    graph.nodes[member_id]["generation"] = level
+        for member_id in shown:
+            if member_id not in graph:
+                continue
+            for _, other, data in family_graph.graph.out_edges(member_id, data=True):
+                if other in graph:
+                    graph.add_edge(member_id, other, **data)
+
+        totals: dict[tuple[str, str], Counter] = defaultdict(Counter)
+        for (a, b), kinds in self._pairs.items():
+            node_a, node_b = self._node(a, expanded), self._node(b, expanded)
+            # Edges touching shown members are counted member by member below.
+            if node_a is not None and node_b is not None and node_a != node_b:
+                totals[(node_a, node_b)].update(kinds)
+        for member_id in shown:
+            for other, kind, outgoing in self._incident.get(member_id, ()):
+                node = self._node(self._cluster_of[other], expanded)
+                if node is not None:
+                    pair = (member_id, node) if outgoing else (node, member_id)
+                    totals[pair][kind] += 1
+        for (u, v), kinds in totals.items():
+            if u in graph and v in graph:
+                graph.add_edge(u, v, **self._edge_attributes(kinds, graph.nodes[v]))
+        return graph
+
+    def _node_attributes(
+        self,
+        node: str,
+        clusters: list[Cluster],
+        low_high: dict[Cluster, list[int]],
+    ) -> dict:
+        house, branch = self._parse(node)
+        count = sum(len(self.members[cluster]) for cluster in clusters)
+        low = min(low_high[cluster][0] for cluster in clusters)
+        high = max(low_high[cluster][1] for cluster in clusters)
+        name = branch or house
+        color = get_color_by_house(name)
+        return dict(
+            label=f"{name}\n{count} members",
+            color={
+                "background": color,
+                "border": "#FFFFFF",
+                "highlight": {"background": color, "border": "#FFD700"},
+            },
+            title=(
+                f"{name}\n{house}\n{count} members\ngenerations {low}-{high}\n"
+                "Expand it above the graph to show its members."
+            ),
+            generation=low,
+            data={"house": house, "branch": branch, "members": count},
+            shape="dot",
+            size=12 + 6 * math.log2(count),
+            borderWidth=3,
+        )
+
+    @staticmethod
+    def _edge_attributes(kinds: Counter, parent: dict) -> dict:
+        total = sum(kinds.values())
+        attributes = dict(
+            label=str(total),
+            title="\n".join(
+                [
+                    f"{total} stored relationship{'' if total == 1 else 's'} "
+                    "between them, by type:",
+                    *(f"{count} {kind}" for kind, count in kinds.most_common()),
+                ]
+            ),
+            width=min(1 + 2 * math.log2(total), 12),
+            font={"color": "#ffffff", "strokeWidth": 0},
+        )
+        if kinds["child"]:
+            attributes.update(
+                arrows={"from": {"enabled": True}},
+                color=parent["color"]["background"],
+            )
+        else:
+            attributes.update(
+                color="white", dashes=True, arrows={"to": {"enabled": False}}
+            )
+        return attributes
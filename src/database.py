@@ -1,103 +1,810 @@
-from typing import Any
+import atexit
+import copy
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Hashable, Iterable, Iterator, Protocol
 
 import streamlit as st
-from pymongo import MongoClient
+from bson import ObjectId
+from pymongo import (
+    ASCENDING,
+    DeleteOne,
+    InsertOne,
+    MongoClient,
+    ReplaceOne,
+    UpdateOne,
+)
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+from . import perf
+from .graph_create import canonical_relationship
+
+WriteRequest = InsertOne | ReplaceOne | UpdateOne | DeleteOne
+
+DATABASE_NAME = "wufeng"
+MEMBERS_COLLECTION = "members"
+RELATIONSHIPS_COLLECTION = "relationships"
+# Member fields selectors need; long text fields are left on the server.
+MEMBER_SUMMARY_FIELDS = ("name", "house")
+
+# (collection, keys, options) of the secondary indexes ensure_indexes()
+# creates. find_relationships is served by the source_id and target ones;
+# relationships are written in canonical form, so the unique compound index
+# also keeps a symmetric relationship from being stored in both directions.
+INDEXES: list[tuple[str, list[tuple[str, int]], dict[str, Any]]] = [
+    ("relationships", [("source_id", ASCENDING)], {}),
+    ("relationships", [("target", ASCENDING)], {}),
+    (
+        "relationships",
+        [("source_id", ASCENDING), ("target", ASCENDING), ("type", ASCENDING)],
+        {"unique": True, "name": "source_target_type"},
+    ),
+]
+
+# Pool settings for the single MongoClient shared by every Streamlit session.
+MONGO_CLIENT_OPTIONS: dict[str, Any] = {
+    "maxPoolSize": 50,
+    "minPoolSize": 1,
+    "maxIdleTimeMS": 300_000,
+    "connectTimeoutMS": 5_000,
+    "serverSelectionTimeoutMS": 5_000,
+    "retryWrites": True,
+    "appname": "wufeng-lin-family",
+}
+
+
+class Backend(Protocol):
+    """Storage backend exposing pymongo-style collection handles."""
+
+    members: Any
+    relationships: Any
+
+    def close(self) -> None: ...
+
+
+class MongoBackend:
+    """
+    Backend backed by one pooled MongoClient.
+    The collection handles are created once and reused for every call.
+    """
+
+    # Reads wait on the network (releasing the GIL), so fetching both
+    # collections at once overlaps the waits.
+    concurrent_reads = True
+
+    def __init__(self, uri: str, database: str = DATABASE_NAME, **client_options):
+        self.client = MongoClient(uri, **{**MONGO_CLIENT_OPTIONS, **client_options})
+        db = self.client[database]
+        self.members = db[MEMBERS_COLLECTION]
+        self.relationships = db[RELATIONSHIPS_COLLECTION]
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def _compare(operator: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    def holds(value: Any, argument: Any) -> bool:
+        # Like MongoDB, ranges never match missing values or other types.
+        try:
+            return value is not None and operator(value, argument)
+        except TypeError:
+            return False
+
+    return holds
+
+
+_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "$in": lambda value, argument: value in argument,
+    "$nin": lambda value, argument: value not in argument,
+    "$ne": lambda value, argument: value != argument,
+    "$gt": _compare(lambda value, argument: value > argument),
+    "$gte": _compare(lambda value, argument: value >= argument),
+    "$lt": _compare(lambda value, argument: value < argument),
+    "$lte": _compare(lambda value, argument: value <= argument),
+}
+RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte"}
+
+
+def _is_operator(condition: Any) -> bool:
+    return isinstance(condition, dict) and bool(condition) and all(
+        key in _OPERATORS for key in condition
+    )
+
+
+def _holds(value: Any, condition: Any) -> bool:
+    """Whether a field value satisfies a value or an operator document."""
+    if _is_operator(condition):
+        return all(
+            _OPERATORS[operator](value, argument)
+            for operator, argument in condition.items()
+        )
+    return value == condition
+
+
+def _matches(document: dict[Any, Any], query: dict[Any, Any] | None) -> bool:
+    """
+    Return True if the document satisfies the query: field equality, the
+    $in/$nin/$ne/$gt/$gte/$lt/$lte operators and a top-level $or.
+    """
+    if not query:
+        return True
+    for field, condition in query.items():
+        if field == "$or":
+            if not any(_matches(document, branch) for branch in condition):
+                return False
+        elif not _holds(document.get(field), condition):
+            return False
+    return True
+
+
+def _hashable(value: Any) -> Hashable:
+    return value if isinstance(value, Hashable) else repr(value)
+
+
+def _index_name(keys: list[tuple[str, int]]) -> str:
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+class _SecondaryIndex:
+    """Hash index from a tuple of field values to the matching _ids."""
+
+    def __init__(self, keys: list[tuple[str, int]], unique: bool = False):
+        self.keys = keys
+        self.fields = tuple(field for field, _ in keys)
+        self.unique = unique
+        self.entries: dict[tuple, set[Any]] = defaultdict(set)
+
+    def key(self, document: dict[Any, Any]) -> tuple:
+        return tuple(_hashable(document.get(field)) for field in self.fields)
+
+    def add(self, document: dict[Any, Any]) -> None:
+        self.entries[self.key(document)].add(document["_id"])
+
+    def discard(self, document: dict[Any, Any]) -> None:
+        key = self.key(document)
+        ids = self.entries.get(key)
+        if ids is not None:
+            ids.discard(document["_id"])
+            if not ids:
+                del self.entries[key]
+
+    def conflicts(self, document: dict[Any, Any]) -> bool:
+        """Whether another document already holds this unique key."""
+        holders = self.entries.get(self.key(document), ())
+        return any(holder != document["_id"] for holder in holders)
+
+    def lookup(self, query: dict[Any, Any]) -> set[Any] | None:
+        """The candidate _ids for a query, or None if it cannot use this index."""
+        if len(self.fields) > 1:
+            values = [query.get(field) for field in self.fields]
+            if any(field not in query for field in self.fields) or any(
+                isinstance(value, dict) for value in values
+            ):
+                return None
+            return set(self.entries.get(tuple(map(_hashable, values)), ()))
+
+        field = self.fields[0]
+        if field not in query:
+            return None
+        condition = query[field]
+        if not _is_operator(condition):
+            return set(self.entries.get((_hashable(condition),), ()))
+        if "$in" in condition:
+            found: set[Any] = set()
+            for value in condition["$in"]:
+                found |= self.entries.get((_hashable(value),), set())
+            return found
+        if set(condition) <= RANGE_OPERATORS:
+            # Scan the distinct keys, not the documents.
+            found = set()
+            for (value,), ids in self.entries.items():
+                if _holds(value, condition):
+                    found |= ids
+            return found
+        return None
+
+
+class MemoryCollection:
+    """
+    In-process stand-in for a pymongo collection.
+    Supports the subset of the collection API used by FamilyRepository,
+    including secondary (and unique) indexes that find() uses for equality,
+    $in, range and $or queries.
+    """
+
+    def __init__(self, documents: list[dict[Any, Any]] | None = None):
+        self._documents: dict[Any, dict[Any, Any]] = {}
+        self._indexes: dict[str, _SecondaryIndex] = {}
+        for document in documents or []:
+            self.insert_one(document)
+
+    def create_index(
+        self,
+        keys: str | list[tuple[str, int]],
+        name: str | None = None,
+        unique: bool = False,
+    ) -> str:
+        if isinstance(keys, str):
+            keys = [(keys, ASCENDING)]
+        name = name or _index_name(keys)
+        if name in self._indexes:
+            return name
+        index = _SecondaryIndex(keys, unique)
+        for document in self._documents.values():
+            if unique and index.conflicts(document):
+                raise DuplicateKeyError(
+                    f"E11000 duplicate key error index: {name} dup key: "
+                    f"{index.key(document)}",
+                    11000,
+                )
+            index.add(document)
+        self._indexes[name] = index
+        return name
+
+    def index_information(self) -> dict[str, dict[str, Any]]:
+        information = {"_id_": {"key": [("_id", ASCENDING)]}}
+        for name, index in self._indexes.items():
+            information[name] = {"key": index.keys}
+            if index.unique:
+                information[name]["unique"] = True
+        return information
+
+    def _candidates(self, query: dict[Any, Any]) -> Iterable[Any] | None:
+        """_ids that may match the query, or None when it needs a full scan."""
+        if "_id" in query:
+            condition = query["_id"]
+            if not _is_operator(condition):
+                return [condition]
+            if set(condition) == {"$in"}:
+                # A repeated id must not yield its document twice.
+                return dict.fromkeys(condition["$in"])
+        if "$or" in query:
+            branches = [self._candidates(branch) for branch in query["$or"]]
+            if all(branch is not None for branch in branches):
+                return set().union(*branches)
+        best = None
+        for index in self._indexes.values():
+            found = index.lookup(query)
+            if found is not None and (best is None or len(found) < len(best)):
+                best = found
+        return best
+
+    def find(
+        self,
+        query: dict[Any, Any] | None = None,
+        projection: dict[str, Any] | None = None,
+        batch_size: int = 0,
+    ) -> Iterator[dict[Any, Any]]:
+        # batch_size is accepted for pymongo compatibility; documents are
+        # already yielded one at a time.
+        ids = self._candidates(query) if query else None
+        if ids is None:
+            candidates = list(self._documents.values())
+        else:
+            candidates = [
+                self._documents[document_id]
+                for document_id in ids
+                if document_id in self._documents
+            ]
+        for document in candidates:
+            if _matches(document, query):
+                yield self._project(document, projection)
+
+    def find_one(
+        self,
+        query: dict[Any, Any] | None = None,
+        projection: dict[str, Any] | None = None,
+    ) -> dict[Any, Any] | None:
+        return next(self.find(query, projection), None)
+
+    def _check_unique(
+        self,
+        document: dict[Any, Any],
+        pending: dict[str, set[tuple]] | None = None,
+    ) -> str | None:
+        """
+        Return an E11000 message if the document would break a unique index,
+        counting keys already taken by pending writes of the same batch.
+        """
+        for name, index in self._indexes.items():
+            if not index.unique:
+                continue
+            key = index.key(document)
+            if index.conflicts(document) or (
+                pending is not None and key in pending.setdefault(name, set())
+            ):
+                return f"E11000 duplicate key error index: {name} dup key: {key}"
+        if pending is not None:
+            for name, index in self._indexes.items():
+                if index.unique:
+                    pending[name].add(index.key(document))
+        return None
+
+    def insert_one(self, document: dict[Any, Any]) -> InsertOneResult:
+        # Like pymongo, assign an _id to the caller's document if it has none.
+        document.setdefault("_id", ObjectId())
+        if document["_id"] in self._documents:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error _id: {document['_id']}", 11000
+            )
+        stored = copy.deepcopy(document)
+        error = self._check_unique(stored)
+        if error:
+            raise DuplicateKeyError(error, 11000)
+        self._commit([{"op": "insert", "doc": stored}])
+        return InsertOneResult(document["_id"], True)
+
+    def update_one(
+        self, query: dict[Any, Any], update: dict[str, dict[Any, Any]]
+    ) -> UpdateResult:
+        for document in self.find(query, {"_id": 1}):
+            stored = self._documents[document["_id"]]
+            changes = copy.deepcopy(update.get("$set", {}))
+            modified = any(stored.get(key) != value for key, value in changes.items())
+            if modified:
+                error = self._check_unique({**stored, **changes})
+                if error:
+                    raise DuplicateKeyError(error, 11000)
+            self._commit([{"op": "update", "_id": stored["_id"], "set": changes}])
+            return UpdateResult({"n": 1, "nModified": int(modified)}, True)
+        return UpdateResult({"n": 0, "nModified": 0}, True)
+
+    def delete_one(self, query: dict[Any, Any]) -> DeleteResult:
+        for document in self.find(query, {"_id": 1}):
+            self._commit([{"op": "delete", "_id": document["_id"]}])
+            return DeleteResult({"n": 1}, True)
+        return DeleteResult({"n": 0}, True)
+
+    def bulk_write(
+        self, requests: list[WriteRequest], ordered: bool = True
+    ) -> BulkWriteResult:
+        """
+        Apply InsertOne, ReplaceOne, UpdateOne ($set) and DeleteOne requests
+        like pymongo's bulk_write, raising BulkWriteError with per-request
+        errors after the batch.
+        """
+        entries: list[dict[str, Any]] = []
+        pending: set[Any] = set()
+        pending_keys: dict[str, set[tuple]] = {}
+        deleted: set[Any] = set()
+        result: dict[str, Any] = {
+            "writeErrors": [],
+            "writeConcernErrors": [],
+            "nInserted": 0,
+            "nUpserted": 0,
+            "nMatched": 0,
+            "nModified": 0,
+            "nRemoved": 0,
+            "upserted": [],
+        }
+        for index, request in enumerate(requests):
+            if isinstance(request, InsertOne):
+                document = request._doc
+                document.setdefault("_id", ObjectId())
+                error = None
+                if document["_id"] in self._documents or document["_id"] in pending:
+                    error = f"E11000 duplicate key error _id: {document['_id']}"
+                else:
+                    error = self._check_unique(document, pending_keys)
+                if error:
+                    result["writeErrors"].append(
+                        {"index": index, "code": 11000, "errmsg": error, "op": document}
+                    )
+                    if ordered:
+                        break
+                    continue
+                pending.add(document["_id"])
+                entries.append({"op": "insert", "doc": copy.deepcopy(document)})
+                result["nInserted"] += 1
+            elif isinstance(request, ReplaceOne):
+                query, replacement = request._filter, request._doc
+                matched = next(self.find(query, {"_id": 1}), None)
+                if matched is not None:
+                    document_id = matched["_id"]
+                    stored = self._documents[document_id]
+                    result["nMatched"] += 1
+                    if {**replacement, "_id": document_id} != stored:
+                        result["nModified"] += 1
+                elif request._upsert:
+                    document_id = replacement.get("_id", query.get("_id", ObjectId()))
+                    result["nUpserted"] += 1
+                    result["upserted"].append({"index": index, "_id": document_id})
+                else:
+                    continue
+                document = {**copy.deepcopy(replacement), "_id": document_id}
+                error = self._check_unique(document, pending_keys)
+                if error:
+                    # Undo the counts taken for this request above.
+                    if matched is not None:
+                        result["nMatched"] -= 1
+                        result["nModified"] -= int(
+                            {**replacement, "_id": document_id} != stored
+                        )
+                    else:
+                        result["nUpserted"] -= 1
+                        result["upserted"].pop()
+                    result["writeErrors"].append(
+                        {"index": index, "code": 11000, "errmsg": error, "op": document}
+                    )
+                    if ordered:
+                        break
+                    continue
+                entries.append({"op": "replace", "doc": document})
+            elif isinstance(request, UpdateOne):
+                matched = next(self.find(request._filter, {"_id": 1}), None)
+                if matched is None:
+                    continue
+                stored = self._documents[matched["_id"]]
+                changes = copy.deepcopy(request._doc.get("$set", {}))
+                error = self._check_unique({**stored, **changes}, pending_keys)
+                if error:
+                    result["writeErrors"].append(
+                        {"index": index, "code": 11000, "errmsg": error, "op": changes}
+                    )
+                    if ordered:
+                        break
+                    continue
+                result["nMatched"] += 1
+                if any(stored.get(key) != value for key, value in changes.items()):
+                    result["nModified"] += 1
+                entries.append({"op": "update", "_id": matched["_id"], "set": changes})
+            elif isinstance(request, DeleteOne):
+                matched = next(self.find(request._filter, {"_id": 1}), None)
+                if matched is not None and matched["_id"] not in deleted:
+                    deleted.add(matched["_id"])
+                    result["nRemoved"] += 1
+                    entries.append({"op": "delete", "_id": matched["_id"]})
+            else:
+                raise TypeError(f"Unsupported bulk request: {request!r}")
+
+        self._commit(entries)
+        if result["writeErrors"]:
+            raise BulkWriteError(result)
+        return BulkWriteResult(result, True)
+
+    def _commit(self, entries: list[dict[str, Any]]) -> None:
+        for entry in entries:
+            self._apply(entry)
+
+    def _apply(self, entry: dict[str, Any]) -> None:
+        op = entry["op"]
+        if op in ("insert", "replace"):
+            document = entry["doc"]
+            previous = self._documents.get(document["_id"])
+            if previous is not None:
+                self._unindex(previous)
+            self._documents[document["_id"]] = document
+            self._index(document)
+        elif op == "update" and entry["_id"] in self._documents:
+            document = self._documents[entry["_id"]]
+            self._unindex(document)
+            document.update(entry["set"])
+            self._index(document)
+        elif op == "delete":
+            previous = self._documents.pop(entry["_id"], None)
+            if previous is not None:
+                self._unindex(previous)
+
+    def _index(self, document: dict[Any, Any]) -> None:
+        for index in self._indexes.values():
+            index.add(document)
+
+    def _unindex(self, document: dict[Any, Any]) -> None:
+        for index in self._indexes.values():
+            index.discard(document)
+
+    @staticmethod
+    def _project(
+        document: dict[Any, Any], projection: dict[str, Any] | None
+    ) -> dict[Any, Any]:
+        if not projection:
+            return copy.deepcopy(document)
+        fields = {key for key, include in projection.items() if include}
+        fields.add("_id")
+        return {key: copy.deepcopy(document[key]) for key in fields if key in document}
+
+
+class MemoryBackend:
+    """Backend keeping both collections in process memory."""
+
+    def __init__(
+        self,
+        members: list[dict[Any, Any]] | None = None,
+        relationships: list[dict[Any, Any]] | None = None,
+    ):
+        self.members = MemoryCollection(members)
+        self.relationships = MemoryCollection(relationships)
+
+    def close(self) -> None:
+        pass
+
+
+class FamilyRepository:
+    """
+    Data access object shared by every session in the process.
+    All reads and writes of members and relationships go through here.
+    """
+
+    def __init__(self, backend: Backend):
+        self.backend = backend
+        self._closed = False
+        self._version = 0
+        self._version_lock = threading.Lock()
+
+    @property
+    def data_version(self) -> int:
+        """Counter bumped by every write made through this repository."""
+        return self._version
+
+    def _bump_version(self) -> None:
+        with self._version_lock:
+            self._version += 1
+
+    @property
+    def members(self):
+        self._ensure_open()
+        return self.backend.members
+
+    @property
+    def relationships(self):
+        self._ensure_open()
+        return self.backend.relationships
+
+    @property
+    def concurrent_reads(self) -> bool:
+        """
+        Whether the backend gains from reading both collections at once.
+        In-process backends are CPU-bound and only contend for the GIL.
+        """
+        return getattr(self.backend, "concurrent_reads", False)
+
+    def _ensure_open(self) -> None:
+        if self._closed:
+            raise RuntimeError("FamilyRepository has been closed.")
+
+    def ensure_indexes(self) -> None:
+        """
+        Create the INDEXES that are missing. Creating an existing index is a
+        no-op; an index the data violates is reported and skipped.
+        """
+        for collection, keys, options in INDEXES:
+            try:
+                getattr(self, collection).create_index(keys, **options)
+            except OperationFailure as error:
+                print(f"Could not create index {keys} on {collection}: {error}")
+                if collection == "relationships":
+                    print("Run python -m src.canonical_edges to merge duplicates.")
+
+    @perf.timed("db.load_documents")
+    def load_documents(self) -> tuple[list[dict[Any, Any]], list[dict[Any, Any]]]:
+        """Return every member and relationship document."""
+        with perf.span("db.load_members"):
+            members = list(self.members.find({}))
+        with perf.span("db.load_relationships"):
+            relationships = list(self.relationships.find({}))
+        return members, relationships
+
+    @perf.timed("db.find_relationships")
+    def find_relationships(
+        self,
+        member_ids: Iterable[Any] | None = None,
+        types: Iterable[str] | None = None,
+    ) -> list[dict[Any, Any]]:
+        """
+        Relationships touching any of member_ids (as source or target),
+        optionally only of the given types.
+        """
+        query: dict[str, Any] = {}
+        if member_ids is not None:
+            ids = list(member_ids)
+            query["$or"] = [{"source_id": {"$in": ids}}, {"target": {"$in": ids}}]
+        if types is not None:
+            query["type"] = {"$in": list(types)}
+        return list(self.relationships.find(query))
+
+    @perf.timed("db.member_summaries")
+    def member_summaries(self) -> list[dict[Any, Any]]:
+        """_id, name and house of every member, for selectors."""
+        projection = {field: 1 for field in MEMBER_SUMMARY_FIELDS}
+        return list(self.members.find({}, projection))
+
+    @perf.timed("db.get_member")
+    def get_member(self, member_id: Any) -> dict[Any, Any] | None:
+        """Return one full member document by _id, or None."""
+        return self.members.find_one({"_id": member_id})
+
+    def iter_documents(
+        self,
+        collection: str,
+        batch_size: int = 1000,
+        projection: dict[str, Any] | None = None,
+    ) -> Iterator[dict[Any, Any]]:
+        """Stream every document (or the projected fields) of a collection."""
+        return perf.timed_iter(
+            "db.iter_documents",
+            getattr(self, collection).find({}, projection, batch_size=batch_size),
+        )
+
+    @perf.timed("db.bulk_write")
+    def bulk_write(
+        self,
+        collection: str,
+        requests: list[WriteRequest],
+        ordered: bool = True,
+    ) -> BulkWriteResult:
+        """
+        Send one batch of write requests to "members" or "relationships".
+        Raises pymongo's BulkWriteError when any request fails.
+        """
+        try:
+            return getattr(self, collection).bulk_write(requests, ordered=ordered)
+        finally:
+            # Even a failed batch may have written some of its requests.
+            if requests:
+                self._bump_version()
+
+    @perf.timed("db.add_document")
+    def add_document(self, document: dict[Any, Any]) -> Any:
+        """Insert a member document and return its id."""
+        inserted_id = self.members.insert_one(document).inserted_id
+        self._bump_version()
+        return inserted_id
+
+    @perf.timed("db.update_document")
+    def update_document(self, document_id: Any, updated_data: dict[Any, Any]) -> int:
+        """Apply updated_data to a member and return the modified count."""
+        result = self.members.update_one({"_id": document_id}, {"$set": updated_data})
+        if result.modified_count:
+            self._bump_version()
+        return result.modified_count
+
+    @perf.timed("db.delete_document")
+    def delete_document(self, document_id: Any) -> int:
+        """Delete a member and return the deleted count."""
+        deleted_count = self.members.delete_one({"_id": document_id}).deleted_count
+        if deleted_count:
+            self._bump_version()
+        return deleted_count
+
+    @perf.timed("db.add_relationship")
+    def add_relationship(self, rel_doc: dict[Any, Any]) -> Any:
+        """Insert a relationship document in canonical form and return its id."""
+        canonical_relationship(rel_doc)
+        inserted_id = self.relationships.insert_one(rel_doc).inserted_id
+        self._bump_version()
+        return inserted_id
+
+    def add_relationships(self, rel_docs: list[dict[Any, Any]]) -> list[Any]:
+        """
+        Insert several relationships in canonical form with one unordered
+        bulk_write (and one data_version bump) and return their ids. Raises
+        BulkWriteError if any is rejected; the others are still written.
+        """
+        requests = [InsertOne(canonical_relationship(rel_doc)) for rel_doc in rel_docs]
+        self.bulk_write("relationships", requests, ordered=False)
+        return [rel_doc["_id"] for rel_doc in rel_docs]
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self.backend.close()
+
+
+_repository: FamilyRepository | None = None
+_repository_lock = threading.Lock()
+
+
+def _default_backend() -> Backend:
+    # WUFENG_DATA_DIR runs the app offline from the JSON dumps in that folder.
+    data_dir = os.environ.get("WUFENG_DATA_DIR")
+    if data_dir:
+        from .file_backend import FileBackend
+
+        return FileBackend.from_directory(data_dir)
 
-
-def load_documents():
-    # Load members.
     # Get the MongoDB URI from your secrets.toml file
-    mongodb_uri = st.secrets["mongodb"]["uri"]
+    return MongoBackend(st.secrets["mongodb"]["uri"])
 
-    # Create a MongoClient instance
-    client = MongoClient(mongodb_uri)
 
-    # Specify the database and collection names.
-    # These will be created on the first write if they don't exist.
-    db = client["wufeng"]
-    members_col = db["members"]
-    relationships_col = db["relationships"]
+def get_repository() -> FamilyRepository:
+    """Return the process-wide repository, creating it on first use."""
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                repository = FamilyRepository(_default_backend())
+                repository.ensure_indexes()
+                _repository = repository
+    return _repository
 
-    # Retrieve all documents from the collection
-    members: list[dict[Any, Any]] = list(members_col.find({}))
-    relationships = list(relationships_col.find({}))
 
-    # Now you can use the retrieved documents as needed.
-    st.write(f"Retrieved {len(members)} records from MongoDB.")
-    st.write(f"Retrieved {len(relationships)} relationships from MongoDB.")
+def set_repository(repository: FamilyRepository | None) -> FamilyRepository | None:
+    """
+    Replace the process-wide repository (e.g. with a MemoryBackend in tests).
+    Returns the previous repository without closing it.
+    """
+    global _repository
+    with _repository_lock:
+        previous, _repository = _repository, repository
+    return previous
 
-    return members, relationships
 
+def close_repository() -> None:
+    """Close the process-wide repository and release its connections."""
+    previous = set_repository(None)
+    if previous is not None:
+        previous.close()
 
-def add_document(document: dict[Any, Any]):
-    # Get the MongoDB URI from your secrets.toml file
-    mongodb_uri = st.secrets["mongodb"]["uri"]
 
-    # Create a MongoClient instance
-    client = MongoClient(mongodb_uri)
+atexit.register(close_repository)
 
-    # Specify the database and collection names.
-    db = client["wufeng"]
-    collection = db["members"]
 
-    # Insert the document into the collection
-    result = collection.insert_one(document)
+def load_documents():
+    members, relationships = get_repository().load_documents()
 
-    st.write(f"Document inserted with ID: {result.inserted_id}")
+    st.write(f"Retrieved {len(members)} records from MongoDB.")
+    st.write(f"Retrieved {len(relationships)} relationships from MongoDB.")
 
+    return members, relationships
 
-def update_document(document_id: str, updated_data: dict[Any, Any]):
-    # Get the MongoDB URI from your secrets.toml file
-    mongodb_uri = st.secrets["mongodb"]["uri"]
 
-    # Create a MongoClient instance
-    client = MongoClient(mongodb_uri)
+def add_document(document: dict[Any, Any]):
+    inserted_id = get_repository().add_document(document)
+
+    st.write(f"Document inserted with ID: {inserted_id}")
 
-    # Specify the database and collection names.
-    db = client["wufeng"]
-    collection = db["members"]
 
-    # Update the document with the specified ID
-    result = collection.update_one({"_id": document_id}, {"$set": updated_data})
+def update_document(document_id: str, updated_data: dict[Any, Any]):
+    modified_count = get_repository().update_document(document_id, updated_data)
 
-    if result.modified_count > 0:
+    if modified_count > 0:
         st.write(f"Document with ID {document_id} updated successfully.")
     else:
         st.write(f"No document found with ID {document_id}.")
 
 
 def delete_document(document_id: str):
-    # Get the MongoDB URI from your secrets.toml file
-    mongodb_uri = st.secrets["mongodb"]["uri"]
-
-    # Create a MongoClient instance
-    client = MongoClient(mongodb_uri)
-
-    # Specify the database and collection names.
-    db = client["wufeng"]
-    collection = db["members"]
+    deleted_count = get_repository().delete_document(document_id)
 
-    # Delete the document with the specified ID
-    result = collection.delete_one({"_id": document_id})
-
-    if result.deleted_count > 0:
+    if deleted_count > 0:
         st.write(f"Document with ID {document_id} deleted successfully.")
     else:
         st.write(f"No document found with ID {document_id}.")
 
 
 def add_relationship(rel_doc: dict):
-    # Get the MongoDB URI from your secrets.toml file
-    mongodb_uri = st.secrets["mongodb"]["uri"]
-
-    # Create a MongoClient instance
-    client = MongoClient(mongodb_uri)
-
-    # Specify the database and collection names.
-    db = client["wufeng"]
-    relationships_col = db["relationships"]
-
-    # Insert the relationship document into the collection
-    result = relationships_col.insert_one(rel_doc)
-
-    st.write(f"Relationship inserted with ID: {result.inserted_id}")
+    try:
+        inserted_id = get_repository().add_relationship(rel_doc)
+    except DuplicateKeyError:
+        st.error("This relationship already exists.")
+        return None
+
+    st.write(f"Relationship inserted with ID: {inserted_id}")
+    return inserted_id
+
+
+def add_relationships(rel_docs: list[dict]):
+    """Insert a batch of relationships and return the ids of those written."""
+    try:
+        inserted_ids = get_repository().add_relationships(rel_docs)
+    except BulkWriteError as exc:
+        # Unordered: every row without an error was written.
+        errors = exc.details.get("writeErrors", [])
+        rejected = {error["index"] for error in errors}
+        for error in errors:
+            st.error(f"Row {error['index'] + 1} was rejected: {error['errmsg']}")
+        inserted_ids = [
+            rel_doc["_id"]
+            for index, rel_doc in enumerate(rel_docs)
+            if index not in rejected
+        ]
+
+    st.write(f"{len(inserted_ids)} of {len(rel_docs)} relationships inserted.")
+    return inserted_ids
@@ -0,0 +1,200 @@
+import itertools
+from collections import defaultdict
+from typing import Any, Hashable
+
+import networkx as nx
+
+from .graph_create import member_node_attributes, relationship_edge_attributes
+from .models import FamilyMember, Relationship
+
+Edge = tuple[str, str]
+
+
+def relationship_key(rel: Relationship) -> Hashable:
+    """Identity of a relationship: its _id, or its content if it has none."""
+    if rel.id is not None:
+        return str(rel.id)
+    return (str(rel.source_id), rel.type, str(rel.target))
+
+
+class FamilyGraph:
+    """
+    A family graph kept up to date by deltas.
+
+    The wrapped nx.DiGraph always equals what create_family_graph would
+    build from the same members and relationships (in the order they were
+    applied), but each upsert or removal only recomputes the node and edges
+    it affects.
+    """
+
+    def __init__(
+        self,
+        members: list[FamilyMember] | None = None,
+        relationships: list[Relationship] | None = None,
+        name_display_type: str | None = None,
+    ):
+        self.name_display_type = name_display_type
+        self.graph = nx.DiGraph()
+        self._members: dict[str, FamilyMember] = {}
+        # Relationship key -> (insertion sequence, relationship).
+        self._relationships: dict[Hashable, tuple[int, Relationship]] = {}
+        self._by_edge: dict[Edge, set[Hashable]] = defaultdict(set)
+        self._by_member: dict[str, set[Hashable]] = defaultdict(set)
+        self._sequence = itertools.count()
+        for member in members or []:
+            self.upsert_member(member)
+        for rel in relationships or []:
+            self.add_relationship(rel)
+
+    def copy(self) -> "FamilyGraph":
+        """Return an independent copy that can take deltas of its own."""
+        clone = FamilyGraph.__new__(FamilyGraph)
+        clone.name_display_type = self.name_display_type
+        clone.graph = self.graph.copy()
+        clone._members = dict(self._members)
+        clone._relationships = dict(self._relationships)
+        clone._by_edge = defaultdict(set, {k: set(v) for k, v in self._by_edge.items()})
+        clone._by_member = defaultdict(
+            set, {k: set(v) for k, v in self._by_member.items()}
+        )
+        clone._sequence = itertools.count(next(self._sequence))
+        return clone
+
+    # Members
+
+    def upsert_member(self, member: FamilyMember) -> None:
+        node_id = str(member.id)
+        previous = self._members.get(node_id)
+        self._members[node_id] = member
+        self.graph.add_node(
+            node_id, **member_node_attributes(member, self.name_display_type)
+        )
+        if previous is None:
+            # The member may complete relationships that were skipped so far.
+            self._refresh_edges(self._edges_of(self._by_member[node_id]))
+        elif (previous.branch, previous.house) != (member.branch, member.house):
+            # Only child edges drawn from this parent carry its colour.
+            self._refresh_edges(
+                self._edges_of(
+                    key
+                    for key in self._by_member[node_id]
+                    if self._relationships[key][1].type == "child"
+                    and str(self._relationships[key][1].source_id) == node_id
+                )
+            )
+
+    def remove_member(self, member_id: Any) -> None:
+        node_id = str(member_id)
+        if self._members.pop(node_id, None) is None:
+            return
+        # Dropping the node drops its edges; none of its relationships can
+        # be drawn until it returns, and no other edge depends on them.
+        self.graph.remove_node(node_id)
+
+    # Relationships
+
+    def add_relationship(self, rel: Relationship) -> None:
+        key = relationship_key(rel)
+        previous = self._relationships.get(key)
+        if previous is not None:
+            # An edited relationship keeps its place in the merge order.
+            self.remove_relationship(key)
+            sequence = previous[0]
+        else:
+            sequence = next(self._sequence)
+        self._relationships[key] = (sequence, rel)
+        self._index(key, rel, add=True)
+        self._refresh_edges(self._edges_of([key]))
+
+    def remove_relationship(self, key: Hashable) -> None:
+        """Remove a relationship by relationship_key()."""
+        entry = self._relationships.pop(key, None)
+        if entry is None:
+            return
+        edges = self._edges_of([key], entry[1])
+        self._index(key, entry[1], add=False)
+        self._refresh_edges(edges)
+
+    def sync(
+        self, members: list[FamilyMember], relationships: list[Relationship]
+    ) -> None:
+        """Apply whatever deltas turn this graph into the given dataset."""
+        self.sync_members(members)
+        self.sync_relationships(relationships)
+
+    def sync_members(self, members: list[FamilyMember]) -> None:
+        """
+        The member half of sync(), which can run while relationships are
+        still loading.
+        """
+        incoming = {str(member.id): member for member in members}
+        for node_id in set(self._members) - set(incoming):
+            self.remove_member(node_id)
+        for node_id, member in incoming.items():
+            if self._members.get(node_id) != member:
+                self.upsert_member(member)
+
+    def sync_relationships(self, relationships: list[Relationship]) -> None:
+        """The relationship half of sync()."""
+        incoming_rels = {relationship_key(rel): rel for rel in relationships}
+        for key in set(self._relationships) - set(incoming_rels):
+            self.remove_relationship(key)
+        for key, rel in incoming_rels.items():
+            current = self._relationships.get(key)
+            if current is None or current[1] != rel:
+                self.add_relationship(rel)
+
+    # Internals
+
+    def _index(self, key: Hashable, rel: Relationship, add: bool) -> None:
+        source_id, target_id = str(rel.source_id), str(rel.target)
+        buckets = [
+            self._by_edge[(target_id, source_id)],
+            self._by_member[source_id],
+            self._by_member[target_id],
+        ]
+        for bucket in buckets:
+            if add:
+                bucket.add(key)
+            else:
+                bucket.discard(key)
+
+    def _edges_of(self, keys, rel: Relationship | None = None) -> set[Edge]:
+        """Graph edges whose attributes may depend on the given relationships."""
+        edges = set()
+        for key in keys:
+            current = rel if rel is not None else self._relationships[key][1]
+            edges.add((str(current.target), str(current.source_id)))
+        return edges
+
+    def _is_active(self, rel: Relationship) -> bool:
+        return str(rel.source_id) in self._members and str(rel.target) in self._members
+
+    def _refresh_edges(self, edges: set[Edge]) -> None:
+        for edge in edges:
+            self._refresh_edge(edge)
+
+    def _refresh_edge(self, edge: Edge) -> None:
+        target_id, source_id = edge
+        contributions = []
+        for key in self._by_edge.get(edge, ()):
+            sequence, rel = self._relationships[key]
+            if not self._is_active(rel):
+                continue
+            contributions.append((sequence, rel))
+
+        if not contributions:
+            if self.graph.has_edge(target_id, source_id):
+                self.graph.remove_edge(target_id, source_id)
+            return
+
+        # Repeated add_edge calls in create_family_graph merge attributes in
+        # relationship order; fold them the same way.
+        parent_data = self.graph.nodes[source_id]["data"]
+        attributes: dict[str, Any] = {}
+        for _, rel in sorted(contributions, key=lambda entry: entry[0]):
+            attributes.update(relationship_edge_attributes(rel.type, parent_data))
+        self.graph.add_edge(target_id, source_id)
+        edge_data = self.graph.edges[target_id, source_id]
+        edge_data.clear()
+        edge_data.update(attributes)
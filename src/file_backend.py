@@ -0,0 +1,226 @@
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Iterator
+
+from bson import ObjectId, json_util
+from pymongo.results import (
+    BulkWriteResult,
+    DeleteResult,
+    InsertOneResult,
+    UpdateResult,
+)
+
+from .database import MemoryCollection
+
+READ_CHUNK_SIZE = 1 << 16
+
+
+def extended_json_hook(obj: dict[str, Any]) -> Any:
+    """
+    Decode MongoDB extended JSON such as {"$oid": "..."}.
+    Plain objects and ObjectIds take a fast path; other $-types go through
+    bson.json_util.
+    """
+    if len(obj) != 1:
+        return obj
+    if "$oid" in obj:
+        return ObjectId(obj["$oid"])
+    if next(iter(obj)).startswith("$"):
+        return json_util.object_hook(obj)
+    return obj
+
+
+_decoder = json.JSONDecoder(object_hook=extended_json_hook)
+_skip_whitespace = re.compile(r"[ \t\r\n]*").match
+
+
+def iter_json_records(path: str | Path) -> Iterator[dict[Any, Any]]:
+    """
+    Stream documents from a JSON array or NDJSON file in constant memory.
+    Records are decoded one at a time from a rolling buffer, so large dumps
+    are never loaded whole.
+    """
+    with open(path, "r", encoding="utf-8") as handle:
+        buffer = ""
+        position = 0
+        eof = False
+        in_array = None
+
+        def fill() -> bool:
+            nonlocal buffer, position, eof
+            chunk = handle.read(READ_CHUNK_SIZE)
+            buffer = buffer[position:] + chunk
+            position = 0
+            eof = not chunk
+            return bool(chunk)
+
+        def skip_whitespace() -> bool:
+            # Returns False once the file is exhausted.
+            nonlocal position
+            while True:
+                position = _skip_whitespace(buffer, position).end()
+                if position < len(buffer):
+                    return True
+                if not fill():
+                    return False
+
+        if not skip_whitespace():
+            return
+        if buffer[position] == "[":
+            in_array = True
+            position += 1
+        while skip_whitespace():
+            if in_array and buffer[position] == "]":
+                return
+            while True:
+                try:
+                    record, end = _decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if eof or not fill():
+                        raise
+                    continue
+                # A record ending exactly at the buffer edge may be a
+                # truncated number or literal; read on to be sure.
+                if end == len(buffer) and not eof and fill():
+                    continue
+                break
+            position = end
+            yield record
+            if in_array:
+                if not skip_whitespace():
+                    raise ValueError(f"Unterminated JSON array in {path}")
+                if buffer[position] == ",":
+                    position += 1
+
+
+def _dumps(value: Any) -> str:
+    return json_util.dumps(value, ensure_ascii=False)
+
+
+class FileCollection(MemoryCollection):
+    """
+    Collection loaded from a JSON dump with an append-only journal.
+    Every write is appended to the journal as a single line before it is
+    acknowledged; compact() folds the journal back into the dump.
+    """
+
+    def __init__(self, path: str | Path, fsync: bool = True):
+        super().__init__()
+        self.path = Path(path)
+        self.journal_path = self.path.with_suffix(".journal")
+        self.fsync = fsync
+        self._write_lock = threading.Lock()
+        if self.path.exists():
+            for document in iter_json_records(self.path):
+                self._documents[document["_id"]] = document
+        self._replay_journal()
+
+    def _replay_journal(self) -> None:
+        if not self.journal_path.exists():
+            return
+        valid_bytes = 0
+        with open(self.journal_path, "rb") as journal:
+            for line in journal:
+                try:
+                    entry = _decoder.decode(line.decode("utf-8"))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                self._apply(entry)
+                valid_bytes += len(line)
+        # Drop a torn trailing write left by a crash mid-append.
+        if valid_bytes != self.journal_path.stat().st_size:
+            os.truncate(self.journal_path, valid_bytes)
+
+    def _append(self, entry: dict[str, Any]) -> None:
+        self._append_many([entry])
+
+    def _append_many(self, entries: list[dict[str, Any]]) -> None:
+        data = "".join(_dumps(entry) + "\n" for entry in entries).encode("utf-8")
+        fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            written = 0
+            while written < len(data):
+                written += os.write(fd, data[written:])
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    # Writes go through MemoryCollection, whose _commit is journalled below.
+    def insert_one(self, document: dict[Any, Any]) -> InsertOneResult:
+        with self._write_lock:
+            return super().insert_one(document)
+
+    def update_one(
+        self, query: dict[Any, Any], update: dict[str, dict[Any, Any]]
+    ) -> UpdateResult:
+        with self._write_lock:
+            return super().update_one(query, update)
+
+    def delete_one(self, query: dict[Any, Any]) -> DeleteResult:
+        with self._write_lock:
+            return super().delete_one(query)
+
+    def bulk_write(self, requests: list[Any], ordered: bool = True) -> BulkWriteResult:
+        with self._write_lock:
+            return super().bulk_write(requests, ordered=ordered)
+
+    def _commit(self, entries: list[dict[str, Any]]) -> None:
+        # One append and one fsync for the whole batch.
+        if entries:
+            self._append_many(entries)
+        super()._commit(entries)
+
+    def compact(self) -> None:
+        """Atomically rewrite the dump with the journal applied."""
+        with self._write_lock:
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                handle.write("[\n")
+                for index, document in enumerate(self._documents.values()):
+                    if index:
+                        handle.write(",\n")
+                    handle.write(_dumps(document))
+                handle.write("\n]\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_path, self.path)
+            if self.journal_path.exists():
+                os.truncate(self.journal_path, 0)
+
+
+class FileBackend:
+    """
+    Offline backend reading members_backup.json and relationships_backup.json
+    (MongoDB extended JSON, as written by mongoexport --jsonArray).
+    """
+
+    def __init__(
+        self,
+        members_path: str | Path = "members_backup.json",
+        relationships_path: str | Path = "relationships_backup.json",
+        fsync: bool = True,
+    ):
+        self.members = FileCollection(members_path, fsync=fsync)
+        self.relationships = FileCollection(relationships_path, fsync=fsync)
+
+    @classmethod
+    def from_directory(cls, data_dir: str | Path, fsync: bool = True) -> "FileBackend":
+        data_dir = Path(data_dir)
+        return cls(
+            data_dir / "members_backup.json",
+            data_dir / "relationships_backup.json",
+            fsync=fsync,
+        )
+
+    def compact(self) -> None:
+        self.members.compact()
+        self.relationships.compact()
+
+    def close(self) -> None:
+        pass
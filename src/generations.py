@@ -0,0 +1,431 @@
+"""
+Generation levels inferred from the parent/child edges.
+
+    python -m src.generations --data-dir . --output conflicts.json
+    python -m src.generations --apply
+
+Spouses are merged into one group so they share a level. One topological
+pass over the child edges between groups then puts every group one level
+below its lowest parent; groups with no parents keep their stored
+generation (or FIRST_GENERATION when none is stored). Reported conflicts:
+
+- stored: a member whose stored generation differs from the inferred one
+- span: a child edge that spans more than one generation, e.g. between
+  spouses recorded in different generations
+- cycle: a member on, or descended from, a parent/child cycle (no level)
+
+--apply writes the inferred level to every member whose stored generation
+is missing or differs. The exit status is 1 while conflicts remain, that
+is after --apply only span and cycle conflicts (or failed updates).
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict, deque
+from typing import Any, Hashable, Iterable
+
+import networkx as nx
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from . import perf
+from .bulk import DEFAULT_BATCH_SIZE, batched, repository_from_args
+from .family_graph import relationship_key
+from .graph_create import SPOUSE_TYPES, load_family_members, load_relationships
+from .integrity import Issue
+from .models import FamilyMember, Relationship
+
+FIRST_GENERATION = 1
+CONFLICT_KINDS = ("stored", "span", "cycle")
+
+
+class GenerationIndex:
+    """
+    Inferred generation of every member, kept up to date as relationships
+    are added. Levels belong to spouse groups (a union-find over spouse
+    edges); a group's level is the highest of its parent groups' plus one.
+    """
+
+    def __init__(
+        self,
+        members: list[FamilyMember],
+        relationships: list[Relationship],
+    ):
+        self._reset(members, relationships)
+
+    def _reset(
+        self, members: list[FamilyMember], relationships: list[Relationship]
+    ) -> None:
+        self.stored: dict[str, int | None] = {
+            str(member.id): member.generation for member in members
+        }
+        self.parents: dict[str, list[str]] = defaultdict(list)
+        self.children: dict[str, list[str]] = defaultdict(list)
+        self._relationships: dict[Hashable, tuple[str, str, str]] = {}
+        # Union-find over spouse edges: member -> parent pointer, and
+        # group root -> its members and level.
+        self._group = {member_id: member_id for member_id in self.stored}
+        self._members: dict[str, list[str]] = {
+            member_id: [member_id] for member_id in self.stored
+        }
+        self._level: dict[str, int | None] = {}
+        for rel in relationships:
+            source, target = self._link(rel)
+            if source is not None and rel.type in SPOUSE_TYPES:
+                self._union(self._find(source), self._find(target))
+        self._infer()
+
+    def copy(self) -> "GenerationIndex":
+        """Return an independent copy that can take updates of its own."""
+        clone = GenerationIndex.__new__(GenerationIndex)
+        clone.stored = dict(self.stored)
+        clone.parents = defaultdict(
+            list, {k: list(v) for k, v in self.parents.items()}
+        )
+        clone.children = defaultdict(
+            list, {k: list(v) for k, v in self.children.items()}
+        )
+        clone._relationships = dict(self._relationships)
+        clone._group = dict(self._group)
+        clone._members = {k: list(v) for k, v in self._members.items()}
+        clone._level = dict(self._level)
+        return clone
+
+    # Queries
+
+    def level(self, member_id: Any) -> int | None:
+        """The member's inferred generation, or None on a cycle."""
+        return self._level.get(self._find(str(member_id)))
+
+    @property
+    def levels(self) -> dict[str, int]:
+        """Inferred generation of every member that has one."""
+        return {
+            member_id: level
+            for group, members in self._members.items()
+            if (level := self._level.get(group)) is not None
+            for member_id in members
+        }
+
+    def conflicts(self) -> list[Issue]:
+        """Stored generations, edges and cycles that disagree with the levels."""
+        issues = []
+        for member_id, stored in self.stored.items():
+            level = self.level(member_id)
+            if level is None:
+                issues.append(
+                    Issue("cycle", [member_id], "on or below a parent/child cycle")
+                )
+            elif stored is not None and stored != level:
+                issues.append(
+                    Issue("stored", [member_id], f"stored {stored}, inferred {level}")
+                )
+        for parent, children in self.children.items():
+            parent_level = self.level(parent)
+            for child in children:
+                child_level = self.level(child)
+                if (
+                    parent_level is not None
+                    and child_level is not None
+                    and child_level != parent_level + 1
+                ):
+                    issues.append(
+                        Issue(
+                            "span",
+                            [child, parent],
+                            f"generation {child_level}, parent's {parent_level}",
+                        )
+                    )
+        return issues
+
+    def relevel(self, graph: nx.DiGraph) -> nx.DiGraph:
+        """A copy of a family graph whose nodes carry the inferred generation."""
+        graph = graph.copy()
+        for node, data in graph.nodes(data=True):
+            level = self.level(node) if node in self.stored else None
+            if level is not None:
+                data["generation"] = level
+        return graph
+
+    # Updates
+
+    def add_relationship(self, rel: Relationship) -> None:
+        """
+        Apply one new relationship. Only the groups whose level changes
+        (and their descendants) are recomputed; a relationship that closes
+        a cycle makes the whole index be inferred again.
+        """
+        source, target = self._link(rel)
+        if source is None or rel.type not in ("child", *SPOUSE_TYPES):
+            return
+        a, b = self._find(source), self._find(target)
+        if rel.type == "child":
+            if a == b or self._reaches(b, a):
+                self._infer()
+            else:
+                self._propagate([b])
+        elif a != b:
+            closes_cycle = self._reaches(a, b) or self._reaches(b, a)
+            merged = self._union(a, b)
+            if closes_cycle:
+                self._infer()
+            else:
+                # The absorbed group's children now hang below the merged level.
+                self._propagate([merged, *self._child_groups(merged)])
+
+    def sync(
+        self, members: list[FamilyMember], relationships: list[Relationship]
+    ) -> None:
+        """
+        Bring the index up to date with the given dataset. Added
+        relationships and edited stored generations are applied in place;
+        removed or changed members and relationships rebuild the index.
+        """
+        incoming_members = {str(member.id): member for member in members}
+        incoming_rels = {relationship_key(rel): rel for rel in relationships}
+        if set(incoming_members) != set(self.stored) or any(
+            self._triple(incoming_rels.get(key)) != triple
+            for key, triple in self._relationships.items()
+        ):
+            self._reset(members, relationships)
+            return
+        edited = []
+        for member_id, member in incoming_members.items():
+            if self.stored[member_id] != member.generation:
+                self.stored[member_id] = member.generation
+                edited.append(self._find(member_id))
+        if edited:
+            self._propagate(edited)
+        for key, rel in incoming_rels.items():
+            if key not in self._relationships:
+                self.add_relationship(rel)
+
+    # Internals
+
+    @staticmethod
+    def _triple(rel: Relationship | None) -> tuple[str, str, str] | None:
+        if rel is None:
+            return None
+        return (str(rel.source_id), str(rel.target), rel.type)
+
+    def _link(self, rel: Relationship) -> tuple[str | None, str | None]:
+        """Record a child edge; returns the endpoints if both are members."""
+        self._relationships[relationship_key(rel)] = self._triple(rel)
+        source, target = str(rel.source_id), str(rel.target)
+        if source not in self.stored or target not in self.stored or source == target:
+            return None, None
+        if rel.type == "child":
+            # source_id is the parent.
+            self.children[source].append(target)
+            self.parents[target].append(source)
+        return source, target
+
+    def _find(self, member_id: str) -> str:
+        root = member_id
+        while self._group.get(root, root) != root:
+            root = self._group[root]
+        while member_id != root:
+            self._group[member_id], member_id = root, self._group[member_id]
+        return root
+
+    def _union(self, a: str, b: str) -> str:
+        if a == b:
+            return a
+        if len(self._members[a]) < len(self._members[b]):
+            a, b = b, a
+        self._group[b] = a
+        self._members[a].extend(self._members.pop(b))
+        self._level.pop(b, None)
+        return a
+
+    def _parent_groups(self, group: str) -> set[str]:
+        return {
+            self._find(parent)
+            for member_id in self._members[group]
+            for parent in self.parents.get(member_id, ())
+        }
+
+    def _child_groups(self, group: str) -> set[str]:
+        return {
+            self._find(child)
+            for member_id in self._members[group]
+            for child in self.children.get(member_id, ())
+        }
+
+    def _base(self, group: str) -> int:
+        stored = [
+            self.stored[member_id]
+            for member_id in self._members[group]
+            if self.stored[member_id] is not None
+        ]
+        return min(stored) if stored else FIRST_GENERATION
+
+    def _compute(self, group: str) -> int | None:
+        parents = self._parent_groups(group)
+        if not parents:
+            return self._base(group)
+        levels = [self._level.get(parent) for parent in parents]
+        if group in parents or None in levels:
+            return None
+        return max(levels) + 1
+
+    def _reaches(self, start: str, goal: str) -> bool:
+        """Whether goal is start or one of its descendant groups."""
+        seen = {start}
+        stack = [start]
+        while stack:
+            group = stack.pop()
+            if group == goal:
+                return True
+            for child in self._child_groups(group) - seen:
+                seen.add(child)
+                stack.append(child)
+        return False
+
+    def _propagate(self, groups: Iterable[str]) -> None:
+        """Recompute the given groups, then any descendant whose level moved."""
+        queue = deque(groups)
+        while queue:
+            group = self._find(queue.popleft())
+            level = self._compute(group)
+            if group in self._level and self._level[group] == level:
+                continue
+            self._level[group] = level
+            queue.extend(self._child_groups(group))
+
+    @perf.timed("generations.infer")
+    def _infer(self) -> None:
+        """One topological (Kahn) pass over the groups and their child edges."""
+        children = {group: self._child_groups(group) for group in self._members}
+        indegree = dict.fromkeys(self._members, 0)
+        for group, child_groups in children.items():
+            for child in child_groups:
+                indegree[child] += 1
+        levels: dict[str, int | None] = {}
+        ready = [group for group, degree in indegree.items() if degree == 0]
+        for group in ready:
+            levels[group] = self._base(group)
+        while ready:
+            group = ready.pop()
+            for child in children[group]:
+                level = levels[group] + 1
+                if child not in levels or levels[child] < level:
+                    levels[child] = level
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+        # Groups left with parents to wait for are on or below a cycle.
+        self._level = {group: levels.get(group) for group in self._members}
+        for group, degree in indegree.items():
+            if degree:
+                self._level[group] = None
+
+
+def apply_levels(
+    repository,
+    index: GenerationIndex,
+    member_ids: dict[str, Any],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> tuple[int, set[str]]:
+    """
+    Store the inferred generation of every member whose stored one is
+    missing or differs, in unordered batches. member_ids maps the index's
+    string ids to the stored _id values. Returns the number updated and
+    the ids of the members whose update failed.
+    """
+    pending = [
+        (member_id, level)
+        for member_id, level in index.levels.items()
+        if index.stored[member_id] != level
+    ]
+    updated = 0
+    failed: set[str] = set()
+    for batch in batched(pending, batch_size):
+        requests = [
+            UpdateOne({"_id": member_ids[member_id]}, {"$set": {"generation": level}})
+            for member_id, level in batch
+        ]
+        try:
+            result = repository.bulk_write("members", requests, ordered=False)
+            updated += result.modified_count
+        except BulkWriteError as exc:
+            updated += exc.details.get("nModified", 0)
+            for error in exc.details.get("writeErrors", []):
+                member_id = batch[error["index"]][0]
+                failed.add(member_id)
+                print(f"  update of {member_id} failed: {error['errmsg']}")
+    return updated, failed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.generations", description=__doc__
+    )
+    parser.add_argument("--uri", help="MongoDB URI (default: the app's repository)")
+    parser.add_argument("--data-dir", help="Use the JSON dumps in this folder")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        "--output", help="Write the levels and conflicts as JSON ('-' for stdout)"
+    )
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Store the inferred generations where they differ",
+    )
+    parser.add_argument("--max-issues-shown", type=int, default=20)
+    args = parser.parse_args(argv)
+    repository = repository_from_args(args)
+
+    started = time.perf_counter()
+    member_docs, relationship_docs = repository.load_documents()
+    members = load_family_members(member_docs)
+    index = GenerationIndex(members, load_relationships(relationship_docs))
+    conflicts = index.conflicts()
+    seconds = time.perf_counter() - started
+    counts = dict.fromkeys(CONFLICT_KINDS, 0)
+    for issue in conflicts:
+        counts[issue.kind] += 1
+
+    report = {
+        "members": len(index.stored),
+        "seconds": round(seconds, 3),
+        "counts": counts,
+        "levels": index.levels,
+        "conflicts": [vars(issue) for issue in conflicts],
+    }
+    if args.output == "-":
+        print(json.dumps(report, indent=2))
+    else:
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as out:
+                json.dump(report, out, indent=2)
+        print(
+            f"Inferred generations of {len(index.stored)} members in "
+            f"{seconds:.2f}s: {len(conflicts)} conflicts."
+        )
+        for kind, count in counts.items():
+            if count:
+                print(f"  {kind}: {count}")
+        for issue in conflicts[: args.max_issues_shown]:
+            print(f"  {issue.kind} {', '.join(issue.ids)}: {issue.detail}")
+        if len(conflicts) > args.max_issues_shown:
+            print(f"  ... {len(conflicts) - args.max_issues_shown} more")
+
+    unresolved = conflicts
+    if args.apply:
+        member_ids = {str(member.id): member.id for member in members}
+        updated, failed = apply_levels(repository, index, member_ids, args.batch_size)
+        print(f"Updated {updated} members.", file=sys.stderr)
+        # Writing the levels resolves the stored conflicts; spans and cycles remain.
+        unresolved = [
+            issue
+            for issue in conflicts
+            if issue.kind != "stored" or issue.ids[0] in failed
+        ]
+    return 1 if unresolved else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
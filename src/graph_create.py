@@ -1,9 +1,12 @@
-import base64
-from typing import Any
+import itertools
+from typing import Any, Iterable
 
 import networkx as nx
+from pydantic import BaseModel, TypeAdapter
 from unidecode import unidecode
 
+from src import perf
+from src.image_cache import load_image_asset
 from src.models import FamilyMember, Relationship
 
 
@@ -14,26 +17,30 @@ def get_member_key(member: FamilyMember, cannon_key: str | None = None) -> str:
     If cannon_key is provided, use that as the primary key.
     If no names are available, return "missing_name".
     """
+    return name_key(vars(member.name), cannon_key)
+
+
+def name_key(names: dict[str, Any], cannon_key: str | None = None) -> str:
+    """get_member_key for a plain {field: name} mapping."""
     if cannon_key:
-        names = member.name.model_dump()
         if cannon_key in names:
             cannonical_name = names.get(cannon_key, None)
             if cannonical_name is not None:
                 return cannonical_name
 
     # Fallback to the best available name.
-    if member.name.english:
-        return member.name.english
-    if member.name.pinyin:
-        return unidecode(member.name.pinyin)
-    if member.name.hanzi:
-        return member.name.hanzi
-    if member.name.wade_giles:
-        return member.name.wade_giles
-    if member.name.kanji:
-        return member.name.kanji
-    if member.name.katakana:
-        return member.name.katakana
+    if names.get("english"):
+        return names["english"]
+    if names.get("pinyin"):
+        return unidecode(names["pinyin"])
+    if names.get("hanzi"):
+        return names["hanzi"]
+    if names.get("wade_giles"):
+        return names["wade_giles"]
+    if names.get("kanji"):
+        return names["kanji"]
+    if names.get("katakana"):
+        return names["katakana"]
     return "missing_name"
 
 
@@ -99,17 +106,136 @@ def get_shape_by_gender(gender: str) -> str:
 
 
 def encode_local_image(image_path: str) -> str:
-    """Encode image file as a Base64 data URI."""
-    try:
-        with open(image_path, "rb") as img_file:
-            encoded = base64.b64encode(img_file.read()).decode("utf-8")
-        # Change the MIME type if needed (e.g. image/jpeg)
-        return f"data:image/jpeg;base64,{encoded}"
-    except FileNotFoundError:
-        print(f"Image file not found: {image_path}")
-        return ""
+    """Encode a cached thumbnail of the image file as a Base64 data URI."""
+    asset = load_image_asset(image_path)
+    return asset.data_uri if asset else ""
+
+
+def local_image_reference(image_path: str) -> str:
+    """
+    Return a deduplicated asset reference for a local image file.
+    The renderer swaps references for data URIs with inline_image_assets().
+    """
+    asset = load_image_asset(image_path)
+    return asset.reference if asset else ""
+
+
+SPOUSE_TYPES = ("spouse", "concubine", "former_spouse")
+# Relationship types whose two ends are interchangeable.
+SYMMETRIC_TYPES = (*SPOUSE_TYPES, "other")
 
 
+def canonical_endpoints(source: Any, target: Any, rel_type: str) -> tuple[Any, Any]:
+    """
+    The (source_id, target) a relationship is stored with. Symmetric types
+    order the pair by id; a child relationship always runs from the parent
+    (source_id) to the child, as entered.
+    """
+    if rel_type in SYMMETRIC_TYPES and str(target) < str(source):
+        return target, source
+    return source, target
+
+
+def canonical_relationship(rel_doc: dict[str, Any]) -> dict[str, Any]:
+    """Put a relationship document's endpoints in canonical order, in place."""
+    rel_doc["source_id"], rel_doc["target"] = canonical_endpoints(
+        rel_doc["source_id"], rel_doc["target"], rel_doc["type"]
+    )
+    return rel_doc
+
+
+def member_node_attributes(
+    member: FamilyMember, name_display_type: str | None = None
+) -> dict[str, Any]:
+    """
+    Return the node attributes create_family_graph stores for a member.
+    """
+    model_data = member.model_dump()
+    model_data["id"] = str(member.id)
+    return record_node_attributes(model_data, get_member_key(member, name_display_type))
+
+
+def record_node_attributes(model_data: dict[str, Any], label: str) -> dict[str, Any]:
+    """
+    Node attributes for a member given as its model_dump() (with a string
+    id) and its display label.
+    """
+    house = model_data.get("house") or "unknown house"
+    branch = model_data.get("branch") or "unknown branch"
+    house_branch = model_data.get("branch") or model_data.get("house") or "unknown"
+    generation = model_data.get("generation")
+    generation = generation if generation is not None else 0
+    color = get_color_by_house(house_branch)
+    gender = model_data.get("gender") or "Male"
+    shape = get_shape_by_gender(gender)
+    image_url = model_data.get("image", None)
+    if image_url and not image_url.startswith("http"):
+        image_url = local_image_reference(image_url)
+        shape = "image"
+    note = (
+        f"note: {model_data['note']}"
+        if model_data.get("note")
+        else model_data.get("historical_significance")
+        if model_data.get("historical_significance")
+        else "No additional note"
+    )
+    birth_date = model_data.get("birth_year") or ""
+    end_date = model_data.get("death_year") or ""
+    life_span = (
+        f"dates: ({birth_date} - {end_date})"
+        if birth_date or end_date
+        else "unknown dates"
+    )
+
+    title = f"{label}\n{house}\n{branch}\n{life_span}\n{note}"
+    return dict(
+        label=label,
+        color={
+            "background": color,
+            "border": "#FFFFFF",
+            "highlight": {"background": color, "border": "#FFD700"},
+        },
+        title=title,
+        generation=generation,
+        data=model_data,
+        shape=shape,
+        use_physics=False,
+        image=image_url if image_url else "",
+    )
+
+
+def relationship_edge_attributes(
+    rel_type: str, parent_data: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    Return the attributes of the edge drawn for a relationship.
+    parent_data is the source node's "data"; child edges take its branch
+    (or house) colour.
+    """
+    if rel_type == "child":
+        parent_branch = parent_data.get("branch", None)
+        if parent_branch is None:
+            parent_branch = parent_data.get("house", "unknown")
+        return dict(
+            width=4,
+            arrows={"from": {"enabled": True}},
+            color=get_color_by_house(parent_branch),
+        )
+    if rel_type in SPOUSE_TYPES:
+        return dict(
+            color="white",
+            weight=0.1,
+            dashes=True,
+            arrows={"to": {"enabled": False}},
+        )
+    return dict(
+        width=2,
+        dashes=True,
+        arrows={"to": {"enabled": False}},
+    )
+
+
+@perf.timed("graph.create_family_graph")
 def create_family_graph(
     members: list[FamilyMember],
     relationships: list[Relationship],
@@ -117,66 +243,19 @@ def create_family_graph(
 ) -> nx.DiGraph:
     """
     Create a NetworkX graph using the unified relationships model.
-    Nodes are keyed by stringified ObjectId (member.id).
+    Nodes are keyed by stringified ObjectId (member.id). Relationships are
+    stored deduplicated in canonical form, so each one is drawn as is.
     """
     G = nx.DiGraph()
-    spouse_edges = set()
 
     # Add nodes
     for member in members:
-        node_id = str(member.id)
-        house = member.house or "unknown house"
-        branch = member.branch or "unknown branch"
-        house_branch = member.branch or member.house or "unknown"
-        generation = member.generation if member.generation is not None else 0
-        color = get_color_by_house(house_branch)
-        gender = member.gender if member.gender else "Male"
-        shape = get_shape_by_gender(gender)
-        model_data = member.model_dump()
-        model_data["id"] = node_id
-        image_url = model_data.get("image", None)
-        if image_url and not image_url.startswith("http"):
-            image_url = encode_local_image(image_url)
-            shape = "image"
-        note = (
-            f"note: {member.note}"
-            if getattr(member, "note", None)
-            else getattr(member, "historical_significance", None)
-            if getattr(member, "historical_significance", None)
-            else "No additional note"
-        )
-        birth_date = getattr(member, "birth_year", "") or ""
-        end_date = getattr(member, "death_year", "") or ""
-        life_span = (
-            f"dates: ({birth_date} - {end_date})"
-            if birth_date or end_date
-            else "unknown dates"
-        )
-
-        label = get_member_key(member, name_display_type)
-
-        title = f"{label}\n{house}\n{branch}\n{life_span}\n{note}"
-        G.add_node(
-            node_id,
-            label=label,
-            color={
-                "background": color,
-                "border": "#FFFFFF",
-                "highlight": {"background": color, "border": "#FFD700"},
-            },
-            title=title,
-            generation=generation,
-            data=model_data,
-            shape=shape,
-            use_physics=False,
-            image=image_url if image_url else "",
-        )
+        G.add_node(str(member.id), **member_node_attributes(member, name_display_type))
 
     # Add edges using the relationships collection
     for rel in relationships:
         source_id = str(rel.source_id)
         target_id = str(rel.target)
-        rel_type = rel.type
 
         # Only add edge if both nodes exist
         if source_id not in G.nodes or target_id not in G.nodes:
@@ -185,60 +264,123 @@ def create_family_graph(
             )
             continue
 
-        if rel_type == "child":
-            parent_branch = G.nodes[source_id]["data"].get("branch", None)
-            if parent_branch is None:
-                parent_branch = G.nodes[source_id]["data"].get("house", "unknown")
-            parent_color = get_color_by_house(parent_branch)
-            G.add_edge(
-                target_id,
-                source_id,
-                width=4,
-                arrows={"from": {"enabled": True}},
-                color=parent_color,
-            )
-        elif rel_type in ["spouse", "concubine", "former_spouse"]:
-            edge = tuple(sorted([source_id, target_id]))
-            if edge not in spouse_edges:
-                spouse_edges.add(edge)
-                G.add_edge(
-                    target_id,
-                    source_id,
-                    color="white",
-                    weight=0.1,
-                    dashes=True,
-                    arrows={"to": {"enabled": False}},
-                )
-        else:
-            G.add_edge(
-                target_id,
-                source_id,
-                width=2,
-                dashes=True,
-                arrows={"to": {"enabled": False}},
-            )
+        G.add_edge(
+            target_id,
+            source_id,
+            **relationship_edge_attributes(rel.type, G.nodes[source_id]["data"]),
+        )
     return G
 
 
-def load_family_members(member_docs: list[dict[Any, Any]]):
+class _ModelLoader:
+    """
+    Turns documents into models of one type.
+
+    Untrusted documents are validated with a single list-level TypeAdapter
+    call. In trusted mode a document equal to one this loader validated
+    last time reuses that model instead of being validated again, so a
+    reload after an edit only validates what changed.
+    """
+
+    def __init__(self, model: type[BaseModel]):
+        self._adapter = TypeAdapter(list[model])
+        # _id -> (document, model) from the most recent load.
+        self._validated: dict[Any, tuple[dict[Any, Any], BaseModel]] = {}
+
+    def load(self, docs: list[dict[Any, Any]], trusted: bool = False) -> list:
+        if not trusted:
+            return self._adapter.validate_python(docs)
+        validated: dict[Any, tuple[dict[Any, Any], BaseModel]] = {}
+        models = self._reuse(docs, validated)
+        self._validated = validated
+        return models
+
+    def load_stream(
+        self,
+        documents: Iterable[dict[Any, Any]],
+        batch_size: int,
+        trusted: bool = False,
+    ) -> tuple[list[dict[Any, Any]], list]:
+        """
+        Validate documents batch by batch as a cursor yields them, so
+        validation overlaps the fetching of the next batch.
+        Returns (documents, models).
+        """
+        docs: list[dict[Any, Any]] = []
+        models: list = []
+        validated: dict[Any, tuple[dict[Any, Any], BaseModel]] = {}
+        for batch in itertools.batched(documents, batch_size):
+            batch = list(batch)
+            docs += batch
+            if trusted:
+                models += self._reuse(batch, validated)
+            else:
+                models += self._adapter.validate_python(batch)
+        if trusted:
+            self._validated = validated
+        return docs, models
+
+    def _reuse(
+        self,
+        docs: list[dict[Any, Any]],
+        validated: dict[Any, tuple[dict[Any, Any], BaseModel]],
+    ) -> list:
+        """
+        Models for docs, validating only those not seen unchanged last time;
+        records every (document, model) pair in validated.
+        """
+        previous = self._validated
+        models: list[BaseModel | None] = []
+        stale: list[int] = []
+        for i, doc in enumerate(docs):
+            cached = previous.get(doc.get("_id"))
+            if cached is not None and cached[0] == doc:
+                models.append(cached[1])
+            else:
+                models.append(None)
+                stale.append(i)
+        if stale:
+            fresh = self._adapter.validate_python([docs[i] for i in stale])
+            for i, model in zip(stale, fresh):
+                models[i] = model
+        for doc, model in zip(docs, models):
+            if doc.get("_id") is not None:
+                validated[doc["_id"]] = (doc, model)
+        return models
+
+
+_member_loader = _ModelLoader(FamilyMember)
+_relationship_loader = _ModelLoader(Relationship)
+
+
+def load_family_members(member_docs: list[dict[Any, Any]], trusted: bool = False):
     """
     Load all family member JSON files from the data directory.
     Returns a list of FamilyMember instances.
+    Pass trusted=True for stored documents: unchanged ones are not validated
+    again.
     """
-    members = []
-    for record in member_docs:
-        member = FamilyMember.model_validate(record)
-        members.append(member)
-    return members
+    return _member_loader.load(member_docs, trusted)
 
 
-def load_relationships(relationship_docs: list[dict[Any, Any]]):
+def load_relationships(relationship_docs: list[dict[Any, Any]], trusted: bool = False):
     """Load all relationship JSON files from the data directory.
     Returns a list of Relationship instances.
+    Pass trusted=True for stored documents: unchanged ones are not validated
+    again.
     """
-    relationships = []
-    for record in relationship_docs:
-        relationship = Relationship.model_validate(record)
-        relationships.append(relationship)
+    return _relationship_loader.load(relationship_docs, trusted)
+
+
+def stream_family_members(
+    member_docs: Iterable[dict[Any, Any]], batch_size: int, trusted: bool = False
+) -> tuple[list[dict[Any, Any]], list[FamilyMember]]:
+    """Like load_family_members, validating a cursor batch by batch."""
+    return _member_loader.load_stream(member_docs, batch_size, trusted)
+
 
-    return relationships
+def stream_relationships(
+    relationship_docs: Iterable[dict[Any, Any]], batch_size: int, trusted: bool = False
+) -> tuple[list[dict[Any, Any]], list[Relationship]]:
+    """Like load_relationships, validating a cursor batch by batch."""
+    return _relationship_loader.load_stream(relationship_docs, batch_size, trusted)
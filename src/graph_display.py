@@ -1,9 +1,11 @@
 import streamlit as st
 
-from .database import load_documents
-from .graph_create import load_family_members, load_relationships
+from .clusters import CLUSTER_THRESHOLD
 from .graph_render import render_family_graph
+from .lineage import LINEAGE_MODES, lineage_subgraph
+from .member_select import member_select
 from .render_family_graph_graphviz import render_family_graph_graphviz
+from .snapshot import get_snapshot
 
 
 def display_page():
@@ -17,9 +19,53 @@ def display_page():
         "This application displays an interactive family graph based on unified relationships."
     )
 
-    member_docs, relationship_docs = load_documents()
-    members = load_family_members(member_docs)
-    relationships = load_relationships(relationship_docs)
+    snapshot = get_snapshot()
+    members = snapshot.members
+    relationships = snapshot.relationships
+    st.write(f"Retrieved {len(members)} records from MongoDB.")
+    st.write(f"Retrieved {len(relationships)} relationships from MongoDB.")
+
+    # Optionally narrow both graphs to one member's lineage.
+    focus_id = member_select(
+        "Focus member",
+        snapshot.name_index,
+        key="focus_member",
+        extra_options=["Whole family"],
+    )
+    if focus_id == "Whole family":
+        focus_id = None
+    view_key = None
+    if focus_id is not None:
+        mode = st.radio("View", LINEAGE_MODES, horizontal=True)
+        depth = st.slider("Generations / hops", min_value=1, max_value=10, value=2)
+        view_key = (focus_id, mode, depth)
+        members, relationships = lineage_subgraph(
+            members,
+            relationships,
+            focus_id,
+            mode,
+            depth,
+            index=snapshot.lineage_index,
+        )
+        st.write(f"Showing {len(members)} members in this view.")
+
+    inferred = (
+        st.radio(
+            "Generations",
+            ["Stored", "Inferred"],
+            horizontal=True,
+            help="Inferred generations follow the parent/child relationships.",
+        )
+        == "Inferred"
+    )
+    if inferred:
+        conflicts = snapshot.generation_index.conflicts()
+        if conflicts:
+            st.caption(
+                f"{len(conflicts)} stored generations or relationships disagree "
+                "with the inferred generations; `python -m src.generations` "
+                "lists them."
+            )
 
     pyvis_tab, graphviz_tab = st.tabs(
         ["Pyvis (Interactive)", "Graphviz (Hierarchical)"]
@@ -48,7 +94,49 @@ def display_page():
             "Select plot height (px)", min_value=200, max_value=1000, value=700
         )
 
-        render_family_graph(members, relationships, name_lang, plot_height=plot_height)
+        pyvis_view = view_key
+        grouped = view_key is None and st.toggle(
+            "Group by house and branch",
+            value=len(members) > CLUSTER_THRESHOLD,
+            help="Show each house or branch as one node until it is expanded.",
+        )
+        if grouped:
+            clusters = snapshot.cluster_index
+            expanded = st.pills(
+                "Expand",
+                clusters.options(),
+                selection_mode="multi",
+                format_func=clusters.describe,
+                key="expanded_clusters",
+            )
+            graph = clusters.graph(
+                snapshot.family_graph(name_lang),
+                expanded,
+                snapshot.generation_index if inferred else None,
+            )
+            pyvis_view = ("clusters", clusters.expanded(expanded))
+            st.write(f"Showing {graph.number_of_nodes()} nodes in this view.")
+        else:
+            graph = snapshot.graph(name_lang, inferred)
+            if view_key is not None:
+                graph = graph.subgraph(str(member.id) for member in members)
+        if inferred:
+            pyvis_view = ("inferred", pyvis_view)
+
+        render_family_graph(
+            members,
+            relationships,
+            name_lang,
+            plot_height=plot_height,
+            graph=graph,
+            data_version=snapshot.cache_key,
+            view_key=pyvis_view,
+        )
 
     with graphviz_tab:
-        render_family_graph_graphviz(members, relationships)
+        render_family_graph_graphviz(
+            members,
+            relationships,
+            data_version=(snapshot.cache_key, view_key, inferred),
+            generations=snapshot.generation_index.levels if inferred else None,
+        )
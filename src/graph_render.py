@@ -1,28 +1,54 @@
 import json
-from pathlib import Path
+from typing import Hashable
 
+import networkx as nx
 import streamlit as st
 from pyvis.network import Network
 from streamlit.components import v1 as components
 
+from . import perf
 from .graph_create import create_family_graph
+from .image_cache import inline_image_assets
+from .layout import Positions, compute_layout
 from .models import FamilyMember, Relationship
+from .render_cache import RenderCache
 
 
-def render_family_graph(
-    members: list[FamilyMember],
-    relationships: list[Relationship],
-    name_display_type: str | None = None,
-    plot_height: int = 600,
-):
-    graph = create_family_graph(
-        members, relationships, name_display_type=name_display_type
-    )
+# Rendered pages shared by every session, keyed by data version and options.
+_html_cache = RenderCache(maxsize=32)
+
+# Custom CSS injected to override the frame styles.
+CUSTOM_CSS = """
+        <style>
+            /* Adjust the pyvis network container */
+            #mynetwork {
+                border: 2px solid #222222;
+                background-color: #222222;
+                margin: 0 auto;
+            }
+            body {
+                background-color: #222222;
+            }
+        </style>
+        """
 
-    # Let the user select a layout
-    layout_option = st.selectbox(
-        "Select Graph Layout", options=["default", "hierarchical"]
-    )
+
+@perf.timed("pyvis.build_html")
+def build_pyvis_html(
+    graph: nx.DiGraph,
+    layout_option: str = "default",
+    direction: str | None = None,
+    plot_height: int = 600,
+    positions: Positions | None = None,
+) -> str:
+    """
+    Generate the interactive pyvis page for a graph, entirely in memory.
+    With precomputed positions the nodes are pinned and browser-side
+    layout and physics are switched off.
+    """
+    # from_nx rewrites node sizes and edge widths in place, and the graph may
+    # be shared through the snapshot cache, so hand it a copy.
+    graph = graph.copy()
 
     # Create a Pyvis Network with a fixed height if desired
     net = Network(
@@ -31,8 +57,8 @@ def render_family_graph(
 
     # Apply layout options.
     if layout_option == "hierarchical":
-        direction = st.selectbox("Select direction", options=["UD", "LR"])
-        net.from_nx(graph)
+        with perf.span("pyvis.from_nx"):
+            net.from_nx(graph)
 
         # Use the generation attribute to set the hierarchical level
         for node in net.nodes:
@@ -58,7 +84,7 @@ def render_family_graph(
                     "levelSeparation": 150,
                     "nodeSpacing": 200,
                     "treeSpacing": 200,
-                    "direction": direction,
+                    "direction": direction or "UD",
                     "sortMethod": "hubsize",
                     "parentCentralization": True,
                 }
@@ -66,11 +92,10 @@ def render_family_graph(
             "physics": {"enabled": False},
             "nodes": {"shape": "box"},
         }
-
-        net.set_options(f"var options = {json.dumps(options)}")
     else:
         # Default (force-directed) layout
-        net.from_nx(graph)
+        with perf.span("pyvis.from_nx"):
+            net.from_nx(graph)
 
         options = {
             "nodes": {"font": {"size": 16, "face": "arial", "color": "#ffffff"}},
@@ -87,37 +112,75 @@ def render_family_graph(
                 "minVelocity": 0.75,
             },
         }
-        net.set_options(f"var options = {json.dumps(options)}")
+
+    if positions is not None:
+        for node in net.nodes:
+            x, y = positions[node["id"]]
+            if direction == "LR":
+                x, y = y, x
+            node["x"], node["y"] = x, y
+        options["physics"] = {"enabled": False}
+        if "layout" in options:
+            options["layout"] = {"hierarchical": {"enabled": False}}
+    net.set_options(f"var options = {json.dumps(options)}")
 
     for node in net.nodes:
         # Use the node's main color for the label text color.
         node["font"] = {"color": "#FFFFFFFF"}
 
-    # Re-generate the interactive HTML to include layout changes.
-    net.write_html("family_graph_interactive.html", notebook=False)
+    with perf.span("pyvis.generate_html"):
+        html_content = net.generate_html(notebook=False)
+    # Insert the CSS block right before the closing </head> tag.
+    html_content = html_content.replace("</head>", CUSTOM_CSS + "</head>")
+    with perf.span("pyvis.inline_images"):
+        return inline_image_assets(html_content)
 
-    html_file = Path("family_graph_interactive.html")
-    if html_file.exists():
-        with open(html_file, "r", encoding="utf-8") as f:
-            html_content = f.read()
 
-        # Inject custom CSS to override the frame styles.
-        custom_css = """
-        <style>
-            /* Adjust the pyvis network container */
-            #mynetwork {
-                border: 2px solid #222222;
-                background-color: #222222;
-                margin: 0 auto;
-            }
-            body {
-                background-color: #222222;
-            }
-        </style>
-        """
-        # Insert the CSS block right before the closing </head> tag.
-        html_content = html_content.replace("</head>", custom_css + "</head>")
+def render_family_graph(
+    members: list[FamilyMember],
+    relationships: list[Relationship],
+    name_display_type: str | None = None,
+    plot_height: int = 600,
+    graph: nx.DiGraph | None = None,
+    data_version: Hashable | None = None,
+    view_key: Hashable = None,
+):
+    """
+    Render the interactive pyvis graph.
+    When data_version is given the generated page is cached across sessions
+    for that version and the selected options. view_key identifies a partial
+    view (e.g. a lineage view) so it is cached and laid out separately.
+    """
+    # Let the user select a layout
+    layout_option = st.selectbox(
+        "Select Graph Layout", options=["default", "hierarchical"]
+    )
+    direction = None
+    if layout_option == "hierarchical":
+        direction = st.selectbox("Select direction", options=["UD", "LR"])
 
-        components.html(html_content, height=plot_height + 10, scrolling=True)
+    def build() -> str:
+        nonlocal graph
+        if graph is None:
+            graph = create_family_graph(
+                members, relationships, name_display_type=name_display_type
+            )
+        positions = compute_layout(graph, layout_option, data_version, view_key)
+        return build_pyvis_html(
+            graph, layout_option, direction, plot_height, positions=positions
+        )
+
+    if data_version is None:
+        html_content = build()
     else:
-        st.write("Interactive graph file not found.")
+        cache_key = (
+            data_version,
+            view_key,
+            layout_option,
+            direction,
+            name_display_type,
+            plot_height,
+        )
+        html_content = _html_cache.get_or_create(cache_key, build)
+
+    components.html(html_content, height=plot_height + 10, scrolling=True)
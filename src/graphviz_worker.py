@@ -0,0 +1,132 @@
+import shutil
+import subprocess
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Callable, Hashable
+
+from . import perf
+from .render_cache import RenderCache
+
+OUTPUT_FORMATS = ("svg", "png")
+
+
+def dot_available() -> bool:
+    return shutil.which("dot") is not None
+
+
+class _Job:
+    """One background render of a DOT source."""
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.future: Future | None = None
+        self.waiters: set[Hashable] = set()
+        self.process: subprocess.Popen | None = None
+        self.cancelled = False
+
+
+class GraphvizRenderer:
+    """
+    Runs the local `dot` binary in a worker pool and caches the output.
+
+    Jobs are shared: sessions asking for the same key wait on one render.
+    Each session holds at most one pending job; when it asks for another
+    key, its previous job is cancelled unless another session still wants
+    it (a running `dot` process is killed).
+    """
+
+    def __init__(self, max_workers: int = 2, cache_size: int = 16):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="graphviz"
+        )
+        self._cache = RenderCache(maxsize=cache_size)
+        # Re-entrant: cancelling a future runs its done callback immediately.
+        self._lock = threading.RLock()
+        self._jobs: dict[Hashable, _Job] = {}
+        self._pending_by_session: dict[Hashable, _Job] = {}
+
+    def submit(
+        self, key: Hashable, build_source: Callable[[], str], session: Hashable
+    ) -> Future:
+        """
+        Return a future of {format: bytes} for key.
+        build_source produces the DOT text and only runs, in the worker, if
+        the key is neither cached nor already rendering.
+        """
+        with self._lock:
+            stale = self._pending_by_session.pop(session, None)
+            if stale is not None and stale.key != key:
+                self._release(stale, session)
+
+            cached = self._cache.get(key)
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+                return future
+
+            job = self._jobs.get(key)
+            if job is None or job.cancelled:
+                job = _Job(key)
+                self._jobs[key] = job
+                job.future = self._executor.submit(self._render, job, build_source)
+                job.future.add_done_callback(lambda _, job=job: self._finish(job))
+            job.waiters.add(session)
+            self._pending_by_session[session] = job
+            return job.future
+
+    def _release(self, job: _Job, session: Hashable) -> None:
+        # Called with self._lock held.
+        job.waiters.discard(session)
+        if job.waiters or job.future is None or job.future.done():
+            return
+        job.cancelled = True
+        if not job.future.cancel() and job.process is not None:
+            job.process.kill()
+
+    def _finish(self, job: _Job) -> None:
+        with self._lock:
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+            for session in job.waiters:
+                if self._pending_by_session.get(session) is job:
+                    del self._pending_by_session[session]
+
+    def _render(
+        self, job: _Job, build_source: Callable[[], str]
+    ) -> dict[str, bytes]:
+        dot_source = build_source().encode("utf-8")
+        outputs = {}
+        for fmt in OUTPUT_FORMATS:
+            with self._lock:
+                if job.cancelled:
+                    raise CancelledError()
+                job.process = subprocess.Popen(
+                    ["dot", f"-T{fmt}"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                )
+            with perf.span(f"graphviz.dot_{fmt}"):
+                stdout, stderr = job.process.communicate(dot_source)
+            if job.cancelled:
+                raise CancelledError()
+            if job.process.returncode != 0:
+                raise RuntimeError(
+                    f"dot -T{fmt} failed: {stderr.decode('utf-8', 'replace')}"
+                )
+            outputs[fmt] = stdout
+        self._cache.put(job.key, outputs)
+        return outputs
+
+
+_renderer: GraphvizRenderer | None = None
+_renderer_lock = threading.Lock()
+
+
+def get_graphviz_renderer() -> GraphvizRenderer:
+    """Return the process-wide GraphvizRenderer."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = GraphvizRenderer()
+        return _renderer
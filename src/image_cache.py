@@ -0,0 +1,165 @@
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; images are then inlined unresized.
+    Image = None
+
+THUMBNAIL_SIZE = (128, 128)
+THUMBNAIL_CACHE_DIR = Path(".cache/thumbnails")
+ASSET_PREFIX = "asset:"
+
+_MAGIC_NUMBERS = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+]
+
+
+def detect_mime_type(data: bytes, path: str | None = None) -> str:
+    """Detect an image's MIME type from its leading bytes, then its name."""
+    for magic, mime_type in _MAGIC_NUMBERS:
+        if data.startswith(magic):
+            return mime_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if b"<svg" in data[:512]:
+        return "image/svg+xml"
+    guessed, _ = mimetypes.guess_type(path or "")
+    return guessed or "application/octet-stream"
+
+
+@dataclass(frozen=True)
+class ImageAsset:
+    """A thumbnail identified by the SHA-256 of its source image."""
+
+    digest: str
+    mime_type: str
+    data: bytes
+
+    @property
+    def data_uri(self) -> str:
+        encoded = base64.b64encode(self.data).decode("utf-8")
+        return f"data:{self.mime_type};base64,{encoded}"
+
+    @property
+    def reference(self) -> str:
+        """Placeholder stored on graph nodes; see inline_image_assets()."""
+        return f"{ASSET_PREFIX}{self.digest}"
+
+
+_EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png"}
+
+# (path, mtime, size) -> digest, so unchanged files are not re-hashed.
+_digests_by_stat: dict[tuple[str, int, int], str] = {}
+_assets: dict[str, ImageAsset] = {}
+_lock = threading.Lock()
+
+
+def make_thumbnail(data: bytes, mime_type: str) -> tuple[bytes, str]:
+    """Shrink an image to THUMBNAIL_SIZE, keeping its aspect ratio."""
+    if Image is None or mime_type == "image/svg+xml":
+        return data, mime_type
+    with Image.open(io.BytesIO(data)) as image:
+        image.thumbnail(THUMBNAIL_SIZE)
+        output = io.BytesIO()
+        if image.mode in ("RGBA", "LA", "P"):
+            image.save(output, format="PNG", optimize=True)
+            return output.getvalue(), "image/png"
+        image.convert("RGB").save(output, format="JPEG", quality=80, optimize=True)
+        return output.getvalue(), "image/jpeg"
+
+
+def _read_cached_thumbnail(digest: str) -> ImageAsset | None:
+    for mime_type, extension in _EXTENSIONS.items():
+        path = THUMBNAIL_CACHE_DIR / f"{digest}{extension}"
+        if path.exists():
+            return ImageAsset(digest, mime_type, path.read_bytes())
+    return None
+
+
+def _write_cached_thumbnail(asset: ImageAsset) -> None:
+    extension = _EXTENSIONS.get(asset.mime_type)
+    if extension is None:
+        return
+    try:
+        THUMBNAIL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = THUMBNAIL_CACHE_DIR / f"{asset.digest}{extension}.{os.getpid()}.tmp"
+        tmp_path.write_bytes(asset.data)
+        os.replace(tmp_path, THUMBNAIL_CACHE_DIR / f"{asset.digest}{extension}")
+    except OSError as exc:
+        print(f"Could not cache thumbnail {asset.digest}: {exc}")
+
+
+def load_image_asset(image_path: str) -> ImageAsset | None:
+    """
+    Return the thumbnail asset for a local image file.
+    Thumbnails are generated once per distinct file content and kept in
+    memory and in THUMBNAIL_CACHE_DIR; identical files share one asset.
+    """
+    try:
+        stat = os.stat(image_path)
+    except FileNotFoundError:
+        print(f"Image file not found: {image_path}")
+        return None
+    stat_key = (os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        digest = _digests_by_stat.get(stat_key)
+        if digest is not None and digest in _assets:
+            return _assets[digest]
+
+    with open(image_path, "rb") as img_file:
+        data = img_file.read()
+    digest = hashlib.sha256(data).hexdigest()
+
+    asset = _assets.get(digest) or _read_cached_thumbnail(digest)
+    if asset is None:
+        mime_type = detect_mime_type(data, image_path)
+        try:
+            thumbnail, thumbnail_type = make_thumbnail(data, mime_type)
+        except OSError as exc:
+            print(f"Could not create thumbnail for {image_path}: {exc}")
+            thumbnail, thumbnail_type = data, mime_type
+        asset = ImageAsset(digest, thumbnail_type, thumbnail)
+        _write_cached_thumbnail(asset)
+
+    with _lock:
+        _digests_by_stat[stat_key] = digest
+        _assets[digest] = asset
+    return asset
+
+
+def get_image_asset(digest: str) -> ImageAsset | None:
+    with _lock:
+        return _assets.get(digest)
+
+
+_ASSET_REFERENCE = re.compile(r'"' + ASSET_PREFIX + r'([0-9a-f]{64})"')
+
+
+def inline_image_assets(html: str) -> str:
+    """
+    Replace node image references in generated pyvis HTML with lookups into
+    a single table of data URIs, so each image is embedded only once.
+    """
+    digests = dict.fromkeys(_ASSET_REFERENCE.findall(html))
+    if not digests:
+        return html
+    entries = []
+    for digest in digests:
+        asset = get_image_asset(digest)
+        entries.append(f'"{digest}": "{asset.data_uri if asset else ""}"')
+    table = "<script>var imageAssets = {" + ", ".join(entries) + "};</script>"
+    html = _ASSET_REFERENCE.sub(r'imageAssets["\1"]', html)
+    return html.replace("</head>", table + "</head>", 1)
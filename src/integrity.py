@@ -0,0 +1,347 @@
+"""
+Data-quality checks over the whole archive in one streaming pass.
+
+    python -m src.integrity --data-dir . --output report.json
+    python -m src.integrity --fix
+
+Members are streamed first (id, dates and generation only), then
+relationships (endpoints and type only), so the work is linear in the size
+of the archive and only ids and edges are kept. Reported issues:
+
+- self_loop: a relationship from a member to themselves
+- isolated: a member no relationship mentions
+- dangling: a relationship whose source or target is not a member
+- duplicate: the same (source_id, target, type) stored more than once
+- mirrored: a symmetric (spouse-type or "other") edge stored in both
+  directions
+- child_cycle: members who are, through child edges, their own ancestor
+- generation: a child whose generation is not its parent's plus one
+- death_before_birth: a member whose death_year precedes birth_year
+
+Member ids are compared as strings, so relationships that store their
+endpoints as hex strings match members keyed by ObjectId.
+
+Self loops, dangling, duplicate and mirrored relationships have safe fixes (deleting
+the redundant document), which --fix sends as bulk_write batches. The
+other issues need a person to decide and are only reported. The exit
+status is 1 while any issue is left, 0 once --fix has resolved them all.
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Iterable
+
+import networkx as nx
+from pymongo import DeleteOne
+from pymongo.errors import BulkWriteError
+
+from . import perf
+from .bulk import DEFAULT_BATCH_SIZE, batched, repository_from_args
+from .database import FamilyRepository, WriteRequest
+from .graph_create import SYMMETRIC_TYPES, canonical_endpoints
+
+MEMBER_FIELDS = {"birth_year": 1, "death_year": 1, "generation": 1}
+RELATIONSHIP_FIELDS = {"source_id": 1, "target": 1, "type": 1}
+ISSUE_KINDS = (
+    "self_loop",
+    "isolated",
+    "dangling",
+    "duplicate",
+    "mirrored",
+    "child_cycle",
+    "generation",
+    "death_before_birth",
+)
+
+
+@dataclass
+class Issue:
+    """One finding; ids are the member or relationship ids involved."""
+
+    kind: str
+    ids: list[str]
+    detail: str
+
+
+@dataclass
+class IntegrityReport:
+    members: int = 0
+    relationships: int = 0
+    seconds: float = 0.0
+    issues: list[Issue] = field(default_factory=list)
+    # Collection -> write requests that repair the fixable issues.
+    fixes: dict[str, list[WriteRequest]] = field(
+        default_factory=lambda: defaultdict(list)
+    )
+
+    def add(self, kind: str, ids: list[Any], detail: str) -> None:
+        self.issues.append(Issue(kind, [str(i) for i in ids], detail))
+
+    def counts(self) -> dict[str, int]:
+        counts = dict.fromkeys(ISSUE_KINDS, 0)
+        for issue in self.issues:
+            counts[issue.kind] += 1
+        return counts
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "members": self.members,
+            "relationships": self.relationships,
+            "seconds": round(self.seconds, 3),
+            "counts": self.counts(),
+            "issues": [asdict(issue) for issue in self.issues],
+            "fixes": {
+                collection: [str(request._filter["_id"]) for request in requests]
+                for collection, requests in self.fixes.items()
+            },
+        }
+
+
+def _child_cycles(edges: list[tuple[Any, Any]]) -> list[list[Any]]:
+    """
+    Groups of members on child-edge cycles. Kahn's algorithm peels off the
+    acyclic part in linear time; only what is left (the cycles and whatever
+    hangs below them) goes to networkx for the strongly connected components.
+    """
+    children = defaultdict(list)
+    indegree: dict[Any, int] = defaultdict(int)
+    for parent, child in edges:
+        children[parent].append(child)
+        indegree[child] += 1
+        indegree.setdefault(parent, 0)
+    ready = [node for node, degree in indegree.items() if degree == 0]
+    while ready:
+        node = ready.pop()
+        for child in children[node]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(child)
+    remaining = {node for node, degree in indegree.items() if degree > 0}
+    if not remaining:
+        return []
+    graph = nx.DiGraph(
+        (parent, child)
+        for parent, child in edges
+        if parent in remaining and child in remaining
+    )
+    cycles = []
+    for component in nx.strongly_connected_components(graph):
+        node = next(iter(component))
+        # A single member is a cycle only if they are their own child.
+        if len(component) > 1 or graph.has_edge(node, node):
+            cycles.append(sorted(component))
+    return cycles
+
+
+@perf.timed("integrity.check")
+def check(
+    repository: FamilyRepository, batch_size: int = DEFAULT_BATCH_SIZE
+) -> IntegrityReport:
+    """Stream both collections once and return every issue found."""
+    report = IntegrityReport()
+    started = time.perf_counter()
+
+    generations: dict[str, int | None] = {}
+    with perf.span("integrity.members"):
+        for member in repository.iter_documents("members", batch_size, MEMBER_FIELDS):
+            report.members += 1
+            generations[str(member["_id"])] = member.get("generation")
+            birth, death = member.get("birth_year"), member.get("death_year")
+            if birth is not None and death is not None and death < birth:
+                report.add(
+                    "death_before_birth",
+                    [member["_id"]],
+                    f"died {death}, born {birth}",
+                )
+
+    connected = set()
+    stored = set()
+    directions: dict[tuple[str, str, str], tuple[str, str]] = {}
+    child_edges = []
+    with perf.span("integrity.relationships"):
+        for rel in repository.iter_documents(
+            "relationships", batch_size, RELATIONSHIP_FIELDS
+        ):
+            report.relationships += 1
+            rel_id, rel_type = rel["_id"], rel.get("type")
+            source, target = str(rel.get("source_id")), str(rel.get("target"))
+
+            if source == target:
+                report.add("self_loop", [rel_id, source], f"{rel_type} of themselves")
+                report.fixes["relationships"].append(DeleteOne({"_id": rel_id}))
+                continue
+
+            missing = [e for e in (source, target) if e not in generations]
+            if missing:
+                report.add(
+                    "dangling",
+                    [rel_id, *missing],
+                    f"{rel_type} relationship to missing member(s)",
+                )
+                report.fixes["relationships"].append(DeleteOne({"_id": rel_id}))
+                continue
+            # Only edges that --fix keeps connect their members.
+            connected.add(source)
+            connected.add(target)
+
+            key = (source, target, rel_type)
+            if key in stored:
+                report.add("duplicate", [rel_id, source, target], f"repeated {rel_type}")
+                report.fixes["relationships"].append(DeleteOne({"_id": rel_id}))
+                continue
+            stored.add(key)
+
+            if rel_type in SYMMETRIC_TYPES:
+                pair = (*sorted((source, target)), rel_type)
+                first = directions.setdefault(pair, (source, target))
+                if first != (source, target):
+                    report.add(
+                        "mirrored",
+                        [rel_id, source, target],
+                        f"{rel_type} stored in both directions",
+                    )
+                    report.fixes["relationships"].append(DeleteOne({"_id": rel_id}))
+            elif rel_type == "child":
+                # source_id is the parent.
+                child_edges.append((source, target))
+                parent_generation = generations[source]
+                child_generation = generations[target]
+                if (
+                    parent_generation is not None
+                    and child_generation is not None
+                    and child_generation != parent_generation + 1
+                ):
+                    report.add(
+                        "generation",
+                        [target, source],
+                        f"generation {child_generation}, parent's {parent_generation}",
+                    )
+
+    with perf.span("integrity.cycles"):
+        for cycle in _child_cycles(child_edges):
+            report.add(
+                "child_cycle", cycle, f"{len(cycle)} member(s) on a child-edge cycle"
+            )
+    for member_id in generations:
+        if member_id not in connected:
+            report.add("isolated", [member_id], "no relationships")
+
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def check_new_relationships(
+    rel_docs: list[dict[Any, Any]],
+    is_member: Callable[[Any], bool],
+    existing: Iterable[dict[Any, Any]],
+) -> list[Issue]:
+    """
+    Check relationships about to be written against each other and against
+    the stored relationships of the members involved (existing): self
+    loops, missing members, duplicates and mirrored symmetric edges. New
+    relationships are compared in the canonical form they are stored in,
+    with ids as strings.
+    """
+    issues = []
+    stored = set()
+    for rel in existing:
+        stored.add((str(rel["source_id"]), str(rel["target"]), rel["type"]))
+    for rel in rel_docs:
+        rel_type = rel["type"]
+        raw_source, raw_target = canonical_endpoints(
+            rel["source_id"], rel["target"], rel_type
+        )
+        source, target = str(raw_source), str(raw_target)
+        key = (source, target, rel_type)
+        if source == target:
+            issues.append(Issue("self_loop", [source], f"{rel_type} of themselves"))
+            continue
+        missing = [str(e) for e in (raw_source, raw_target) if not is_member(e)]
+        if missing:
+            issues.append(Issue("dangling", missing, "not a member"))
+            continue
+        if key in stored:
+            issues.append(Issue("duplicate", [source, target], f"already {rel_type}"))
+            continue
+        if rel_type in SYMMETRIC_TYPES and (target, source, rel_type) in stored:
+            issues.append(
+                Issue(
+                    "mirrored",
+                    [source, target],
+                    f"already {rel_type} the other way round",
+                )
+            )
+            continue
+        stored.add(key)
+    return issues
+
+
+def apply_fixes(
+    repository: FamilyRepository,
+    report: IntegrityReport,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> dict[str, int]:
+    """Send the report's fixes in unordered batches; return the counts removed."""
+    removed = {}
+    for collection, requests in report.fixes.items():
+        removed[collection] = 0
+        for batch in batched(requests, batch_size):
+            try:
+                result = repository.bulk_write(collection, batch, ordered=False)
+                removed[collection] += result.deleted_count
+            except BulkWriteError as exc:
+                removed[collection] += exc.details.get("nRemoved", 0)
+                for error in exc.details.get("writeErrors", []):
+                    print(f"  fix {error['index']} failed: {error['errmsg']}")
+    return removed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.integrity", description=__doc__)
+    parser.add_argument("--uri", help="MongoDB URI (default: the app's repository)")
+    parser.add_argument("--data-dir", help="Use the JSON dumps in this folder")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--output", help="Write the JSON report here ('-' for stdout)")
+    parser.add_argument(
+        "--fix",
+        action="store_true",
+        help="Delete self-loop, dangling and redundant relationships",
+    )
+    parser.add_argument("--max-issues-shown", type=int, default=20)
+    args = parser.parse_args(argv)
+    repository = repository_from_args(args)
+
+    report = check(repository, args.batch_size)
+    if args.output == "-":
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as out:
+                json.dump(report.to_dict(), out, indent=2)
+        print(
+            f"Checked {report.members} members and {report.relationships} "
+            f"relationships in {report.seconds:.2f}s: {len(report.issues)} issues."
+        )
+        for kind, count in report.counts().items():
+            if count:
+                print(f"  {kind}: {count}")
+        for issue in report.issues[: args.max_issues_shown]:
+            print(f"  {issue.kind} {', '.join(issue.ids)}: {issue.detail}")
+        if len(report.issues) > args.max_issues_shown:
+            print(f"  ... {len(report.issues) - args.max_issues_shown} more")
+
+    unresolved = len(report.issues)
+    if args.fix:
+        # Every fix resolves exactly one issue.
+        for collection, count in apply_fixes(repository, report, args.batch_size).items():
+            print(f"Removed {count} {collection}.", file=sys.stderr)
+            unresolved -= count
+    return 1 if unresolved else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
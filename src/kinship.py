@@ -0,0 +1,303 @@
+from dataclasses import dataclass, field
+from itertools import permutations
+from typing import Any
+
+from .graph_create import SPOUSE_TYPES
+from .lineage import LineageIndex
+from .models import FamilyMember, Relationship
+
+ORDINALS = ["first", "second", "third", "fourth", "fifth", "sixth", "seventh"]
+REMOVALS = ["", "once removed", "twice removed", "thrice removed"]
+
+
+@dataclass
+class Kinship:
+    """How member a is related to member b ("a is b's <term>")."""
+
+    a: str
+    b: str
+    term: str
+    # Generations from a and from b up to the common ancestors.
+    generations: tuple[int, int] | None = None
+    common_ancestors: list[str] = field(default_factory=list)
+    # For in-laws, the spouse through whom the two are related.
+    via: str | None = None
+
+
+def _gendered(gender: str | None, male: str, female: str, neutral: str) -> str:
+    if gender == "Male":
+        return male
+    if gender == "Female":
+        return female
+    return neutral
+
+
+def _greats(count: int) -> str:
+    return "great-" * count
+
+
+def _ordinal(n: int) -> str:
+    if n % 100 in (11, 12, 13):
+        return f"{n}th"
+    return f"{n}" + {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+
+
+def kinship_term(
+    up_a: int, up_b: int, gender: str | None = None, half: bool = False
+) -> str:
+    """
+    Name a blood relationship from the generations each member is below
+    their closest common ancestor, e.g. (2, 3) is "first cousin once removed".
+    """
+    if up_a == 0 and up_b == 0:
+        return "self"
+    if up_a == 0:
+        base = _gendered(gender, "father", "mother", "parent")
+        if up_b == 1:
+            return base
+        return _greats(up_b - 2) + "grand" + base
+    if up_b == 0:
+        base = _gendered(gender, "son", "daughter", "child")
+        if up_a == 1:
+            return base
+        return _greats(up_a - 2) + "grand" + base
+
+    prefix = "half-" if half else ""
+    if up_a == 1 and up_b == 1:
+        return prefix + _gendered(gender, "brother", "sister", "sibling")
+    if up_a == 1:
+        base = _gendered(gender, "uncle", "aunt", "parent's sibling")
+        return _greats(up_b - 2) + prefix + base
+    if up_b == 1:
+        base = _gendered(gender, "nephew", "niece", "sibling's child")
+        return _greats(up_a - 2) + prefix + base
+
+    degree = min(up_a, up_b) - 1
+    removal = abs(up_a - up_b)
+    # Words while both fit the tables, otherwise numbers for both.
+    if degree <= len(ORDINALS) and removal < len(REMOVALS):
+        term = f"{prefix}{ORDINALS[degree - 1]} cousin"
+        removed = REMOVALS[removal]
+    else:
+        term = f"{prefix}{_ordinal(degree)} cousin"
+        times = "time" if removal == 1 else "times"
+        removed = f"{removal} {times} removed" if removal else ""
+    return f"{term} {removed}" if removed else term
+
+
+class KinshipIndex:
+    """
+    Answers "how is a related to b" over the child relationships.
+
+    Each member's primary parent is their father where known, otherwise
+    their first recorded parent, which turns the parent graph into a
+    forest following the patrilineal houses. A binary-lifting table over
+    that forest is built once in O(n log n) and finds the common ancestor
+    on the primary lines in O(log n). That ancestor bounds the answer: a
+    search over every recorded parent, mothers included, then only looks
+    for a closer one within that distance. When the primary lines never
+    meet the search is unbounded.
+    """
+
+    def __init__(
+        self,
+        members: list[FamilyMember],
+        relationships: list[Relationship],
+        lineage: LineageIndex | None = None,
+    ):
+        self.lineage = lineage or LineageIndex(relationships, members)
+        self.gender = {str(member.id): member.gender for member in members}
+        self.spouse_types: dict[tuple[str, str], str] = {}
+        for rel in relationships:
+            if rel.type in SPOUSE_TYPES:
+                pair = tuple(sorted((str(rel.source_id), str(rel.target))))
+                self.spouse_types.setdefault(pair, rel.type)
+
+        nodes = set(self.gender) | set(self.lineage.parents) | set(
+            self.lineage.children
+        )
+        self._ids = sorted(nodes)
+        self._index = {node: i for i, node in enumerate(self._ids)}
+
+        primary = list(range(len(self._ids)))
+        for node, parents in self.lineage.parents.items():
+            fathers = [p for p in parents if self.gender.get(p) == "Male"]
+            primary[self._index[node]] = self._index[(fathers or parents)[0]]
+        self._depth = self._depths(primary)
+
+        self._up = [primary]
+        for _ in range(max(1, max(self._depth, default=0).bit_length()) - 1):
+            previous = self._up[-1]
+            self._up.append([previous[previous[v]] for v in range(len(previous))])
+
+    @staticmethod
+    def _depths(primary: list[int]) -> list[int]:
+        """Depth of every node in the primary-parent forest, iteratively."""
+        depth = [-1] * len(primary)
+        for start in range(len(primary)):
+            path = []
+            on_path = set()
+            node = start
+            while depth[node] < 0 and node not in on_path:
+                path.append(node)
+                on_path.add(node)
+                if primary[node] == node:
+                    depth[node] = 0
+                    break
+                node = primary[node]
+            if depth[node] < 0:
+                # A cycle in bad data: treat the repeated node as a root.
+                primary[node] = node
+                depth[node] = 0
+            for v in reversed(path):
+                if depth[v] < 0:
+                    depth[v] = depth[primary[v]] + 1
+        return depth
+
+    def _lift(self, v: int, steps: int) -> int:
+        k = 0
+        while steps:
+            if steps & 1:
+                v = self._up[k][v]
+            steps >>= 1
+            k += 1
+        return v
+
+    def _forest_lca(self, a: int, b: int) -> int | None:
+        """Lowest common ancestor on the primary lines, or None."""
+        if self._depth[a] < self._depth[b]:
+            a, b = b, a
+        a = self._lift(a, self._depth[a] - self._depth[b])
+        if a == b:
+            return a
+        for k in reversed(range(len(self._up))):
+            if self._up[k][a] != self._up[k][b]:
+                a, b = self._up[k][a], self._up[k][b]
+        parent = self._up[0][a]
+        if parent == a or parent != self._up[0][b]:
+            return None
+        return parent
+
+    def _blood(self, a: str, b: str) -> Kinship | None:
+        ia, ib = self._index.get(a), self._index.get(b)
+        if ia is None or ib is None:
+            return None
+
+        lca = self._forest_lca(ia, ib)
+        limit = None
+        if lca is not None:
+            up_a = self._depth[ia] - self._depth[lca]
+            up_b = self._depth[ib] - self._depth[lca]
+            common = [self._ids[lca]]
+            limit = up_a + up_b - 1
+        closer = self._closest_shared(a, b, limit)
+        if closer is not None:
+            up_a, up_b, common = closer
+        elif lca is None:
+            return None
+
+        # The co-ancestor is the common ancestor's spouse who is also a
+        # parent on both sides. When both sides record a different other
+        # parent, siblings and cousins are half.
+        half = False
+        if up_a and up_b:
+            below_a = self._below(a, up_a, common[0])
+            below_b = self._below(b, up_b, common[0])
+            if below_a is not None and below_b is not None:
+                others_a = set(self.lineage.parents.get(below_a, ())) - {common[0]}
+                others_b = set(self.lineage.parents.get(below_b, ())) - {common[0]}
+                co_parents = others_a & others_b
+                common += sorted(co_parents - set(common))
+                half = not co_parents and bool(others_a) and bool(others_b)
+
+        return Kinship(
+            a,
+            b,
+            kinship_term(up_a, up_b, self.gender.get(a), half),
+            (up_a, up_b),
+            common,
+        )
+
+    def _closest_shared(
+        self, a: str, b: str, limit: int | None
+    ) -> tuple[int, int, list[str]] | None:
+        """
+        The closest common ancestors over every recorded parent, if their
+        generations from a and b add up to at most limit.
+        """
+        ancestors_a = self.lineage.ancestors(a, limit)
+        ancestors_b = self.lineage.ancestors(b, limit)
+        shared = [
+            n
+            for n in ancestors_a.keys() & ancestors_b.keys()
+            if limit is None or ancestors_a[n] + ancestors_b[n] <= limit
+        ]
+        if not shared:
+            return None
+        best = min(shared, key=lambda n: (ancestors_a[n] + ancestors_b[n], n))
+        up_a, up_b = ancestors_a[best], ancestors_b[best]
+        common = sorted(
+            n for n in shared if (ancestors_a[n], ancestors_b[n]) == (up_a, up_b)
+        )
+        return up_a, up_b, common
+
+    def _below(self, node: str, steps: int, ancestor: str) -> str | None:
+        """The member one generation below ancestor on node's line."""
+        i = self._index[node]
+        candidate = self._ids[self._lift(i, steps - 1)]
+        if ancestor in self.lineage.parents.get(candidate, ()):
+            return candidate
+        distances = self.lineage.ancestors(node, steps - 1)
+        for other, distance in distances.items():
+            if distance == steps - 1 and ancestor in self.lineage.parents.get(
+                other, ()
+            ):
+                return other
+        return None
+
+    def relationship(self, a: Any, b: Any) -> Kinship:
+        """Return how a is related to b, by blood, marriage or not at all."""
+        a, b = str(a), str(b)
+        if a == b:
+            return Kinship(a, b, "self", (0, 0), [a])
+
+        spouse_type = self.spouse_types.get(tuple(sorted((a, b))))
+        if spouse_type:
+            return Kinship(a, b, spouse_type.replace("_", " "))
+
+        blood = self._blood(a, b)
+        if blood is not None:
+            return blood
+
+        candidates = []
+        # a is a blood relative of b's spouse: "<term>-in-law".
+        for spouse in self.lineage.spouses.get(b, ()):
+            kin = self._blood(a, spouse)
+            if kin is not None:
+                candidates.append((kin, spouse, False))
+        # a is married to a blood relative of b.
+        for spouse in self.lineage.spouses.get(a, ()):
+            kin = self._blood(spouse, b)
+            if kin is not None:
+                candidates.append((kin, spouse, True))
+        if not candidates:
+            return Kinship(a, b, "not related")
+
+        kin, spouse, by_marriage = min(
+            candidates, key=lambda c: (sum(c[0].generations), c[1])
+        )
+        up_a, up_b = kin.generations
+        term = kinship_term(up_a, up_b, self.gender.get(a))
+        if (up_a == 0) if by_marriage else (up_b == 0):
+            # Married to b's ancestor, or descended from b's spouse.
+            term = "step" + term
+        elif min(up_a, up_b) > 0 and max(up_a, up_b) > 1:
+            term += " by marriage"
+        else:
+            term += "-in-law"
+        return Kinship(a, b, term, kin.generations, kin.common_ancestors, spouse)
+
+    def table(self, member_ids: list[Any]) -> dict[tuple[str, str], Kinship]:
+        """Relationships for every ordered pair of the given members."""
+        ids = list(dict.fromkeys(str(member_id) for member_id in member_ids))
+        return {(a, b): self.relationship(a, b) for a, b in permutations(ids, 2)}
@@ -0,0 +1,51 @@
+import streamlit as st
+
+from .graph_create import get_member_key
+from .member_select import member_select
+from .snapshot import get_snapshot
+
+
+def kinship_page():
+    st.title("Kinship")
+
+    snapshot = get_snapshot()
+    name_index = snapshot.name_index
+    member_ids = name_index.search("", limit=None)
+    member_names = {
+        member_id: get_member_key(name_index.member(member_id))
+        for member_id in member_ids
+    }
+    st.write(f"Retrieved {len(member_ids)} records from MongoDB.")
+    kinship = snapshot.kinship_index
+
+    first = member_select("First member", snapshot.name_index, key="kinship_first")
+    second = member_select("Second member", snapshot.name_index, key="kinship_second")
+    if first and second:
+        result = kinship.relationship(first, second)
+        st.write(f"{member_names[first]} is {member_names[second]}'s **{result.term}**.")
+        if result.common_ancestors and first != second:
+            names = ", ".join(
+                member_names.get(ancestor, ancestor)
+                for ancestor in result.common_ancestors
+            )
+            st.write(f"Common ancestors: {names}")
+        if result.via:
+            st.write(f"Related through {member_names.get(result.via, result.via)}.")
+
+    st.subheader("Kinship table")
+    selected = st.multiselect(
+        "Members to compare", member_ids, format_func=member_names.get
+    )
+    if len(selected) > 1:
+        table = kinship.table(selected)
+        st.dataframe(
+            [
+                {
+                    "Member": member_names[a],
+                    "Relative": member_names[b],
+                    "Relationship": f"{member_names[a]} is {member_names[b]}'s {result.term}",
+                }
+                for (a, b), result in table.items()
+            ],
+            hide_index=True,
+        )
@@ -0,0 +1,258 @@
+import math
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Hashable
+
+import networkx as nx
+import numpy as np
+
+from . import perf
+from .render_cache import RenderCache
+
+Positions = dict[str, tuple[float, float]]
+
+LEVEL_SEPARATION = 150.0
+NODE_SPACING = 200.0
+FORCE_SPACING = 120.0
+# Rows of the pairwise repulsion computed at once; bounds memory to
+# FORCE_CHUNK x nodes floats.
+FORCE_CHUNK = 512
+
+
+def _level(graph: nx.DiGraph, node: str) -> int:
+    return graph.nodes[node].get("generation") or 0
+
+
+def _neighbours(graph: nx.DiGraph, node: str):
+    yield from graph.predecessors(node)
+    yield from graph.successors(node)
+
+
+def _free_slot(occupied: list[float], x: float, spacing: float) -> float:
+    """Return the position nearest x that keeps spacing from occupied."""
+    candidates = [x]
+    step = 1
+    while True:
+        for candidate in candidates:
+            i = bisect_left(occupied, candidate)
+            left_ok = i == 0 or candidate - occupied[i - 1] >= spacing
+            right_ok = i == len(occupied) or occupied[i] - candidate >= spacing
+            if left_ok and right_ok:
+                return candidate
+        candidates = [x + step * spacing / 2, x - step * spacing / 2]
+        step += 1
+
+
+def layered_layout(
+    graph: nx.DiGraph,
+    previous: Positions | None = None,
+    level_separation: float = LEVEL_SEPARATION,
+    node_spacing: float = NODE_SPACING,
+    sweeps: int = 4,
+) -> Positions:
+    """
+    Generation-aware layered layout (top-down; swap axes for LR).
+
+    Each generation is a row. Without previous positions the order within
+    each row is found by barycentre sweeps against the neighbouring rows.
+    With previous positions, nodes keep theirs and only new nodes are
+    placed, at the nearest free slot under their relatives.
+    """
+    previous = previous or {}
+    positions: Positions = {}
+    rows: dict[int, list[str]] = defaultdict(list)
+    for node in graph:
+        rows[_level(graph, node)].append(node)
+
+    placed = [node for node in graph if node in previous]
+    if placed:
+        occupied: dict[int, list[float]] = defaultdict(list)
+        for node in placed:
+            x, _ = previous[node]
+            level = _level(graph, node)
+            positions[node] = (x, level * level_separation)
+            insort(occupied[level], x)
+        for node in graph:
+            if node in positions:
+                continue
+            level = _level(graph, node)
+            xs = [positions[n][0] for n in _neighbours(graph, node) if n in positions]
+            if xs:
+                x = sum(xs) / len(xs)
+            elif occupied[level]:
+                x = occupied[level][-1] + node_spacing
+            else:
+                x = 0.0
+            x = _free_slot(occupied[level], x, node_spacing)
+            insort(occupied[level], x)
+            positions[node] = (x, level * level_separation)
+        return positions
+
+    order: dict[str, float] = {}
+    for level in rows:
+        for i, node in enumerate(rows[level]):
+            order[node] = float(i)
+    levels = sorted(rows)
+    for sweep in range(sweeps):
+        for level in levels if sweep % 2 == 0 else reversed(levels):
+            adjacent = level - 1 if sweep % 2 == 0 else level + 1
+
+            def barycentre(node: str) -> float:
+                ranks = [
+                    order[n]
+                    for n in _neighbours(graph, node)
+                    if _level(graph, n) == adjacent
+                ]
+                return sum(ranks) / len(ranks) if ranks else order[node]
+
+            rows[level].sort(key=barycentre)
+            for i, node in enumerate(rows[level]):
+                order[node] = float(i)
+
+    for level, nodes in rows.items():
+        offset = (len(nodes) - 1) * node_spacing / 2
+        for i, node in enumerate(nodes):
+            positions[node] = (i * node_spacing - offset, level * level_separation)
+    return positions
+
+
+def force_layout(
+    graph: nx.DiGraph,
+    previous: Positions | None = None,
+    spacing: float = FORCE_SPACING,
+    iterations: int = 60,
+    seed: int = 7,
+) -> Positions:
+    """
+    Fruchterman-Reingold force-directed layout in pixel coordinates.
+
+    A full layout starts from the layered layout so it converges quickly.
+    With previous positions, those nodes stay fixed and forces are only
+    computed for the new ones, which costs O(new x all) per iteration.
+    """
+    nodes = list(graph)
+    if not nodes:
+        return {}
+    index = {node: i for i, node in enumerate(nodes)}
+    previous = previous or {}
+    rng = np.random.default_rng(seed)
+
+    pos = np.zeros((len(nodes), 2))
+    movable = np.ones(len(nodes), dtype=bool)
+    if any(node in previous for node in nodes):
+        for node in nodes:
+            if node in previous:
+                pos[index[node]] = previous[node]
+                movable[index[node]] = False
+        for node in nodes:
+            if not movable[index[node]]:
+                continue
+            anchors = [
+                pos[index[n]] for n in _neighbours(graph, node) if not movable[index[n]]
+            ]
+            centre = np.mean(anchors, axis=0) if anchors else pos[~movable].mean(axis=0)
+            pos[index[node]] = centre + rng.normal(scale=spacing / 2, size=2)
+        temperature = spacing
+    else:
+        seed_positions = layered_layout(graph, node_spacing=spacing)
+        for node, xy in seed_positions.items():
+            pos[index[node]] = xy
+        pos += rng.normal(scale=spacing / 10, size=pos.shape)
+        temperature = spacing * math.sqrt(len(nodes)) / 4
+
+    moving = np.flatnonzero(movable)
+    if moving.size == 0:
+        return {node: tuple(map(float, pos[index[node]])) for node in nodes}
+
+    edges = np.array(
+        [(index[u], index[v]) for u, v in graph.edges() if u != v], dtype=np.intp
+    ).reshape(-1, 2)
+    k2 = spacing * spacing
+    cooling = temperature / (iterations + 1)
+    for _ in range(iterations):
+        displacement = np.zeros((len(nodes), 2))
+        # Repulsion between every moving node and every node: k^2 / d.
+        # Expanded as sum_j w_ij (p_i - p_j) = p_i sum_j w_ij - W @ p, in
+        # centred float32 to keep the chunked products cheap.
+        centred = (pos - pos.mean(axis=0)).astype(np.float32)
+        norms = (centred**2).sum(axis=-1)
+        for start in range(0, moving.size, FORCE_CHUNK):
+            rows = moving[start : start + FORCE_CHUNK]
+            weights = centred[rows] @ centred.T
+            weights *= -2
+            weights += norms[rows, None]
+            weights += norms[None, :]
+            np.maximum(weights, 1e-2, out=weights)
+            np.divide(k2, weights, out=weights)
+            weights[np.arange(rows.size), rows] = 0.0
+            displacement[rows] = (
+                centred[rows] * weights.sum(axis=1)[:, None] - weights @ centred
+            )
+        # Attraction along edges: d^2 / k.
+        if edges.size:
+            delta = pos[edges[:, 0]] - pos[edges[:, 1]]
+            distance = np.sqrt((delta**2).sum(axis=-1))
+            force = delta * (distance / spacing)[:, None]
+            np.add.at(displacement, edges[:, 0], -force)
+            np.add.at(displacement, edges[:, 1], force)
+        step = displacement[moving]
+        length = np.maximum(np.sqrt((step**2).sum(axis=-1)), 1e-9)
+        pos[moving] += step * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+    return {node: (float(pos[i, 0]), float(pos[i, 1])) for node, i in index.items()}
+
+
+LAYOUTS = {
+    "hierarchical": layered_layout,
+    "default": force_layout,
+}
+
+
+class LayoutCache:
+    """
+    Node positions per (data version, layout, scope), shared by every
+    session. A new data version starts from the latest positions of the same
+    layout and scope, so existing members keep their place and only new ones
+    are positioned. The scope separates views of part of the graph, such as
+    a lineage view, from the full graph. Latest positions are kept for the
+    maxsize most recently laid out (layout, scope) pairs, so focus views
+    nobody returns to are dropped.
+    """
+
+    def __init__(self, maxsize: int = 16):
+        self._cache = RenderCache(maxsize=maxsize)
+        self._latest = RenderCache(maxsize=maxsize)
+
+    def positions(
+        self,
+        graph: nx.DiGraph,
+        layout_option: str,
+        data_version: Hashable,
+        scope: Hashable = None,
+    ) -> Positions:
+        def compute() -> Positions:
+            previous = self._latest.get((layout_option, scope))
+            positions = LAYOUTS[layout_option](graph, previous)
+            self._latest.put((layout_option, scope), positions)
+            return positions
+
+        return self._cache.get_or_create(
+            (data_version, layout_option, scope), compute
+        )
+
+
+_layout_cache = LayoutCache()
+
+
+@perf.timed("layout.compute")
+def compute_layout(
+    graph: nx.DiGraph,
+    layout_option: str,
+    data_version: Hashable | None = None,
+    scope: Hashable = None,
+) -> Positions:
+    """Return node positions for a graph, cached when data_version is given."""
+    if data_version is None:
+        return LAYOUTS[layout_option](graph)
+    return _layout_cache.positions(graph, layout_option, data_version, scope)
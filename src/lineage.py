@@ -0,0 +1,118 @@
+from collections import defaultdict, deque
+from typing import Any
+
+from .graph_create import SPOUSE_TYPES
+from .models import FamilyMember, Relationship
+
+LINEAGE_MODES = ("ancestors", "descendants", "lineage", "neighbourhood")
+
+
+class LineageIndex:
+    """
+    Parent, child and spouse adjacency built once from the relationships.
+    A "child" relationship points from the parent (source_id) to the child
+    (target). Members and relationships are also indexed by id so a view
+    can be sliced without scanning the whole archive.
+    """
+
+    def __init__(
+        self,
+        relationships: list[Relationship],
+        members: list[FamilyMember] | None = None,
+    ):
+        self.parents: dict[str, list[str]] = defaultdict(list)
+        self.children: dict[str, list[str]] = defaultdict(list)
+        self.spouses: dict[str, list[str]] = defaultdict(list)
+        self.members_by_id = {str(member.id): member for member in members or []}
+        self.relationships_by_source: dict[str, list[Relationship]] = defaultdict(list)
+        for rel in relationships:
+            source_id, target_id = str(rel.source_id), str(rel.target)
+            self.relationships_by_source[source_id].append(rel)
+            if rel.type == "child":
+                self.children[source_id].append(target_id)
+                self.parents[target_id].append(source_id)
+            elif rel.type in SPOUSE_TYPES:
+                self.spouses[source_id].append(target_id)
+                self.spouses[target_id].append(source_id)
+
+    @staticmethod
+    def _walk(
+        start: str, adjacency: list[dict[str, list[str]]], depth: int | None
+    ) -> dict[str, int]:
+        """Breadth-first search returning {member_id: distance}."""
+        distances = {start: 0}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            distance = distances[node]
+            if depth is not None and distance >= depth:
+                continue
+            for edges in adjacency:
+                for neighbour in edges.get(node, ()):
+                    if neighbour not in distances:
+                        distances[neighbour] = distance + 1
+                        queue.append(neighbour)
+        return distances
+
+    def ancestors(self, member_id: Any, generations: int | None = None) -> dict[str, int]:
+        """Ancestors up to the given number of generations, with distances."""
+        return self._walk(str(member_id), [self.parents], generations)
+
+    def descendants(
+        self, member_id: Any, generations: int | None = None
+    ) -> dict[str, int]:
+        """Descendants down to the given number of generations, with distances."""
+        return self._walk(str(member_id), [self.children], generations)
+
+    def neighbourhood(self, member_id: Any, hops: int) -> dict[str, int]:
+        """Members within the given number of parent, child or spouse hops."""
+        return self._walk(
+            str(member_id), [self.parents, self.children, self.spouses], hops
+        )
+
+    def members_in_view(self, member_id: Any, mode: str, depth: int) -> set[str]:
+        """
+        Member ids shown for a focus member.
+        Blood-line modes also include the spouses of everyone they reach.
+        """
+        if mode == "neighbourhood":
+            return set(self.neighbourhood(member_id, depth))
+        if mode == "ancestors":
+            selected = set(self.ancestors(member_id, depth))
+        elif mode == "descendants":
+            selected = set(self.descendants(member_id, depth))
+        elif mode == "lineage":
+            selected = set(self.ancestors(member_id, depth)) | set(
+                self.descendants(member_id, depth)
+            )
+        else:
+            raise ValueError(f"Unknown lineage mode: {mode}")
+        for node in list(selected):
+            selected.update(self.spouses.get(node, ()))
+        return selected
+
+
+def lineage_subgraph(
+    members: list[FamilyMember],
+    relationships: list[Relationship],
+    focus_id: Any,
+    mode: str = "lineage",
+    depth: int = 2,
+    index: LineageIndex | None = None,
+) -> tuple[list[FamilyMember], list[Relationship]]:
+    """
+    Return the members and relationships in a focus member's view, ready to
+    pass to create_family_graph or either renderer. Pass a prebuilt index to
+    make this proportional to the size of the view.
+    """
+    index = index or LineageIndex(relationships, members)
+    selected = index.members_in_view(focus_id, mode, depth)
+    return (
+        [index.members_by_id[node] for node in selected if node in index.members_by_id],
+        [
+            rel
+            for node in selected
+            for rel in index.relationships_by_source.get(node, ())
+            if str(rel.target) in selected
+        ],
+    )
@@ -1,8 +1,11 @@
 import streamlit as st
 from bson import ObjectId
 
-from .database import add_document, load_documents, update_document
-from .graph_create import get_member_key, load_family_members
+from .database import add_document, get_repository, update_document
+from .graph_create import get_member_key
+from .member_select import member_select
+from .models import FamilyMember
+from .snapshot import get_member_directory
 
 
 def member_form(
@@ -128,17 +131,11 @@ def member_page():
     st.write(
         "This page will display detailed information about a selected family member."
     )
-    member_docs, _ = load_documents()
-    st.write(f"Object ID for the first member: {member_docs[0]['_id']}")
+    directory = get_member_directory()
+    st.write(f"Retrieved {len(directory)} records from MongoDB.")
 
-    # 1. Extract unique house values
-    all_houses = sorted(
-        {doc.get("house", "Unknown") for doc in member_docs if doc.get("house")}
-    )
-    house_filter = st.selectbox("Filter by House", options=["All"] + all_houses)
-
-    ids = [doc["_id"] for doc in member_docs]
-    members = load_family_members(member_docs)
+    # 1. Unique house values
+    house_filter = st.selectbox("Filter by House", options=["All"] + directory.houses)
 
     # Add a radio selector for the canonical key.
     cannon_key_selected = st.selectbox(
@@ -148,36 +145,18 @@ def member_page():
     cannon_key = None if cannon_key_selected == "None" else cannon_key_selected
 
     # 2. Filter members by house
+    within = None
     if house_filter != "All":
-        filtered_members = [
-            m for m in members if getattr(m, "house", None) == house_filter
-        ]
-        filtered_ids = [
-            doc["_id"] for doc in member_docs if doc.get("house") == house_filter
-        ]
-    else:
-        filtered_members = members
-        filtered_ids = ids
-
-    # Pair each name with its corresponding ID
-    name_id_pairs = list(
-        zip(
-            [get_member_key(member, cannon_key) for member in filtered_members],
-            filtered_ids,
-        )
-    )
-
-    # Sort the pairs by name
-    name_id_pairs.sort(key=lambda x: x[0])
+        within = directory.house_members[house_filter]
 
-    # Unpack the sorted names and ids
-    sorted_names = [name for name, _id in name_id_pairs]
-    sorted_ids = [_id for name, _id in name_id_pairs]
-
-    selected_member = st.selectbox(
+    name_index = directory.name_index
+    selected_member = member_select(
         "Select a family member",
-        options=["None", "Add Member"] + sorted_names,
+        name_index,
         key="member_selector",
+        name_key=cannon_key,
+        within=within,
+        extra_options=["None", "Add Member"],
     )
 
     if selected_member == "None":
@@ -193,20 +172,15 @@ def member_page():
         st.success("New member added successfully!")
         return
 
-    selected_index = sorted_names.index(selected_member)
-    selected_id = sorted_ids[selected_index]
+    selected_id = selected_member
+    # Only the member being edited is read in full.
+    document = get_repository().get_member(ObjectId(selected_id))
+    member = FamilyMember.model_validate(document) if document else None
+    selected_member = get_member_key(member, cannon_key) if member else selected_id
     st.write(f"Selected member name: {selected_member}")
     st.write(f"Selected member id: {selected_id}")
 
     if selected_member:
-        member = next(
-            (
-                m
-                for m in filtered_members
-                if get_member_key(m, cannon_key) == selected_member
-            ),
-            None,
-        )
         if member:
             st.write(f"Details for {selected_member}:")
             existing_member = member.model_dump()
@@ -217,7 +191,7 @@ def member_page():
             )
             if updated_member:
                 updated_member["_id"] = ObjectId(selected_id)
-                update_document(selected_id, updated_member)
+                update_document(ObjectId(selected_id), updated_member)
                 st.success("Changes saved successfully!")
                 st.json(updated_member)
             st.write("You can edit the JSON document above and save changes.")
@@ -0,0 +1,80 @@
+from typing import AbstractSet, Any, Callable, Sequence
+
+import streamlit as st
+
+from .graph_create import get_member_key
+from .models import FamilyMember
+from .name_index import NameIndex
+
+SEARCH_LIMIT = 50
+
+
+def member_select(
+    label: str,
+    index: NameIndex,
+    key: str,
+    name_key: str | None = None,
+    where: Callable[[FamilyMember], bool] | None = None,
+    extra_options: Sequence[Any] = (),
+    limit: int = SEARCH_LIMIT,
+    within: AbstractSet[str] | None = None,
+) -> Any:
+    """
+    Type-ahead member selector: a search box whose ranked matches fill a
+    selectbox. Returns the selected member id (a string), or one of
+    extra_options, which are listed first and shown as-is. where and
+    within restrict the matches as in NameIndex.search.
+    """
+    query = st.text_input(
+        f"Search {label.lower()}",
+        key=f"{key}_query",
+        placeholder="Any name: English, pinyin, Wade-Giles, 漢字, カタカナ…",
+    )
+    matches = index.search(query, limit=limit, where=where, within=within)
+
+    def format_option(option: Any) -> str:
+        member = index.member(option) if isinstance(option, str) else None
+        if member is None:
+            return str(option)
+        return get_member_key(member, name_key)
+
+    return st.selectbox(
+        label,
+        options=list(extra_options) + matches,
+        format_func=format_option,
+        key=key,
+    )
+
+
+def member_multiselect(
+    label: str,
+    index: NameIndex,
+    key: str,
+    name_key: str | None = None,
+    where: Callable[[FamilyMember], bool] | None = None,
+    limit: int = SEARCH_LIMIT,
+    within: AbstractSet[str] | None = None,
+) -> list[str]:
+    """
+    Type-ahead selector for several members. Members picked under earlier
+    searches stay selected while the search box moves on to the next name.
+    Returns the selected member ids.
+    """
+    query = st.text_input(
+        f"Search {label.lower()}",
+        key=f"{key}_query",
+        placeholder="Search, pick, then search for the next one…",
+    )
+    chosen = st.session_state.get(key, [])
+    matches = index.search(query, limit=limit, where=where, within=within)
+
+    def format_option(option: str) -> str:
+        member = index.member(option)
+        return str(option) if member is None else get_member_key(member, name_key)
+
+    return st.multiselect(
+        label,
+        options=list(dict.fromkeys([*chosen, *matches])),
+        format_func=format_option,
+        key=key,
+    )
@@ -1,7 +1,18 @@
-from typing import List, Optional
+from typing import Annotated, List, Optional, Union
 
 from bson import ObjectId
-from pydantic import BaseModel, Field, field_validator
+from pydantic import AfterValidator, BaseModel, Field
+
+
+def _object_id(value: str) -> ObjectId:
+    if not ObjectId.is_valid(value):
+        raise ValueError(f"{value!r} is not a valid ObjectId")
+    return ObjectId(value)
+
+
+# ObjectId, or its hex string. ObjectIds pass the isinstance check in
+# pydantic-core without a Python call; only strings are converted.
+ObjectIdField = Union[ObjectId, Annotated[str, AfterValidator(_object_id)]]
 
 
 class Name(BaseModel):
@@ -15,24 +26,12 @@ class Name(BaseModel):
 
 class Relationship(BaseModel):
     id: Optional[ObjectId] = Field(default=None, alias="_id")
-    source_id: ObjectId
+    source_id: ObjectIdField
     type: str
-    target: ObjectId
+    target: ObjectIdField
     start_date: Optional[str] = None
     end_date: Optional[str] = None
 
-    @field_validator("source_id", mode="before")
-    def ensure_source_id_objectid(cls, v):
-        if isinstance(v, str):
-            return ObjectId(v)
-        return v
-
-    @field_validator("target", mode="before")
-    def ensure_target_objectid(cls, v):
-        if isinstance(v, str):
-            return ObjectId(v)
-        return v
-
     class Config:
         arbitrary_types_allowed = True
         json_encoders = {ObjectId: str}
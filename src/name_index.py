@@ -0,0 +1,268 @@
+import heapq
+import re
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from itertools import islice
+from typing import AbstractSet, Any, Callable, Iterable
+
+from unidecode import unidecode
+
+from .graph_create import get_member_key
+from .models import FamilyMember
+
+NAME_FIELDS = ("english", "pinyin", "wade_giles", "hanzi", "kanji", "katakana")
+# Raw CJK names are short; their suffixes let the given name match too.
+MAX_SUFFIX_LENGTH = 8
+MIN_SIMILARITY = 0.3
+
+_apostrophes = re.compile(r"['’‘ʻ`]")
+_non_alnum = re.compile(r"[^a-z0-9]+")
+
+
+def fold(text: str) -> str:
+    """
+    ASCII search form of a name: transliterated, tone marks and
+    apostrophes dropped, lower case, words separated by single spaces.
+    """
+    text = _apostrophes.sub("", unidecode(text).lower())
+    return _non_alnum.sub(" ", text).strip()
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _name_forms(member: FamilyMember) -> set[str]:
+    """Every searchable spelling of a member's names."""
+    forms = set()
+    names = member.name.model_dump()
+    for field in NAME_FIELDS:
+        value = names.get(field)
+        if not value or not value.strip():
+            continue
+        forms.add(value.strip().casefold())
+        folded = fold(value)
+        if folded:
+            forms.add(folded)
+            forms.add(folded.replace(" ", ""))
+    return forms
+
+
+def _prefix_terms(form: str) -> set[str]:
+    """Every word (or, for short unspaced names, character) start of a form."""
+    if " " in form:
+        words = form.split(" ")
+        starts = {" ".join(words[i:]) for i in range(1, len(words))}
+        return starts | {start.replace(" ", "") for start in starts}
+    if not form.isascii() and len(form) <= MAX_SUFFIX_LENGTH:
+        return {form[i:] for i in range(1, len(form))}
+    return set()
+
+
+class NameIndex:
+    """
+    Prefix and trigram search over every name field of every member.
+
+    Prefix lookups bisect a sorted list of distinct terms; fuzzy lookups
+    count trigrams shared with the unspaced ASCII spellings, so their cost
+    follows the number of distinct spellings rather than members. The index
+    is built once per data version and then kept current with
+    upsert/remove, like FamilyGraph.
+    """
+
+    def __init__(self, members: Iterable[FamilyMember] = ()):
+        self._members: dict[str, FamilyMember] = {}
+        self._labels: dict[str, str] = {}
+        self._forms: dict[str, set[str]] = {}
+        self._starts: dict[str, set[str]] = {}
+        # term -> member ids, for whole names and for word starts.
+        self._whole: dict[str, set[str]] = defaultdict(set)
+        self._partial: dict[str, set[str]] = defaultdict(set)
+        self._terms: list[str] = []
+        # trigram -> spellings, and the size of each spelling's trigram set.
+        self._trigrams: dict[str, set[str]] = defaultdict(set)
+        self._trigram_counts: dict[str, int] = {}
+        self._sorted: list[tuple[str, str]] = []
+        for member in members:
+            self._add(member, bulk=True)
+        self._terms = sorted(self._whole.keys() | self._partial.keys())
+        self._sorted.sort()
+
+    def copy(self) -> "NameIndex":
+        """Return an independent copy that can take updates of its own."""
+        clone = NameIndex.__new__(NameIndex)
+        clone._members = dict(self._members)
+        clone._labels = dict(self._labels)
+        clone._forms = dict(self._forms)
+        clone._starts = dict(self._starts)
+        clone._whole = defaultdict(set, {k: set(v) for k, v in self._whole.items()})
+        clone._partial = defaultdict(
+            set, {k: set(v) for k, v in self._partial.items()}
+        )
+        clone._terms = list(self._terms)
+        clone._trigrams = defaultdict(
+            set, {k: set(v) for k, v in self._trigrams.items()}
+        )
+        clone._trigram_counts = dict(self._trigram_counts)
+        clone._sorted = list(self._sorted)
+        return clone
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def member(self, member_id: Any) -> FamilyMember | None:
+        return self._members.get(str(member_id))
+
+    def upsert(self, member: FamilyMember) -> None:
+        member_id = str(member.id)
+        if member_id in self._members:
+            self.remove(member_id)
+        self._add(member, bulk=False)
+
+    def _add(self, member: FamilyMember, bulk: bool) -> None:
+        member_id = str(member.id)
+        forms = _name_forms(member)
+        starts = set().union(*(_prefix_terms(form) for form in forms)) - forms
+        label = get_member_key(member).casefold()
+        self._members[member_id] = member
+        self._labels[member_id] = label
+        self._forms[member_id] = forms
+        self._starts[member_id] = starts
+        for terms, postings in ((forms, self._whole), (starts, self._partial)):
+            for term in terms:
+                if not bulk and term not in self._whole and term not in self._partial:
+                    insort(self._terms, term)
+                postings[term].add(member_id)
+        for spelling in forms | starts:
+            if spelling.isascii() and " " not in spelling:
+                grams = trigrams(spelling)
+                self._trigram_counts[spelling] = len(grams)
+                for gram in grams:
+                    self._trigrams[gram].add(spelling)
+        if bulk:
+            self._sorted.append((label, member_id))
+        else:
+            insort(self._sorted, (label, member_id))
+
+    def remove(self, member_id: Any) -> None:
+        member_id = str(member_id)
+        if self._members.pop(member_id, None) is None:
+            return
+        forms = self._forms.pop(member_id)
+        starts = self._starts.pop(member_id)
+        for terms, postings in ((forms, self._whole), (starts, self._partial)):
+            for term in terms:
+                postings[term].discard(member_id)
+                if not postings[term]:
+                    del postings[term]
+                    if term not in self._whole and term not in self._partial:
+                        del self._terms[bisect_left(self._terms, term)]
+        for spelling in forms | starts:
+            if spelling in self._trigram_counts and not (
+                spelling in self._whole or spelling in self._partial
+            ):
+                for gram in trigrams(spelling):
+                    self._trigrams[gram].discard(spelling)
+                del self._trigram_counts[spelling]
+        label = self._labels.pop(member_id)
+        del self._sorted[bisect_left(self._sorted, (label, member_id))]
+
+    def sync(self, members: list[FamilyMember]) -> None:
+        """Apply whatever changes turn this index into the given members."""
+        incoming = {str(member.id): member for member in members}
+        for member_id in set(self._members) - set(incoming):
+            self.remove(member_id)
+        for member_id, member in incoming.items():
+            if self._members.get(member_id) != member:
+                self.upsert(member)
+
+    def _terms_starting(self, prefix: str) -> Iterable[str]:
+        i = bisect_left(self._terms, prefix)
+        while i < len(self._terms) and self._terms[i].startswith(prefix):
+            yield self._terms[i]
+            i += 1
+
+    def _spelling_members(self, spelling: str) -> set[str]:
+        return self._whole.get(spelling, set()) | self._partial.get(spelling, set())
+
+    def search(
+        self,
+        query: str,
+        limit: int | None = 20,
+        where: Callable[[FamilyMember], bool] | None = None,
+        within: AbstractSet[str] | None = None,
+    ) -> list[str]:
+        """
+        Return member ids ranked by how well a name matches the query:
+        exact names, then names starting with it, then names with a word
+        starting with it, then trigram similarity; ties sort by name. An
+        empty query lists members alphabetically. within restricts the
+        results to a set of member ids, e.g. a house's members.
+        """
+
+        def allowed(member_id: str) -> bool:
+            return where is None or where(self._members[member_id])
+
+        raw = query.strip().casefold()
+        if not raw:
+            if within is not None:
+                # Sort only the subset instead of walking every member.
+                ids = [m for m in within if m in self._members and allowed(m)]
+                return self._by_label(ids, limit)
+            ids = (member_id for _, member_id in self._sorted if allowed(member_id))
+            return list(islice(ids, limit))
+
+        folded = fold(query)
+        queries = {q for q in (raw, folded, folded.replace(" ", "")) if q}
+        tiers: list[set[str]] = [set(), set(), set()]
+        for q in queries:
+            tiers[0].update(self._whole.get(q, ()))
+            for term in self._terms_starting(q):
+                tiers[1].update(self._whole.get(term, ()))
+                tiers[2].update(self._partial.get(term, ()))
+
+        ranked: list[str] = []
+        seen: set[str] = set()
+        if within is not None:
+            tiers = [tier & within for tier in tiers]
+        for tier in tiers:
+            candidates = [m for m in tier - seen if allowed(m)]
+            seen |= tier
+            remaining = None if limit is None else limit - len(ranked)
+            ranked += self._by_label(candidates, remaining)
+            if limit is not None and len(ranked) >= limit:
+                return ranked
+
+        compact = folded.replace(" ", "")
+        if len(compact) >= 3:
+            query_grams = trigrams(compact)
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self._trigrams.get(gram, ()))
+            similarity: dict[str, float] = {}
+            for spelling, count in shared.items():
+                # Dice coefficient between the two trigram sets.
+                score = 2 * count / (len(query_grams) + self._trigram_counts[spelling])
+                if score < MIN_SIMILARITY:
+                    continue
+                for member_id in self._spelling_members(spelling):
+                    if score > similarity.get(member_id, 0.0):
+                        similarity[member_id] = score
+            if within is not None:
+                similarity = {m: similarity[m] for m in similarity.keys() & within}
+            candidates = [m for m in similarity if m not in seen and allowed(m)]
+            key = lambda m: (-similarity[m], self._labels[m], m)  # noqa: E731
+            remaining = None if limit is None else limit - len(ranked)
+            ranked += (
+                sorted(candidates, key=key)
+                if remaining is None
+                else heapq.nsmallest(remaining, candidates, key=key)
+            )
+        return ranked
+
+    def _by_label(self, member_ids: list[str], limit: int | None) -> list[str]:
+        key = lambda m: (self._labels[m], m)  # noqa: E731
+        if limit is None:
+            return sorted(member_ids, key=key)
+        return heapq.nsmallest(limit, member_ids, key=key)
@@ -0,0 +1,224 @@
+"""
+Lightweight timing of the app's hot paths.
+
+    with perf.span("graph.create"):
+        ...
+
+    @perf.timed("db.load_documents")
+    def load_documents(...): ...
+
+Every span is recorded twice: in a process-wide recorder and in the
+recorder bound to the current Streamlit session (see bind_session).
+Timing is off unless WUFENG_PERF=1 is set or a session turns on the
+performance panel; while it is off, span() returns a shared no-op and
+timed() adds a single flag check per call.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Hashable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+# Histogram buckets double from 1 µs; bucket i holds durations below 2**i µs.
+BUCKETS = 32
+
+
+class Histogram:
+    """Count, total, extremes and power-of-two buckets of span durations."""
+
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.buckets = [0] * BUCKETS
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        bucket = math.frexp(seconds * 1e6)[1] if seconds > 1e-6 else 0
+        self.buckets[min(bucket, BUCKETS - 1)] += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile, in seconds."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(2.0**bucket / 1e6, self.max)
+        return self.max
+
+    def to_dict(self) -> dict[str, Any]:
+        ms = 1000.0
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * ms, 3),
+            "mean_ms": round(self.total / self.count * ms, 3) if self.count else 0.0,
+            "min_ms": round(self.min * ms, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5) * ms, 3),
+            "p95_ms": round(self.quantile(0.95) * ms, 3),
+            "max_ms": round(self.max * ms, 3),
+            # Bucket upper bounds in µs -> counts, empty buckets left out.
+            "buckets_us": {
+                2**bucket: count for bucket, count in enumerate(self.buckets) if count
+            },
+        }
+
+
+class PerfRecorder:
+    """Histograms keyed by span name, safe to share between threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[str, Histogram] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.record(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {
+                name: histogram.to_dict()
+                for name, histogram in sorted(self._histograms.items())
+            }
+
+
+_process = PerfRecorder()
+_session: ContextVar[PerfRecorder | None] = ContextVar("perf_session", default=None)
+_always_on = os.environ.get("WUFENG_PERF", "") not in ("", "0")
+_subscribers: set[Hashable] = set()
+_subscribers_lock = threading.Lock()
+_enabled = _always_on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def always_on() -> bool:
+    """Whether WUFENG_PERF keeps timing on regardless of subscribers."""
+    return _always_on
+
+
+def subscribe(key: Hashable, on: bool = True) -> None:
+    """Turn timing on while at least one subscriber (e.g. a session) wants it."""
+    global _enabled
+    with _subscribers_lock:
+        if on:
+            _subscribers.add(key)
+        else:
+            _subscribers.discard(key)
+        _enabled = _always_on or bool(_subscribers)
+
+
+def process_recorder() -> PerfRecorder:
+    return _process
+
+
+def bind_session(recorder: PerfRecorder | None) -> None:
+    """Attribute spans in the current context (a session's script run) to recorder."""
+    _session.set(recorder)
+
+
+def record(name: str, seconds: float) -> None:
+    _process.record(name, seconds)
+    session = _session.get()
+    if session is not None:
+        session.record(name, seconds)
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+@contextmanager
+def _span(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def span(name: str):
+    """Context manager timing its block under name."""
+    if not _enabled:
+        return _NO_SPAN
+    return _span(name)
+
+
+def timed(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorator timing every call of a function under name."""
+
+    def decorate(function: Callable[..., T]) -> Callable[..., T]:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorate
+
+
+def timed_iter(name: str, iterable: Iterable[T]) -> Iterator[T]:
+    """Time the whole consumption of a lazy iterable (e.g. a cursor) as one span."""
+    if not _enabled:
+        yield from iterable
+        return
+    elapsed = 0.0
+    iterator = iter(iterable)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - started
+            yield item
+    finally:
+        record(name, elapsed)
+
+
+def export(session: PerfRecorder | None = None) -> str:
+    """JSON of the process-wide histograms and, if given, a session's."""
+    report: dict[str, Any] = {"process": _process.to_dict()}
+    if session is not None:
+        report["session"] = session.to_dict()
+    return json.dumps(report, indent=2)
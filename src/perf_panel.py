@@ -0,0 +1,65 @@
+import uuid
+import weakref
+
+import streamlit as st
+
+from . import perf
+
+COLUMNS = ("count", "mean_ms", "p50_ms", "p95_ms", "max_ms", "total_ms")
+
+
+class _Subscription:
+    """
+    A session's perf subscription, kept in its session state. Streamlit
+    drops the state when the session ends, which unsubscribes it.
+    """
+
+    def __init__(self):
+        self.key = uuid.uuid4().hex
+        weakref.finalize(self, perf.subscribe, self.key, False)
+
+
+def session_timing() -> perf.PerfRecorder:
+    """
+    Bind this session's recorder for the current script run and subscribe
+    the session to timing while its performance panel is switched on.
+    """
+    if "perf_recorder" not in st.session_state:
+        st.session_state["perf_recorder"] = perf.PerfRecorder()
+    if "perf_subscription" not in st.session_state:
+        st.session_state["perf_subscription"] = _Subscription()
+    recorder = st.session_state["perf_recorder"]
+    subscription = st.session_state["perf_subscription"]
+    # Off by default: enabled() is on while any other session has its panel open.
+    show = st.sidebar.checkbox(
+        "Performance panel", value=perf.always_on(), key="perf_panel"
+    )
+    perf.subscribe(subscription.key, show)
+    perf.bind_session(recorder)
+    return recorder
+
+
+def _rows(histograms: dict[str, dict]) -> list[dict]:
+    return [
+        {"span": name, **{column: stats[column] for column in COLUMNS}}
+        for name, stats in histograms.items()
+    ]
+
+
+def perf_panel(recorder: perf.PerfRecorder) -> None:
+    """Sidebar tables of span timings for this session and the process."""
+    if not st.session_state.get("perf_panel"):
+        return
+    with st.sidebar.expander("Performance", expanded=True):
+        st.caption("This session")
+        st.dataframe(_rows(recorder.to_dict()), hide_index=True)
+        st.caption("All sessions")
+        st.dataframe(_rows(perf.process_recorder().to_dict()), hide_index=True)
+        st.download_button(
+            "Export JSON",
+            data=perf.export(recorder),
+            file_name="perf.json",
+            mime="application/json",
+        )
+        if st.button("Reset session timings"):
+            recorder.reset()
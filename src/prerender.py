@@ -0,0 +1,329 @@
+"""
+Pre-render the family archive as a static site.
+
+    python -m src.prerender site/ --data-dir . --workers 8
+    python -m src.prerender site/ --mode descendants --depth 3
+
+The output directory holds an index of every member, the full pyvis graph
+(graph.html), the Graphviz tree (tree.svg, or tree.dot without a local
+`dot` binary) and one page per member with their lineage subgraph
+(members/<id>.html). Any plain web server can serve it.
+
+Pages are rendered across a process pool. manifest.json records a content
+hash of each page's inputs (its documents and the render options), so a
+rerun only renders pages whose inputs changed and removes pages of members
+who are gone. The exit status is 1 when any page failed to render.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import html
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+from bson import json_util
+
+from .bulk import repository_from_args
+from .graph_create import (
+    create_family_graph,
+    get_member_key,
+    load_family_members,
+    load_relationships,
+)
+from .graph_render import build_pyvis_html
+from .graphviz_worker import dot_available
+from .layout import compute_layout
+from .lineage import LINEAGE_MODES
+from .render_family_graph_graphviz import build_family_dot
+from .snapshot import load_snapshot
+
+# Bump when the page templates change, so every page is rendered again.
+RENDER_VERSION = 1
+MANIFEST = "manifest.json"
+
+# Double-clicking a node opens that member's page.
+NODE_LINK_SCRIPT = """
+<script>
+  network.on("doubleClick", function (params) {
+    if (params.nodes.length) {
+      window.location.href = "%s" + params.nodes[0] + ".html";
+    }
+  });
+</script>
+"""
+
+
+@dataclass
+class PrerenderReport:
+    pages: int = 0
+    rendered: int = 0
+    skipped: int = 0
+    removed: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    notes: list[str] = field(default_factory=list)
+
+
+def _digest(options: dict[str, Any], documents: Iterable[dict[Any, Any]]) -> str:
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps({"v": RENDER_VERSION, **options}, sort_keys=True).encode())
+    for document in documents:
+        hasher.update(json_util.dumps(document, sort_keys=True).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+def _page_html(body_html: str, title: str, home: str, member_prefix: str) -> str:
+    """Add a title bar and node links to a generated pyvis page."""
+    bar = (
+        '<div style="font-family: arial; color: #fff; padding: 8px">'
+        f'<a style="color: #FFD700" href="{home}">Family index</a> · '
+        f"{html.escape(title)}</div>"
+    )
+    body_html = body_html.replace("<body>", "<body>" + bar, 1)
+    return body_html.replace("</body>", NODE_LINK_SCRIPT % member_prefix + "</body>", 1)
+
+
+def _render(job: dict[str, Any]) -> tuple[str, str | None]:
+    """
+    Render one page in a pool worker from the documents in the job and
+    write it under job["path"]. Returns the path written and an error
+    message for the report, if any.
+    """
+    path = Path(job["path"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    members = load_family_members(job["members"])
+    relationships = load_relationships(job["relationships"])
+    name_key = job["name_key"]
+
+    if job["kind"] == "tree":
+        source = build_family_dot(members, relationships, name_language=name_key).source
+        error = None
+        if job["dot"]:
+            svg = subprocess.run(
+                ["dot", "-Tsvg"], input=source.encode("utf-8"), capture_output=True
+            )
+            if svg.returncode == 0:
+                path.write_bytes(svg.stdout)
+                # A tree.dot from a run without `dot` would be stale now.
+                path.with_suffix(".dot").unlink(missing_ok=True)
+                return str(path), None
+            error = f"dot -Tsvg failed: {svg.stderr.decode('utf-8', 'replace').strip()}"
+        path.with_suffix(".dot").write_text(source, encoding="utf-8")
+        path.unlink(missing_ok=True)
+        return str(path.with_suffix(".dot")), error
+
+    # Relationships outside the view were left out on purpose.
+    with contextlib.redirect_stdout(io.StringIO()):
+        graph = create_family_graph(members, relationships, name_display_type=name_key)
+    layout = job["layout"]
+    positions = compute_layout(graph, layout)
+    page = build_pyvis_html(
+        graph, layout, plot_height=job["height"], positions=positions
+    )
+    page = _page_html(page, job["title"], job["home"], job["member_prefix"])
+    path.write_text(page, encoding="utf-8")
+    return str(path), None
+
+
+def _index_html(entries: list[tuple[str, str]], tree: str) -> str:
+    items = "\n".join(
+        f'<li><a href="members/{member_id}.html">{html.escape(label)}</a></li>'
+        for label, member_id in entries
+    )
+    return f"""<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Wufeng Lin Family</title></head>
+<body style="font-family: arial">
+<h1>Wufeng Lin Family</h1>
+<p>
+<a href="graph.html">Interactive family graph</a> · <a href="{tree}">Family tree</a>
+</p>
+<h2>Members ({len(entries)})</h2>
+<ul>
+{items}
+</ul>
+</body>
+</html>
+"""
+
+
+def prerender(
+    repository,
+    output: str | Path,
+    workers: int | None = None,
+    mode: str = "lineage",
+    depth: int = 2,
+    name_key: str | None = None,
+    layout: str = "default",
+    force: bool = False,
+) -> PrerenderReport:
+    """Render the site into output, skipping pages whose inputs are unchanged."""
+    report = PrerenderReport()
+    started = time.perf_counter()
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    manifest_path = output / MANIFEST
+    previous = {}
+    if manifest_path.exists() and not force:
+        previous = json.loads(manifest_path.read_text(encoding="utf-8"))
+
+    snapshot = load_snapshot(repository, repository.data_version)
+    member_docs = {str(doc["_id"]): doc for doc in snapshot.member_docs}
+    relationship_docs = {str(doc["_id"]): doc for doc in snapshot.relationship_docs}
+    index = snapshot.lineage_index
+    has_dot = dot_available()
+    if not has_dot:
+        report.notes.append("No `dot` binary: wrote tree.dot instead of tree.svg.")
+
+    base = {"name_key": name_key}
+    jobs: list[dict[str, Any]] = [
+        {
+            **base,
+            "kind": "graph",
+            "path": "graph.html",
+            "members": snapshot.member_docs,
+            "relationships": snapshot.relationship_docs,
+            "layout": layout,
+            "height": 900,
+            "title": "Whole family",
+            "home": "index.html",
+            "member_prefix": "members/",
+        },
+        {
+            **base,
+            "kind": "tree",
+            "path": "tree.svg",
+            "dot": has_dot,
+            "members": snapshot.member_docs,
+            "relationships": snapshot.relationship_docs,
+        },
+    ]
+    for member_id in member_docs:
+        view = index.members_in_view(member_id, mode, depth)
+        rel_ids = sorted(
+            str(rel.id)
+            for node in view
+            for rel in index.relationships_by_source.get(node, ())
+            if str(rel.target) in view
+        )
+        member = index.members_by_id[member_id]
+        jobs.append(
+            {
+                **base,
+                "kind": "member",
+                "path": f"members/{member_id}.html",
+                "members": [
+                    member_docs[node] for node in sorted(view) if node in member_docs
+                ],
+                "relationships": [relationship_docs[i] for i in rel_ids],
+                "layout": "hierarchical",
+                "height": 700,
+                "title": f"{get_member_key(member, name_key)} ({mode}, {depth})",
+                "home": "../index.html",
+                "member_prefix": "",
+            }
+        )
+
+    manifest = {}
+    pending = []
+    for job in jobs:
+        options = {
+            key: value
+            for key, value in job.items()
+            if key not in ("members", "relationships")
+        }
+        digest = _digest(options, [*job["members"], *job["relationships"]])
+        manifest[job["path"]] = digest
+        target = output / job["path"]
+        exists = target.exists() or target.with_suffix(".dot").exists()
+        if previous.get(job["path"]) == digest and exists:
+            report.skipped += 1
+            continue
+        pending.append({**job, "path": str(target)})
+    report.pages = len(jobs)
+
+    if pending:
+        # Large jobs first, so the whole-family pages do not finish last.
+        pending.sort(key=lambda job: -len(job["members"]))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_render, pending, chunksize=16)
+            for job, (_, error) in zip(pending, results):
+                report.rendered += 1
+                if error:
+                    report.failed += 1
+                    report.notes.append(error)
+                    # Left out of the manifest, so the next run tries again.
+                    del manifest[Path(job["path"]).relative_to(output).as_posix()]
+
+    for path in set(previous) - set(manifest):
+        for stale in (output / path, (output / path).with_suffix(".dot")):
+            if stale.exists():
+                stale.unlink()
+                report.removed += 1
+
+    entries = sorted(
+        (get_member_key(index.members_by_id[member_id], name_key), member_id)
+        for member_id in member_docs
+    )
+    # Link the tree actually written: dot can fail, or be gone since the last run.
+    tree = "tree.svg" if (output / "tree.svg").exists() else "tree.dot"
+    (output / "index.html").write_text(_index_html(entries, tree), encoding="utf-8")
+    manifest_path.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.prerender", description=__doc__)
+    parser.add_argument("output", help="Directory to write the site into")
+    parser.add_argument("--uri", help="MongoDB URI (default: the app's repository)")
+    parser.add_argument("--data-dir", help="Use the JSON dumps in this folder")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--mode", choices=LINEAGE_MODES, default="lineage")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument(
+        "--name-key",
+        choices=["english", "pinyin", "hanzi", "wade_giles", "kanji", "katakana"],
+    )
+    parser.add_argument(
+        "--layout",
+        choices=["default", "hierarchical"],
+        default="default",
+        help="Layout of the whole-family graph",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Render every page, ignoring the manifest"
+    )
+    args = parser.parse_args(argv)
+
+    report = prerender(
+        repository_from_args(args),
+        args.output,
+        workers=args.workers,
+        mode=args.mode,
+        depth=args.depth,
+        name_key=args.name_key,
+        layout=args.layout,
+        force=args.force,
+    )
+    print(
+        f"{report.pages} pages in {report.seconds:.1f}s: {report.rendered} rendered, "
+        f"{report.skipped} unchanged, {report.removed} removed, "
+        f"{report.failed} failed."
+    )
+    for note in report.notes:
+        print(note)
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
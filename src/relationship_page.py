@@ -1,17 +1,21 @@
 import streamlit as st
 from bson import ObjectId
 
-from .database import (  # You need to implement add_relationship
-    add_relationship,
-    load_documents,
-)
+from .database import add_relationship, add_relationships, get_repository
+from .graph_create import SPOUSE_TYPES, get_member_key
+from .integrity import check_new_relationships
+from .member_select import member_multiselect, member_select
+from .snapshot import MemberDirectory, get_member_directory
+
+BATCH_KINDS = ["Children of one parent", "Spouses of one person"]
 
 
 def add_relationship_page():
     st.title("Add Relationship")
 
     # Load members
-    member_docs, _ = load_documents()
+    directory = get_member_directory()
+    st.write(f"Retrieved {len(directory)} records from MongoDB.")
     # Choose preferred language for display
     lang = st.selectbox(
         "Display names in:",
@@ -19,25 +23,27 @@ def add_relationship_page():
         index=0,
     )
 
-    # Build display names and mapping to ObjectId
-    def get_display_name(doc):
-        name = doc.get("name", {})
-        return (
-            name.get(lang)
-            or name.get("english")
-            or name.get("hanzi")
-            or str(doc["_id"])
-        )
+    mode = st.radio("Entry mode", ["Single", "Batch"], horizontal=True)
+    if mode == "Batch":
+        batch_entry(directory, lang)
+    else:
+        single_entry(directory, lang)
 
-    member_choices = [(get_display_name(doc), str(doc["_id"])) for doc in member_docs]
-    member_choices.sort(key=lambda x: x[0])
 
+def single_entry(directory: MemberDirectory, lang: str) -> None:
+    """Add one relationship between two members."""
     # Select source and target
-    source_display = st.selectbox(
-        "Select first member (source)", [name for name, _id in member_choices]
+    source = member_select(
+        "Select first member (source)",
+        directory.name_index,
+        key="relationship_source",
+        name_key=lang,
     )
-    target_display = st.selectbox(
-        "Select second member (target)", [name for name, _id in member_choices]
+    target = member_select(
+        "Select second member (target)",
+        directory.name_index,
+        key="relationship_target",
+        name_key=lang,
     )
 
     # Relationship type
@@ -51,9 +57,11 @@ def add_relationship_page():
     end_date = st.text_input("End date (optional)")
 
     if st.button("Add Relationship"):
-        # Map display names back to ObjectIds
-        source_id = ObjectId(dict(member_choices)[source_display])
-        target_id = ObjectId(dict(member_choices)[target_display])
+        if source is None or target is None:
+            st.error("Select both members.")
+            return
+        source_id = ObjectId(source)
+        target_id = ObjectId(target)
 
         if source_id == target_id:
             st.error("Source and target cannot be the same member.")
@@ -66,5 +74,77 @@ def add_relationship_page():
             "start_date": start_date or None,
             "end_date": end_date or None,
         }
-        add_relationship(rel_doc)
-        st.success("Relationship added successfully!")
+        if add_relationship(rel_doc) is not None:
+            st.success("Relationship added successfully!")
+
+
+def batch_entry(directory: MemberDirectory, lang: str) -> None:
+    """
+    Add one parent's children or one person's spouses in a single write.
+    The batch is checked against itself and the stored relationships of
+    everyone in it before anything is written.
+    """
+    kind = st.selectbox("Batch", BATCH_KINDS)
+    children = kind == BATCH_KINDS[0]
+    anchor = member_select(
+        "Parent" if children else "Person",
+        directory.name_index,
+        key="batch_anchor",
+        name_key=lang,
+    )
+    if children:
+        rel_type = "child"
+    else:
+        rel_type = st.selectbox("Relationship type", SPOUSE_TYPES)
+    others = member_multiselect(
+        "Children" if children else "Spouses",
+        directory.name_index,
+        key="batch_members",
+        name_key=lang,
+    )
+    start_date = end_date = None
+    if not children:
+        start_date = st.text_input("Start date (optional)", key="batch_start_date")
+        end_date = st.text_input("End date (optional)", key="batch_end_date")
+
+    if not st.button(f"Add {len(others)} relationships", disabled=not others):
+        return
+    if anchor is None:
+        st.error(f"Select the {'parent' if children else 'person'}.")
+        return
+
+    # A child relationship's source_id is the parent.
+    anchor_id = ObjectId(anchor)
+    rel_docs = [
+        {
+            "source_id": anchor_id,
+            "target": ObjectId(other),
+            "type": rel_type,
+            "start_date": start_date or None,
+            "end_date": end_date or None,
+        }
+        for other in others
+    ]
+    member_ids = [anchor_id, *(rel_doc["target"] for rel_doc in rel_docs)]
+    # Stored relationships may carry hex-string ids; fetch both forms.
+    existing = get_repository().find_relationships(
+        [*member_ids, *(str(member_id) for member_id in member_ids)]
+    )
+    issues = check_new_relationships(
+        rel_docs,
+        lambda member_id: directory.name_index.member(str(member_id)) is not None,
+        existing,
+    )
+    if issues:
+        for issue in issues:
+            names = ", ".join(_display_name(directory, i, lang) for i in issue.ids)
+            st.error(f"{issue.kind}: {names} ({issue.detail})")
+        return
+    inserted_ids = add_relationships(rel_docs)
+    if inserted_ids:
+        st.success(f"Added {len(inserted_ids)} relationships.")
+
+
+def _display_name(directory: MemberDirectory, member_id: str, lang: str) -> str:
+    member = directory.name_index.member(member_id)
+    return member_id if member is None else get_member_key(member, lang)
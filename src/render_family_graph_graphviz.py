@@ -1,31 +1,31 @@
+import time
+import uuid
 from collections import defaultdict
+from concurrent.futures import CancelledError
+from typing import Hashable, Mapping
 
 import graphviz
 import streamlit as st
 
+from src import perf
 from src.graph_create import get_color_by_house, get_member_key
+from src.graphviz_worker import dot_available, get_graphviz_renderer
 
 
-def render_family_graph_graphviz(
+@perf.timed("graphviz.build_dot")
+def build_family_dot(
     members,
     relationships,
+    orientation: str = "TB",
     name_language: str | None = None,
     plot_height: int = 1000,
-):
+    generations: Mapping[str, int] | None = None,
+) -> graphviz.Digraph:
     """
-    Render a hierarchical family graph using Graphviz (top-down) with custom node colors.
+    Build the hierarchical family graph as a Graphviz Digraph.
+    generations (member id -> generation, e.g. GenerationIndex.levels)
+    replaces the stored generations used to rank the nodes.
     """
-
-    orientation_selection = st.selectbox(
-        "Select Graph Orientation",
-        options=["TB (Top-Bottom)", "LR (Left-Right)"],
-        index=0,
-    )
-    orientation = "TB"
-
-    if orientation_selection == "LR (Left-Right)":
-        orientation = "LR"
-
     dot = graphviz.Digraph(comment="Family Tree", format="png")
     dot.attr(rankdir=orientation)  # Top to Bottom
     dot.attr(
@@ -57,6 +57,8 @@ def render_family_graph_graphviz(
     for member in members:
         node_id = str(member.id)
         generation = getattr(member, "generation", None)
+        if generations is not None:
+            generation = generations.get(node_id)
         if generation is not None:
             generation_groups[generation].append(node_id)
 
@@ -72,8 +74,93 @@ def render_family_graph_graphviz(
         rel_type = rel.type
         dot.edge(source_id, target_id, label=rel_type)
 
-    st.graphviz_chart(dot, use_container_width=True)
+    return dot
+
+
+def _session_key() -> str:
+    return st.session_state.setdefault("graphviz_session", uuid.uuid4().hex)
+
 
-    st.info(
-        "To save the graph as SVG, right-click the graph, choose 'Inspect', find the <svg> element, and save it as an SVG file. Direct SVG/PNG export is not available on this server."
+def render_family_graph_graphviz(
+    members,
+    relationships,
+    name_language: str | None = None,
+    plot_height: int = 1000,
+    data_version: Hashable | None = None,
+    generations: Mapping[str, int] | None = None,
+):
+    """
+    Render a hierarchical family graph using Graphviz (top-down) with custom node colors.
+    With a data_version and a local `dot` binary the layout runs in a
+    background worker and the SVG/PNG output is cached and downloadable.
+    """
+
+    orientation_selection = st.selectbox(
+        "Select Graph Orientation",
+        options=["TB (Top-Bottom)", "LR (Left-Right)"],
+        index=0,
     )
+    orientation = "TB"
+
+    if orientation_selection == "LR (Left-Right)":
+        orientation = "LR"
+
+    def build_source() -> str:
+        return build_family_dot(
+            members,
+            relationships,
+            orientation,
+            name_language,
+            plot_height,
+            generations,
+        ).source
+
+    if data_version is None or not dot_available():
+        st.graphviz_chart(build_source(), use_container_width=True)
+        st.info(
+            "To save the graph as SVG, right-click the graph, choose 'Inspect', find the <svg> element, and save it as an SVG file. Direct SVG/PNG export needs the Graphviz `dot` binary on the server."
+        )
+        return
+
+    renderer = get_graphviz_renderer()
+    future = renderer.submit(
+        (data_version, orientation, name_language, plot_height),
+        build_source,
+        _session_key(),
+    )
+    if not future.done():
+        status = st.empty()
+        started = time.perf_counter()
+        while not future.done():
+            # Updating the page each tick lets Streamlit stop this run as
+            # soon as the user changes the orientation.
+            status.caption(
+                f"Rendering family tree… {time.perf_counter() - started:.1f}s"
+            )
+            time.sleep(0.2)
+        status.empty()
+    try:
+        outputs = future.result()
+    except CancelledError:
+        st.warning("The previous render was cancelled; please try again.")
+        return
+    except RuntimeError as exc:
+        st.error(str(exc))
+        return
+
+    st.image(outputs["svg"].decode("utf-8"), use_container_width=True)
+    svg_column, png_column = st.columns(2)
+    with svg_column:
+        st.download_button(
+            "Download SVG",
+            data=outputs["svg"],
+            file_name=f"family_tree_{orientation}.svg",
+            mime="image/svg+xml",
+        )
+    with png_column:
+        st.download_button(
+            "Download PNG",
+            data=outputs["png"],
+            file_name=f"family_tree_{orientation}.png",
+            mime="image/png",
+        )
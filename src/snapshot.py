@@ -0,0 +1,400 @@
+import contextvars
+import threading
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+import networkx as nx
+
+from . import perf
+from .clusters import ClusterIndex
+from .database import FamilyRepository, get_repository
+from .family_graph import FamilyGraph
+from .generations import GenerationIndex
+from .graph_create import (
+    load_family_members,
+    stream_family_members,
+    stream_relationships,
+)
+from .kinship import KinshipIndex
+from .lineage import LineageIndex
+from .models import FamilyMember, Relationship
+from .name_index import NameIndex
+
+# Documents per cursor batch, validated as each batch arrives.
+LOAD_BATCH_SIZE = 1000
+# Graphs built during a first load, before any page asks: the Home page's
+# default name key.
+PREBUILT_GRAPHS: tuple[str | None, ...] = (None,)
+STREAMS = {
+    "members": stream_family_members,
+    "relationships": stream_relationships,
+}
+# Loads relationships while the loading thread reads the members. Snapshot
+# loads are single-flight, so a few workers serve every session.
+_load_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="snapshot-load")
+
+
+@dataclass
+class FamilySnapshot:
+    """
+    Immutable view of the archive at one data version.
+    Shared by every session, so callers must not mutate the documents,
+    models or graphs it hands out.
+    """
+
+    repository: FamilyRepository
+    version: int
+    member_docs: list[dict[Any, Any]]
+    relationship_docs: list[dict[Any, Any]]
+    members: list[FamilyMember]
+    relationships: list[Relationship]
+    _graphs: dict[str | None, FamilyGraph] = field(default_factory=dict, repr=False)
+    _graph_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _lineage_index: LineageIndex | None = field(default=None, repr=False)
+    _kinship_index: KinshipIndex | None = field(default=None, repr=False)
+    _cluster_index: ClusterIndex | None = field(default=None, repr=False)
+    _generation_index: GenerationIndex | None = field(default=None, repr=False)
+    _releveled: dict[str | None, nx.DiGraph] = field(default_factory=dict, repr=False)
+    _name_index: NameIndex | None = field(default=None, repr=False)
+    _directory: "MemberDirectory | None" = field(default=None, repr=False)
+
+    @property
+    def cache_key(self) -> tuple[int, int]:
+        """Hashable token identifying this data version for render caches."""
+        return (id(self.repository), self.version)
+
+    def family_graph(self, name_display_type: str | None = None) -> FamilyGraph:
+        """Return the FamilyGraph for this snapshot, built once per name key."""
+        with self._graph_lock:
+            family_graph = self._graphs.get(name_display_type)
+            if family_graph is None:
+                with perf.span("graph.build"):
+                    family_graph = FamilyGraph(
+                        self.members, self.relationships, name_display_type
+                    )
+                self._graphs[name_display_type] = family_graph
+            return family_graph
+
+    def graph(
+        self, name_display_type: str | None = None, inferred: bool = False
+    ) -> nx.DiGraph:
+        """
+        Return the family graph for this snapshot; with inferred, its nodes
+        carry the generations from generation_index instead of the stored ones.
+        """
+        graph = self.family_graph(name_display_type).graph
+        if not inferred:
+            return graph
+        index = self.generation_index
+        with self._graph_lock:
+            releveled = self._releveled.get(name_display_type)
+            if releveled is None:
+                releveled = self._releveled[name_display_type] = index.relevel(graph)
+            return releveled
+
+    @property
+    def lineage_index(self) -> LineageIndex:
+        """Parent/child/spouse adjacency for lineage views, built once."""
+        with self._graph_lock:
+            if self._lineage_index is None:
+                self._lineage_index = LineageIndex(self.relationships, self.members)
+            return self._lineage_index
+
+    @property
+    def cluster_index(self) -> ClusterIndex:
+        """House and branch groups with their aggregated edges, built once."""
+        with self._graph_lock:
+            if self._cluster_index is None:
+                with perf.span("clusters.build"):
+                    self._cluster_index = ClusterIndex(self.members, self.relationships)
+            return self._cluster_index
+
+    @property
+    def generation_index(self) -> GenerationIndex:
+        """Generations inferred from the parent/child edges, built once."""
+        with self._graph_lock:
+            if self._generation_index is None:
+                self._generation_index = GenerationIndex(
+                    self.members, self.relationships
+                )
+            return self._generation_index
+
+    @property
+    def name_index(self) -> NameIndex:
+        """Multilingual member name search, built once."""
+        with self._graph_lock:
+            if self._name_index is None:
+                self._name_index = NameIndex(self.members)
+            return self._name_index
+
+    @property
+    def directory(self) -> "MemberDirectory":
+        """The member directory served from this snapshot's name index."""
+        name_index = self.name_index
+        with self._graph_lock:
+            if self._directory is None:
+                self._directory = MemberDirectory(
+                    self.repository,
+                    self.version,
+                    name_index,
+                    _house_members(self.members),
+                )
+            return self._directory
+
+    @property
+    def kinship_index(self) -> KinshipIndex:
+        """Lowest-common-ancestor index for kinship queries, built once."""
+        lineage = self.lineage_index
+        with self._graph_lock:
+            if self._kinship_index is None:
+                self._kinship_index = KinshipIndex(
+                    self.members, self.relationships, lineage
+                )
+            return self._kinship_index
+
+
+def _load_models(
+    repository: FamilyRepository, collection: str, batch_size: int
+) -> tuple[list[dict[Any, Any]], list]:
+    """Stream one collection and validate it batch by batch as it arrives."""
+    stream = STREAMS[collection]
+    with perf.span(f"snapshot.load_{collection}"):
+        # Stored documents were validated when they were first loaded.
+        return stream(
+            repository.iter_documents(collection, batch_size), batch_size, trusted=True
+        )
+
+
+@perf.timed("snapshot.load")
+def load_snapshot(
+    repository: FamilyRepository,
+    version: int,
+    previous: FamilySnapshot | None = None,
+    batch_size: int = LOAD_BATCH_SIZE,
+) -> FamilySnapshot:
+    """
+    Read and validate both collections into a snapshot tagged with version.
+
+    Each cursor batch is validated as it arrives. Once the members are
+    ready the graphs and the name index are brought up to date with them
+    (the previous snapshot's, or the default graph on a first load); only
+    the edges wait for the relationships. With a database server the
+    relationships are fetched on a worker thread meanwhile, so that work
+    overlaps the network.
+    """
+    relationships_future = None
+    if repository.concurrent_reads:
+        relationships_future = _load_pool.submit(
+            contextvars.copy_context().run,
+            _load_models,
+            repository,
+            "relationships",
+            batch_size,
+        )
+    try:
+        member_docs, members = _load_models(repository, "members", batch_size)
+    except BaseException:
+        if relationships_future is not None:
+            relationships_future.cancel()
+        raise
+
+    graphs: dict[str | None, FamilyGraph] = {}
+    name_index = None
+    generation_index = previous_generations = None
+    if previous is not None:
+        with previous._graph_lock:
+            previous_graphs = dict(previous._graphs)
+            previous_names = previous._name_index
+            previous_generations = previous._generation_index
+        for name_display_type, family_graph in previous_graphs.items():
+            # Copy first: sessions may still be rendering the old graph.
+            with perf.span("graph.sync"):
+                graphs[name_display_type] = family_graph.copy()
+                graphs[name_display_type].sync_members(members)
+        if previous_names is not None:
+            with perf.span("name_index.sync"):
+                name_index = previous_names.copy()
+                name_index.sync(members)
+    else:
+        with perf.span("graph.build"):
+            for name_display_type in PREBUILT_GRAPHS:
+                graphs[name_display_type] = FamilyGraph(members, None, name_display_type)
+
+    if relationships_future is not None:
+        relationship_docs, relationships = relationships_future.result()
+    else:
+        relationship_docs, relationships = _load_models(
+            repository, "relationships", batch_size
+        )
+    for family_graph in graphs.values():
+        with perf.span("graph.sync" if previous is not None else "graph.build"):
+            family_graph.sync_relationships(relationships)
+    if previous_generations is not None:
+        # Added relationships only move the levels below them.
+        with perf.span("generations.sync"):
+            generation_index = previous_generations.copy()
+            generation_index.sync(members, relationships)
+
+    return FamilySnapshot(
+        repository=repository,
+        version=version,
+        member_docs=member_docs,
+        relationship_docs=relationship_docs,
+        members=members,
+        relationships=relationships,
+        _graphs=graphs,
+        _name_index=name_index,
+        _generation_index=generation_index,
+    )
+
+
+@dataclass
+class MemberDirectory:
+    """
+    Ids, names and houses of every member at one data version: all the
+    edit pages' selectors need. Full documents are fetched one at a time
+    with FamilyRepository.get_member.
+    """
+
+    repository: FamilyRepository
+    version: int
+    name_index: NameIndex
+    # House -> ids (as strings) of its members, from the same summaries.
+    house_members: dict[str, frozenset[str]]
+
+    def __len__(self) -> int:
+        return len(self.name_index)
+
+    @property
+    def houses(self) -> list[str]:
+        return sorted(self.house_members)
+
+
+def _house_members(members: list[FamilyMember]) -> dict[str, frozenset[str]]:
+    houses: dict[str, set[str]] = defaultdict(set)
+    for member in members:
+        if member.house:
+            houses[member.house].add(str(member.id))
+    return {house: frozenset(ids) for house, ids in houses.items()}
+
+
+@perf.timed("directory.load")
+def load_member_directory(
+    repository: FamilyRepository,
+    version: int,
+    previous: MemberDirectory | None = None,
+) -> MemberDirectory:
+    """
+    Build the directory from projected member summaries. The previous
+    directory's name index is carried over by applying only what changed.
+    """
+    with perf.span("validate.member_summaries"):
+        members = load_family_members(repository.member_summaries())
+    if previous is not None:
+        name_index = previous.name_index.copy()
+        name_index.sync(members)
+    else:
+        name_index = NameIndex(members)
+    return MemberDirectory(repository, version, name_index, _house_members(members))
+
+
+class SnapshotCache:
+    """
+    Cross-session cache holding the latest FamilySnapshot (or, with another
+    loader, anything else tagged with a repository and version).
+    The snapshot is reused until the repository's data_version changes;
+    concurrent callers that find it stale wait on a single in-flight reload.
+    """
+
+    def __init__(self, loader=load_snapshot):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._snapshot: FamilySnapshot | None = None
+        self._inflight: dict[tuple[FamilyRepository, int], Future] = {}
+        self.reloads = 0
+
+    def get(self, repository: FamilyRepository | None = None) -> FamilySnapshot:
+        repository = repository or get_repository()
+        key = (repository, repository.data_version)
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and (snapshot.repository, snapshot.version) == key:
+                return snapshot
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            return future.result()
+
+        previous = self._snapshot
+        if previous is not None and previous.repository is not repository:
+            previous = None
+        try:
+            snapshot = self._loader(repository, key[1], previous)
+        except BaseException as exc:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(exc)
+            raise
+
+        with self._lock:
+            del self._inflight[key]
+            self.reloads += 1
+            current = self._snapshot
+            # A slower reload of an older version must not replace a newer one.
+            if (
+                current is None
+                or current.repository is not repository
+                or current.version <= snapshot.version
+            ):
+                self._snapshot = snapshot
+        future.set_result(snapshot)
+        return snapshot
+
+    def current(self, repository: FamilyRepository) -> FamilySnapshot | None:
+        """The cached snapshot if it is up to date, without loading one."""
+        snapshot = self._snapshot
+        if (
+            snapshot is not None
+            and snapshot.repository is repository
+            and snapshot.version == repository.data_version
+        ):
+            return snapshot
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+
+_snapshot_cache = SnapshotCache()
+_directory_cache = SnapshotCache(load_member_directory)
+
+
+def get_snapshot(repository: FamilyRepository | None = None) -> FamilySnapshot:
+    """Return the current snapshot from the process-wide cache."""
+    return _snapshot_cache.get(repository)
+
+
+def get_member_directory(
+    repository: FamilyRepository | None = None,
+) -> MemberDirectory:
+    """
+    Return the member directory for the current data version. When the
+    full snapshot is already loaded its name index is reused; otherwise
+    only member names and houses are read.
+    """
+    repository = repository or get_repository()
+    snapshot = _snapshot_cache.current(repository)
+    if snapshot is not None:
+        return snapshot.directory
+    return _directory_cache.get(repository)
+
+
+def clear_snapshot_cache() -> None:
+    _snapshot_cache.clear()
+    _directory_cache.clear()
@@ -0,0 +1,358 @@
+"""
+Seeded generator of realistic synthetic family forests.
+
+    python -m src.synthetic 100000 /tmp/family --seed 7
+
+writes members_backup.json and relationships_backup.json (NDJSON) that the
+app reads with WUFENG_DATA_DIR=/tmp/family, or that src.bulk can import.
+
+Founders head houses; their sons found branches that descendants inherit.
+Blood members marry in spouses, concubines and former spouses from other
+surnames, and children are drawn generation by generation, so the output
+has the shape of the real archive at any scale. Documents are produced one
+at a time and the same seed always yields the same documents and ids.
+"""
+
+import argparse
+import math
+import random
+import sys
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator, NamedTuple
+
+from bson import ObjectId, json_util
+
+HOUSES = ["Upper House", "Lower House", "Taiping House", "Single House"]
+LOCAL_IMAGE_DIR = Path("img")
+IMAGE_URLS = [
+    "https://upload.wikimedia.org/wikipedia/commons/5/56/Lin_Chaosong.jpg",
+]
+
+
+class Syllable(NamedTuple):
+    pinyin: str
+    plain: str
+    hanzi: str
+    wade_giles: str
+    katakana: str
+
+
+LIN = Syllable("Lín", "Lin", "林", "Lin", "リン")
+OTHER_SURNAMES = [
+    Syllable("Chén", "Chen", "陳", "Ch'en", "チェン"),
+    Syllable("Wáng", "Wang", "王", "Wang", "ワン"),
+    Syllable("Huáng", "Huang", "黃", "Huang", "ホアン"),
+    Syllable("Zhāng", "Zhang", "張", "Chang", "チャン"),
+    Syllable("Yáng", "Yang", "楊", "Yang", "ヤン"),
+    Syllable("Luó", "Luo", "羅", "Lo", "ルオ"),
+]
+GIVEN = [
+    Syllable("Xiàn", "Xian", "獻", "Hsien", "シエン"),
+    Syllable("Táng", "Tang", "堂", "T'ang", "タン"),
+    Syllable("Cháo", "Chao", "朝", "Ch'ao", "チャオ"),
+    Syllable("Dòng", "Dong", "棟", "Tung", "ドン"),
+    Syllable("Wén", "Wen", "文", "Wen", "ウェン"),
+    Syllable("Qīn", "Qin", "欽", "Ch'in", "チン"),
+    Syllable("Diàn", "Dian", "奠", "Tien", "ディエン"),
+    Syllable("Guó", "Guo", "國", "Kuo", "グオ"),
+    Syllable("Mù", "Mu", "睦", "Mu", "ム"),
+    Syllable("Jiā", "Jia", "嘉", "Chia", "ジア"),
+    Syllable("Yún", "Yun", "雲", "Yün", "ユン"),
+    Syllable("Lóng", "Long", "龍", "Lung", "ロン"),
+    Syllable("Zhèng", "Zheng", "正", "Cheng", "ジェン"),
+    Syllable("Shí", "Shi", "時", "Shih", "シー"),
+    Syllable("Fāng", "Fang", "芳", "Fang", "ファン"),
+    Syllable("Měi", "Mei", "美", "Mei", "メイ"),
+    Syllable("Huì", "Hui", "慧", "Hui", "フイ"),
+    Syllable("Míng", "Ming", "明", "Ming", "ミン"),
+    Syllable("Ān", "An", "安", "An", "アン"),
+    Syllable("Xiáng", "Xiang", "祥", "Hsiang", "シアン"),
+]
+SIGNIFICANCE = [
+    "Managed the family's rice and camphor holdings",
+    "Led the militia that defended the estate",
+    "Passed the prefectural examination",
+    "Served on the county gentry council",
+    "Funded the rebuilding of the ancestral hall",
+    "Founded a school for the clan's children",
+    "Traded in sugar and tea through Lukang",
+    "Was imprisoned and later pardoned",
+]
+NOTES = [
+    "Dates differ between the genealogy and the temple tablets.",
+    "Adopted into this branch as heir.",
+    "Name also recorded under a courtesy name.",
+    "Moved to Taipei during the Japanese era.",
+]
+CURRENT_YEAR = 2025
+GENERATION_YEARS = 30
+
+
+@dataclass(frozen=True)
+class ForestShape:
+    """Knobs for the generated forest; the defaults resemble the archive."""
+
+    # Houses founded at the start; None scales them with the forest size.
+    founders: int | None = None
+    # Mean children per married blood member (Poisson).
+    children: float = 3.4
+    spouse_rate: float = 0.85
+    concubine_rate: float = 0.08
+    former_spouse_rate: float = 0.02
+    # Share of members with a portrait (a local img/ file if any, else a URL).
+    image_rate: float = 0.0
+    # Shares of members with historical significance and with a note; the
+    # archive has them for about a quarter and a sixth of its members.
+    significance_rate: float = 0.25
+    note_rate: float = 0.15
+    # None dates the founders back far enough for the deepest generation to
+    # be born by now.
+    founder_birth_year: int | None = None
+
+
+class _Person(NamedTuple):
+    id: ObjectId
+    birth_year: int
+    generation: int
+    house: str
+    branch: str | None
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    threshold, count, product = math.exp(-mean), 0, rng.random()
+    while product > threshold:
+        count += 1
+        product *= rng.random()
+    return count
+
+
+class _Forest:
+    def __init__(self, count: int, seed: int, shape: ForestShape):
+        self.count = count
+        self.shape = shape
+        self.rng = random.Random(seed)
+        self.seed = seed & 0xFFFFFFFF
+        self.serial = 0
+        self.emitted = 0
+        self.houses = 0
+        self.founders = shape.founders or max(1, round(math.sqrt(count) / 10))
+        self.founder_birth_year = shape.founder_birth_year or (
+            CURRENT_YEAR - GENERATION_YEARS * (self.expected_depth() + 4)
+        )
+        local = sorted(LOCAL_IMAGE_DIR.glob("*.jpg")) if shape.image_rate else []
+        self.images = [str(path) for path in local] or IMAGE_URLS
+
+    def expected_depth(self) -> int:
+        """Generations until the forest reaches count members, roughly."""
+        shape = self.shape
+        # Sons per son, and members recorded per son (himself, wives, daughters).
+        growth = max(shape.children * shape.spouse_rate / 2, 1.05)
+        per_son = 1 + shape.spouse_rate + shape.children * shape.spouse_rate / 2
+        sons = max(self.count * (growth - 1) / (per_son * self.founders), 1.0)
+        return math.ceil(math.log(sons) / math.log(growth))
+
+    def object_id(self) -> ObjectId:
+        self.serial += 1
+        return ObjectId(((self.seed << 64) | self.serial).to_bytes(12, "big"))
+
+    def name(self, surname: Syllable) -> tuple[dict[str, str], str]:
+        first, second = self.rng.sample(GIVEN, 2)
+        given = f"{first.plain}{second.plain.lower()}"
+        name = {
+            "hanzi": surname.hanzi + first.hanzi + second.hanzi,
+            "pinyin": f"{surname.pinyin} {first.pinyin}{second.pinyin.lower()}",
+            "wade_giles": f"{surname.wade_giles} {first.wade_giles}-{second.wade_giles.lower()}",
+        }
+        if self.rng.random() < 0.9:
+            name["english"] = f"{surname.plain} {given}"
+        if self.rng.random() < 0.3:
+            name["kanji"] = name["hanzi"]
+        if self.rng.random() < 0.5:
+            name["katakana"] = surname.katakana + first.katakana + second.katakana
+        return name, given
+
+    def member(
+        self,
+        person: _Person,
+        gender: str,
+        surname: Syllable,
+        relation: str | None = None,
+    ) -> tuple[dict[str, Any], str]:
+        name, given = self.name(surname)
+        doc: dict[str, Any] = {
+            "_id": person.id,
+            "name": name,
+            "house": person.house,
+            "generation": person.generation,
+            "gender": gender,
+            "birth_year": person.birth_year,
+        }
+        if person.branch:
+            doc["branch"] = person.branch
+        death_year = person.birth_year + self.rng.randint(30, 90)
+        if death_year < CURRENT_YEAR:
+            doc["death_year"] = death_year
+        if relation:
+            doc["relation"] = relation
+        if self.rng.random() < self.shape.significance_rate:
+            sentences = self.rng.sample(SIGNIFICANCE, self.rng.randint(1, 3))
+            doc["historical_significance"] = (
+                "; ".join(sentences)
+                + f" (generation {person.generation}, {person.house})."
+            )
+        if self.rng.random() < self.shape.note_rate:
+            doc["note"] = self.rng.choice(NOTES)
+        if self.rng.random() < self.shape.image_rate:
+            doc["image"] = self.rng.choice(self.images)
+        self.emitted += 1
+        return doc, given
+
+    def relationship(self, source: ObjectId, target: ObjectId, type: str) -> dict:
+        return {"_id": self.object_id(), "source_id": source, "target": target, "type": type}
+
+    def founder(self) -> tuple[_Person, dict[str, Any]]:
+        house = (
+            HOUSES[self.houses]
+            if self.houses < len(HOUSES)
+            else f"House {self.houses + 1}"
+        )
+        self.houses += 1
+        birth = self.founder_birth_year + self.rng.randint(0, 60)
+        person = _Person(self.object_id(), birth, 1, house, None)
+        doc, _ = self.member(person, "Male", LIN)
+        return person, doc
+
+    def __iter__(self) -> Iterator[tuple[str, dict[str, Any]]]:
+        rng, shape = self.rng, self.shape
+        # Sons waiting to marry and have children, with their display names.
+        frontier: deque[tuple[_Person, str]] = deque()
+        while self.emitted < self.count:
+            if not frontier or self.houses < self.founders:
+                person, doc = self.founder()
+                yield "members", doc
+                frontier.append((person, _label(doc)))
+                continue
+
+            person, label = frontier.popleft()
+            if rng.random() >= shape.spouse_rate:
+                continue
+            wives = []
+            for type, rate in (
+                ("spouse", 1.0),
+                ("concubine", shape.concubine_rate),
+                ("former_spouse", shape.former_spouse_rate),
+            ):
+                if self.emitted >= self.count or rng.random() >= rate:
+                    continue
+                wife = person._replace(
+                    id=self.object_id(),
+                    birth_year=person.birth_year + rng.randint(-3, 12),
+                )
+                relation = f"{type.replace('_', ' ').capitalize()} of {label}"
+                doc, _ = self.member(wife, "Female", rng.choice(OTHER_SURNAMES), relation)
+                yield "members", doc
+                yield "relationships", self.relationship(person.id, wife.id, type)
+                wives.append(wife)
+
+            for _ in range(_poisson(rng, shape.children)):
+                if self.emitted >= self.count:
+                    break
+                mother = rng.choice(wives) if wives else None
+                child = _Person(
+                    self.object_id(),
+                    min(person.birth_year + rng.randint(20, 40), CURRENT_YEAR),
+                    person.generation + 1,
+                    person.house,
+                    person.branch,
+                )
+                gender = rng.choice(["Male", "Female"])
+                doc, given = self.member(child, gender, LIN, f"Child of {label}")
+                if child.generation == 2 and gender == "Male":
+                    # Each son of a founder starts a branch named after him.
+                    child = child._replace(branch=f"{given} Branch")
+                    doc["branch"] = child.branch
+                yield "members", doc
+                for parent in (person, mother):
+                    if parent is not None:
+                        yield "relationships", self.relationship(
+                            parent.id, child.id, "child"
+                        )
+                # Descendants are traced through the sons, as in the archive.
+                if gender == "Male":
+                    frontier.append((child, _label(doc)))
+
+
+def _label(doc: dict[str, Any]) -> str:
+    return doc["name"].get("english") or doc["name"]["pinyin"]
+
+
+def iter_family(
+    members: int, seed: int = 0, shape: ForestShape | None = None
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    """
+    Yield ("members" | "relationships", document) pairs for a forest of
+    exactly `members` members, in the order they were generated.
+    """
+    return iter(_Forest(members, seed, shape or ForestShape()))
+
+
+def iter_collection(
+    collection: str, members: int, seed: int = 0, shape: ForestShape | None = None
+) -> Iterator[dict[str, Any]]:
+    """Stream one collection of the forest without holding the other."""
+    for name, doc in iter_family(members, seed, shape):
+        if name == collection:
+            yield doc
+
+
+def generate_family(
+    members: int, seed: int = 0, shape: ForestShape | None = None
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Return (member documents, relationship documents)."""
+    collections: dict[str, list[dict[str, Any]]] = {
+        "members": [],
+        "relationships": [],
+    }
+    for name, doc in iter_family(members, seed, shape):
+        collections[name].append(doc)
+    return collections["members"], collections["relationships"]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.synthetic", description=__doc__.splitlines()[1]
+    )
+    parser.add_argument("members", type=int)
+    parser.add_argument("out_dir")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--founders", type=int, default=ForestShape.founders)
+    parser.add_argument("--children", type=float, default=ForestShape.children)
+    parser.add_argument("--image-rate", type=float, default=ForestShape.image_rate)
+    args = parser.parse_args(argv)
+
+    shape = ForestShape(
+        founders=args.founders, children=args.children, image_rate=args.image_rate
+    )
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    counts = {"members": 0, "relationships": 0}
+    with (
+        open(out_dir / "members_backup.json", "w", encoding="utf-8") as members,
+        open(out_dir / "relationships_backup.json", "w", encoding="utf-8") as rels,
+    ):
+        files = {"members": members, "relationships": rels}
+        for name, doc in iter_family(args.members, args.seed, shape):
+            files[name].write(json_util.dumps(doc, ensure_ascii=False) + "\n")
+            counts[name] += 1
+    print(
+        f"Wrote {counts['members']} members and {counts['relationships']} "
+        f"relationships to {out_dir}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
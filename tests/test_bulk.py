@@ -0,0 +1,55 @@
+"""Bulk import must attribute every validation and write error to its row."""
+
+from bson import ObjectId
+
+from src.bulk import import_records
+from src.database import FamilyRepository, MemoryBackend
+
+
+def repository() -> FamilyRepository:
+    repository = FamilyRepository(MemoryBackend())
+    repository.ensure_indexes()
+    return repository
+
+
+def edge(source: ObjectId, target: ObjectId, rel_type: str = "child") -> dict:
+    return {"_id": ObjectId(), "source_id": source, "target": target, "type": rel_type}
+
+
+def test_errors_point_at_their_input_rows() -> None:
+    a, b, c = ObjectId(), ObjectId(), ObjectId()
+    records = [
+        edge(a, b),
+        {"_id": ObjectId(), "source_id": a, "target": c},  # no type
+        edge(b, c),
+        edge(a, c),
+        edge(a, b),  # duplicate of row 0
+        edge(c, a, "spouse"),
+        edge(b, c),  # duplicate of row 2, in a later batch
+    ]
+    repo = repository()
+    report = import_records(repo, "relationships", records, batch_size=3)
+
+    assert [(error.index, error.record_id) for error in report.errors] == [
+        (1, records[1]["_id"]),
+        (4, records[4]["_id"]),
+        (6, records[6]["_id"]),
+    ]
+    assert "type" in report.errors[0].message
+    assert report.read == 7
+    assert report.written == 4
+    assert len(list(repo.relationships.find({}))) == 4
+
+
+def test_ordered_import_stops_after_the_failing_batch() -> None:
+    a, b, c = ObjectId(), ObjectId(), ObjectId()
+    first = edge(a, b)
+    records = [first, {**first, "_id": ObjectId()}, edge(b, c), edge(a, c)]
+    repo = repository()
+    report = import_records(
+        repo, "relationships", records, batch_size=2, ordered=True
+    )
+
+    assert [error.index for error in report.errors] == [1]
+    assert report.read == 2
+    assert len(list(repo.relationships.find({}))) == 1
@@ -0,0 +1,63 @@
+"""The canonical_edges migration leaves one ObjectId-keyed copy per edge."""
+
+from bson import ObjectId
+
+from src.canonical_edges import migrate
+from src.database import FamilyRepository, MemoryBackend
+
+
+def edge(source, target, rel_type: str, **fields) -> dict:
+    return {
+        "_id": ObjectId(),
+        "source_id": source,
+        "target": target,
+        "type": rel_type,
+        **fields,
+    }
+
+
+def test_migration_collapses_copies_and_stores_object_ids() -> None:
+    a, b, c = sorted(ObjectId() for _ in range(3))
+    relationships = [
+        edge(a, b, "spouse"),
+        edge(b, a, "spouse", start_date="1890"),  # mirrored, with a date
+        edge(a, c, "child"),
+        edge(str(a), str(c), "child"),  # hex-string copy
+        edge(str(c), str(b), "other"),  # reversed, string ids only
+        edge(c, b, "child"),  # a child edge is never flipped
+    ]
+    repository = FamilyRepository(MemoryBackend([], relationships))
+
+    dry = migrate(repository, dry_run=True)
+    assert (dry.deleted, dry.flipped, dry.retyped, dry.merged) == (2, 1, 0, 1)
+    assert len(list(repository.relationships.find({}))) == 6
+
+    report = migrate(repository)
+    assert (report.deleted, report.flipped, report.merged) == (2, 1, 1)
+    stored = {
+        (rel["source_id"], rel["target"], rel["type"]): rel
+        for rel in repository.relationships.find({})
+    }
+    assert set(stored) == {
+        (a, b, "spouse"),
+        (a, c, "child"),
+        (b, c, "other"),
+        (c, b, "child"),
+    }
+    assert stored[(a, b, "spouse")]["start_date"] == "1890"
+    assert "source_target_type" in repository.relationships.index_information()
+
+    again = migrate(repository)
+    assert (again.deleted, again.flipped, again.retyped, again.merged) == (0, 0, 0, 0)
+
+
+def test_string_ids_in_canonical_order_are_retyped() -> None:
+    a, b = sorted(ObjectId() for _ in range(2))
+    repository = FamilyRepository(
+        MemoryBackend([], [edge(str(a), str(b), "spouse"), edge(a, str(b), "child")])
+    )
+    report = migrate(repository)
+    assert (report.deleted, report.flipped, report.retyped) == (0, 0, 2)
+    assert {
+        (rel["source_id"], rel["target"]) for rel in repository.relationships.find({})
+    } == {(a, b)}
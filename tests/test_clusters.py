@@ -0,0 +1,63 @@
+"""Cluster node ids must round-trip any house or branch name."""
+
+from bson import ObjectId
+
+from src.clusters import ClusterIndex, branch_node, house_node
+from src.family_graph import FamilyGraph
+from src.generations import GenerationIndex
+from src.models import FamilyMember, Name, Relationship
+
+
+def person(name: str, house: str, branch: str | None = None) -> FamilyMember:
+    return FamilyMember(
+        _id=ObjectId(), name=Name(english=name), house=house, branch=branch
+    )
+
+
+def test_names_with_separators_round_trip() -> None:
+    father = person("A", "Lin/Wufeng", "Lower/House")
+    son = person("B", "Lin/Wufeng", "Lower/House")
+    wife = person("C", "100% Tsai")
+    members = [father, son, wife]
+    relationships = [
+        Relationship(source_id=father.id, target=son.id, type="child"),
+        Relationship(source_id=father.id, target=wife.id, type="spouse"),
+    ]
+    clusters = ClusterIndex(members, relationships)
+    branch = branch_node("Lin/Wufeng", "Lower/House")
+    assert clusters.options() == [
+        house_node("100% Tsai"),
+        house_node("Lin/Wufeng"),
+        branch,
+    ]
+    assert ClusterIndex._parse(branch) == ("Lin/Wufeng", "Lower/House")
+    assert clusters.describe(branch) == "Lower/House (2)"
+
+    graph = clusters.graph(FamilyGraph(members, relationships), [branch])
+    assert set(graph) == {str(father.id), str(son.id), house_node("100% Tsai")}
+    edge = graph.edges[house_node("100% Tsai"), str(father.id)]
+    assert edge["title"] == "1 stored relationship between them, by type:\n1 spouse"
+
+
+def test_collapsed_groups_carry_inferred_generations() -> None:
+    father = person("A", "Lin", "Upper")
+    son = person("B", "Lin", "Lower")
+    father.generation, son.generation = 1, 5
+    members = [father, son]
+    relationships = [Relationship(source_id=father.id, target=son.id, type="child")]
+    clusters = ClusterIndex(members, relationships)
+    family_graph = FamilyGraph(members, relationships)
+    lower = branch_node("Lin", "Lower")
+
+    stored = clusters.graph(family_graph, [house_node("Lin")])
+    assert stored.nodes[lower]["generation"] == 5
+    inferred = clusters.graph(
+        family_graph, [house_node("Lin")], GenerationIndex(members, relationships)
+    )
+    assert inferred.nodes[lower]["generation"] == 2
+    assert "generations 2-2" in inferred.nodes[lower]["title"]
+
+    shown = clusters.graph(
+        family_graph, [lower], GenerationIndex(members, relationships)
+    )
+    assert shown.nodes[str(son.id)]["generation"] == 2
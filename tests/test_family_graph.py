@@ -0,0 +1,149 @@
+"""
+FamilyGraph applies deltas incrementally; after any sequence of them its
+graph must equal a full create_family_graph rebuild on the same data.
+"""
+
+import random
+
+import pytest
+from bson import ObjectId
+
+from src.family_graph import FamilyGraph, relationship_key
+from src.graph_create import (
+    create_family_graph,
+    load_family_members,
+    load_relationships,
+)
+from src.models import FamilyMember, Relationship
+from src.synthetic import generate_family
+
+SEEDS = range(8)
+STEPS = 200
+REL_TYPES = ("child", "spouse", "concubine", "former_spouse", "other")
+HOUSES = ("Upper House", "Lower House", "Taiping Branch", None)
+BRANCHES = ("Wencha Branch", "Wenming Branch", None)
+
+
+def family(seed: int) -> tuple[list[FamilyMember], list[Relationship]]:
+    member_docs, relationship_docs = generate_family(60, seed=seed)
+    return load_family_members(member_docs), load_relationships(relationship_docs)
+
+
+def assert_same_graph(family_graph: FamilyGraph, members, relationships) -> None:
+    expected = create_family_graph(
+        members, relationships, family_graph.name_display_type
+    )
+    actual = family_graph.graph
+    assert dict(actual.nodes(data=True)) == dict(expected.nodes(data=True))
+    assert {(u, v): d for u, v, d in actual.edges(data=True)} == {
+        (u, v): d for u, v, d in expected.edges(data=True)
+    }
+
+
+def edited_member(rng: random.Random, member: FamilyMember) -> FamilyMember:
+    changes = rng.choice(
+        [
+            {"house": rng.choice(HOUSES)},
+            {"branch": rng.choice(BRANCHES)},
+            {"generation": rng.randint(1, 9)},
+            {"note": f"note {rng.random()}"},
+        ]
+    )
+    return member.model_copy(update=changes)
+
+
+def new_relationship(
+    rng: random.Random, member_ids: list[ObjectId], rel_id: ObjectId | None = None
+) -> Relationship:
+    source, target = rng.sample(member_ids, 2)
+    return Relationship(
+        _id=rel_id or ObjectId(),
+        source_id=source,
+        target=target,
+        type=rng.choice(REL_TYPES),
+    )
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_deltas_match_full_rebuild(seed: int) -> None:
+    rng = random.Random(seed)
+    all_members, all_relationships = family(seed)
+    member_ids = [member.id for member in all_members]
+    members = {member.id: member for member in all_members}
+    # Relationship key -> relationship, in the order they were applied.
+    relationships = {relationship_key(rel): rel for rel in all_relationships}
+    family_graph = FamilyGraph(all_members, all_relationships, "english")
+    assert_same_graph(
+        family_graph, list(members.values()), list(relationships.values())
+    )
+
+    removed: dict[ObjectId, FamilyMember] = {}
+    for _ in range(STEPS):
+        operation = rng.choice(
+            ["upsert", "restore", "remove", "add", "edit", "remove_relationship"]
+        )
+        if operation == "upsert" and members:
+            member = edited_member(rng, members[rng.choice(list(members))])
+            members[member.id] = member
+            family_graph.upsert_member(member)
+        elif operation == "restore" and removed:
+            member = removed.pop(rng.choice(list(removed)))
+            members[member.id] = member
+            family_graph.upsert_member(member)
+        elif operation == "remove" and members:
+            member_id = rng.choice(list(members))
+            removed[member_id] = members.pop(member_id)
+            family_graph.remove_member(member_id)
+        elif operation == "add":
+            # Endpoints may be removed members; such edges wait for them.
+            rel = new_relationship(rng, member_ids)
+            relationships[relationship_key(rel)] = rel
+            family_graph.add_relationship(rel)
+        elif operation == "edit" and relationships:
+            key = rng.choice(list(relationships))
+            rel = new_relationship(rng, member_ids, relationships[key].id)
+            relationships[key] = rel
+            family_graph.add_relationship(rel)
+        elif operation == "remove_relationship" and relationships:
+            key = rng.choice(list(relationships))
+            del relationships[key]
+            family_graph.remove_relationship(key)
+        assert_same_graph(
+            family_graph, list(members.values()), list(relationships.values())
+        )
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_sync_matches_full_rebuild(seed: int) -> None:
+    rng = random.Random(seed)
+    members, relationships = family(seed)
+    member_ids = [member.id for member in members]
+    family_graph = FamilyGraph(members, relationships)
+    stale = family_graph.copy()
+
+    for _ in range(20):
+        members = list(members)
+        relationships = list(relationships)
+        for _ in range(rng.randint(1, 8)):
+            index = rng.randrange(len(members))
+            if rng.random() < 0.3 and len(members) > 2:
+                members.pop(index)
+            else:
+                members[index] = edited_member(rng, members[index])
+        for _ in range(rng.randint(1, 8)):
+            index = rng.randrange(len(relationships))
+            roll = rng.random()
+            if roll < 0.3:
+                relationships.pop(index)
+            elif roll < 0.6:
+                relationships[index] = new_relationship(
+                    rng, member_ids, relationships[index].id
+                )
+            else:
+                relationships.append(new_relationship(rng, member_ids))
+        family_graph.sync(members, relationships)
+        assert_same_graph(family_graph, members, relationships)
+
+    # A copy takes no deltas from its original; one sync catches it up.
+    stale.sync(members, relationships)
+    assert_same_graph(stale, members, relationships)
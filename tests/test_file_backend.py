@@ -0,0 +1,72 @@
+"""FileCollection must survive a restart from its dump plus journal."""
+
+from pathlib import Path
+
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+
+from src.file_backend import FileCollection
+
+
+def reopen(path: Path) -> FileCollection:
+    return FileCollection(path, fsync=False)
+
+
+def test_journal_replays_writes_on_top_of_the_dump(tmp_path: Path) -> None:
+    path = tmp_path / "members_backup.json"
+    kept, changed, removed = ObjectId(), ObjectId(), ObjectId()
+    path.write_text(
+        f'[{{"_id": {{"$oid": "{kept}"}}, "name": "kept"}},\n'
+        f' {{"_id": {{"$oid": "{changed}"}}, "name": "before"}}]\n',
+        encoding="utf-8",
+    )
+    collection = reopen(path)
+    collection.update_one({"_id": changed}, {"$set": {"name": "after"}})
+    collection.insert_one({"_id": removed, "name": "removed"})
+    collection.delete_one({"_id": removed})
+    added = ObjectId()
+    collection.bulk_write(
+        [
+            InsertOne({"_id": added, "name": "added"}),
+            UpdateOne({"_id": kept}, {"$set": {"generation": 3}}),
+        ]
+    )
+
+    replayed = reopen(path)
+    assert {doc["_id"]: doc for doc in replayed.find()} == {
+        kept: {"_id": kept, "name": "kept", "generation": 3},
+        changed: {"_id": changed, "name": "after"},
+        added: {"_id": added, "name": "added"},
+    }
+
+
+def test_torn_trailing_entry_is_truncated(tmp_path: Path) -> None:
+    path = tmp_path / "members_backup.json"
+    first = ObjectId()
+    collection = reopen(path)
+    collection.insert_one({"_id": first, "name": "first"})
+    journal = collection.journal_path
+    intact = journal.stat().st_size
+    with open(journal, "ab") as handle:
+        handle.write(b'{"op": "insert", "doc": {"_id": ')
+
+    replayed = reopen(path)
+    assert [doc["_id"] for doc in replayed.find()] == [first]
+    assert journal.stat().st_size == intact
+    # New writes go after the intact entries and replay as well.
+    second = ObjectId()
+    replayed.insert_one({"_id": second, "name": "second"})
+    assert [doc["_id"] for doc in reopen(path).find()] == [first, second]
+
+
+def test_compact_folds_the_journal_into_the_dump(tmp_path: Path) -> None:
+    path = tmp_path / "members_backup.json"
+    collection = reopen(path)
+    ids = [ObjectId() for _ in range(3)]
+    for member_id in ids:
+        collection.insert_one({"_id": member_id, "name": str(member_id)})
+    collection.delete_one({"_id": ids[1]})
+    collection.compact()
+
+    assert collection.journal_path.stat().st_size == 0
+    assert [doc["_id"] for doc in reopen(path).find()] == [ids[0], ids[2]]
@@ -0,0 +1,75 @@
+"""
+GenerationIndex infers levels over spouse groups; applied incrementally,
+its levels must match a fresh index over the same data.
+"""
+
+import random
+
+from bson import ObjectId
+
+from src.generations import GenerationIndex
+from src.graph_create import load_family_members, load_relationships
+from src.models import FamilyMember, Name, Relationship
+from src.synthetic import generate_family
+
+
+def person(name: str, generation: int | None = None) -> FamilyMember:
+    return FamilyMember(_id=ObjectId(), name=Name(english=name), generation=generation)
+
+
+def rel(source: FamilyMember, target: FamilyMember, rel_type: str) -> Relationship:
+    return Relationship(
+        _id=ObjectId(), source_id=source.id, target=target.id, type=rel_type
+    )
+
+
+def test_spouses_share_the_level_below_their_highest_parent() -> None:
+    root = person("Root", 3)
+    son, daughter_in_law = person("Son", 9), person("Daughter-in-law")
+    in_law_father = person("In-law father", 1)
+    grandson = person("Grandson")
+    members = [root, son, daughter_in_law, in_law_father, grandson]
+    index = GenerationIndex(
+        members,
+        [
+            rel(root, son, "child"),
+            rel(son, daughter_in_law, "spouse"),
+            rel(in_law_father, daughter_in_law, "child"),
+            rel(daughter_in_law, grandson, "child"),
+        ],
+    )
+    # Roots keep their stored generation; the spouse group follows its
+    # highest parent (Root, 3) rather than the in-law father (1).
+    assert index.level(root.id) == 3
+    assert index.level(in_law_father.id) == 1
+    assert index.level(son.id) == index.level(daughter_in_law.id) == 4
+    assert index.level(grandson.id) == 5
+    kinds = sorted(issue.kind for issue in index.conflicts())
+    assert kinds == ["span", "stored"]
+
+
+def test_cycles_have_no_level() -> None:
+    a, b, c = person("A", 1), person("B"), person("C")
+    index = GenerationIndex(
+        [a, b, c], [rel(a, b, "child"), rel(b, c, "child"), rel(c, b, "child")]
+    )
+    assert index.level(a.id) == 1
+    assert index.level(b.id) is None and index.level(c.id) is None
+    assert {issue.kind for issue in index.conflicts()} >= {"cycle"}
+
+
+def test_added_relationships_match_a_fresh_index() -> None:
+    member_docs, relationship_docs = generate_family(150, seed=4)
+    members = load_family_members(member_docs)
+    relationships = load_relationships(relationship_docs)
+    rng = random.Random(4)
+    rng.shuffle(relationships)
+    half = len(relationships) // 2
+
+    index = GenerationIndex(members, relationships[:half])
+    for step in range(half, len(relationships), 7):
+        copy = index.copy()
+        copy.sync(members, relationships[:step])
+        assert copy.levels == GenerationIndex(members, relationships[:step]).levels
+    index.sync(members, relationships)
+    assert index.levels == GenerationIndex(members, relationships).levels
@@ -0,0 +1,69 @@
+"""Integrity checks over ObjectId and hex-string ids, and what --fix leaves."""
+
+from bson import ObjectId
+from pymongo import DeleteOne
+
+from src.database import FamilyRepository, MemoryBackend
+from src.integrity import check, check_new_relationships
+from src.synthetic import generate_family
+
+
+def test_string_endpoints_are_not_dangling() -> None:
+    member_docs, relationship_docs = generate_family(200)
+    for rel in relationship_docs[:5]:
+        rel["source_id"], rel["target"] = str(rel["source_id"]), str(rel["target"])
+    report = check(FamilyRepository(MemoryBackend(member_docs, relationship_docs)))
+    assert report.counts()["dangling"] == 0
+    assert not report.fixes["relationships"]
+
+
+def test_string_endpoints_still_count_as_duplicates() -> None:
+    member_docs, relationship_docs = generate_family(200)
+    rel = relationship_docs[0]
+    copy = {**rel, "_id": None, "source_id": str(rel["source_id"])}
+    report = check(
+        FamilyRepository(MemoryBackend(member_docs, [*relationship_docs, copy]))
+    )
+    assert report.counts()["duplicate"] == 1
+
+
+def test_new_relationship_matches_stored_string_ids() -> None:
+    member_docs, relationship_docs = generate_family(50)
+    rel = relationship_docs[0]
+    stored = {**rel, "source_id": str(rel["source_id"]), "target": str(rel["target"])}
+    member_ids = {str(doc["_id"]) for doc in member_docs}
+    issues = check_new_relationships(
+        [{k: rel[k] for k in ("source_id", "target", "type")}],
+        lambda member_id: str(member_id) in member_ids,
+        [stored],
+    )
+    assert [issue.kind for issue in issues] == ["duplicate"]
+
+
+def test_mirrored_other_edges_are_reported_and_fixed() -> None:
+    member_docs, relationship_docs = generate_family(50)
+    a, b = member_docs[0]["_id"], member_docs[1]["_id"]
+    other = {"_id": ObjectId(), "source_id": a, "target": b, "type": "other"}
+    mirror = {"_id": ObjectId(), "source_id": b, "target": a, "type": "other"}
+    report = check(
+        FamilyRepository(
+            MemoryBackend(member_docs, [*relationship_docs, other, mirror])
+        )
+    )
+    assert report.counts()["mirrored"] == 1
+    assert report.fixes["relationships"] == [DeleteOne({"_id": mirror["_id"]})]
+
+
+def test_members_linked_only_by_removable_edges_are_isolated() -> None:
+    member_docs, relationship_docs = generate_family(50)
+    loner, absent = ObjectId(), ObjectId()
+    member_docs.append({"_id": loner, "name": {"english": "Loner"}})
+    broken = [
+        {"_id": ObjectId(), "source_id": loner, "target": loner, "type": "other"},
+        {"_id": ObjectId(), "source_id": loner, "target": absent, "type": "child"},
+    ]
+    report = check(
+        FamilyRepository(MemoryBackend(member_docs, [*relationship_docs, *broken]))
+    )
+    isolated = [issue.ids for issue in report.issues if issue.kind == "isolated"]
+    assert [str(loner)] in isolated
@@ -0,0 +1,74 @@
+"""KinshipIndex must find the closest common ancestor over both parents, and name it."""
+
+import pytest
+from bson import ObjectId
+
+from src.kinship import KinshipIndex, kinship_term
+from src.models import FamilyMember, Name, Relationship
+
+
+def person(name: str, gender: str) -> FamilyMember:
+    return FamilyMember(_id=ObjectId(), name=Name(english=name), gender=gender)
+
+
+def child(parent: FamilyMember, kid: FamilyMember) -> Relationship:
+    return Relationship(source_id=parent.id, target=kid.id, type="child")
+
+
+def test_closer_maternal_ancestor_wins_over_paternal_line() -> None:
+    # A and B are second cousins on their fathers' side (through G) and
+    # first cousins through their mothers, who are sisters (through MG).
+    g, s1, s2 = person("G", "Male"), person("S1", "Male"), person("S2", "Male")
+    f1, f2 = person("F1", "Male"), person("F2", "Male")
+    mg, m1, m2 = person("MG", "Male"), person("M1", "Female"), person("M2", "Female")
+    a, b = person("A", "Female"), person("B", "Male")
+    members = [g, s1, s2, f1, f2, mg, m1, m2, a, b]
+    relationships = [
+        child(g, s1),
+        child(g, s2),
+        child(s1, f1),
+        child(s2, f2),
+        child(mg, m1),
+        child(mg, m2),
+        child(f1, a),
+        child(m1, a),
+        child(f2, b),
+        child(m2, b),
+    ]
+    kinship = KinshipIndex(members, relationships).relationship(a.id, b.id)
+    assert kinship.term == "first cousin"
+    assert kinship.generations == (2, 2)
+    assert kinship.common_ancestors == [str(mg.id)]
+
+
+def test_primary_line_answer_is_kept_when_nothing_is_closer() -> None:
+    g, f1, f2 = person("G", "Male"), person("F1", "Male"), person("F2", "Male")
+    a, b = person("A", "Male"), person("B", "Female")
+    members = [g, f1, f2, a, b]
+    relationships = [child(g, f1), child(g, f2), child(f1, a), child(f2, b)]
+    kinship = KinshipIndex(members, relationships).relationship(a.id, b.id)
+    assert kinship.term == "first cousin"
+    assert kinship.common_ancestors == [str(g.id)]
+
+
+@pytest.mark.parametrize(
+    ("up_a", "up_b", "term"),
+    [
+        (2, 2, "first cousin"),
+        (8, 8, "seventh cousin"),
+        (8, 11, "seventh cousin thrice removed"),
+        (8, 12, "7th cousin 4 times removed"),
+        (9, 9, "8th cousin"),
+        (9, 10, "8th cousin 1 time removed"),
+        (12, 12, "11th cousin"),
+        (13, 13, "12th cousin"),
+        (14, 14, "13th cousin"),
+        (22, 22, "21st cousin"),
+        (23, 23, "22nd cousin"),
+        (24, 24, "23rd cousin"),
+        (102, 102, "101st cousin"),
+        (112, 112, "111th cousin"),
+    ],
+)
+def test_cousin_terms_keep_one_style(up_a: int, up_b: int, term: str) -> None:
+    assert kinship_term(up_a, up_b) == term
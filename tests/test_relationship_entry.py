@@ -0,0 +1,46 @@
+"""A batch of new relationships is checked row by row before it is written."""
+
+from bson import ObjectId
+
+from src.integrity import check_new_relationships
+
+
+def rel(source: ObjectId, target: ObjectId, rel_type: str) -> dict:
+    return {"source_id": source, "target": target, "type": rel_type}
+
+
+def test_batch_rows_are_checked_against_each_other_and_stored() -> None:
+    a, b, c, d = sorted(ObjectId() for _ in range(4))
+    outsider = ObjectId()
+    members = {a, b, c, d}
+    stored = [
+        rel(a, b, "child"),
+        # Written before relationships were canonical: target < source.
+        {"source_id": str(d), "target": str(c), "type": "spouse"},
+    ]
+    batch = [
+        rel(a, c, "child"),  # new
+        rel(c, c, "other"),  # self loop
+        rel(a, outsider, "child"),  # not a member
+        rel(a, b, "child"),  # stored already
+        rel(c, a, "child"),  # new: the other direction is a different edge
+        rel(b, a, "spouse"),  # new, canonical (a, b)
+        rel(a, b, "spouse"),  # the row above, same order
+        rel(c, d, "spouse"),  # stored the other way round
+        rel(d, b, "other"),  # new, canonical (b, d)
+    ]
+    issues = check_new_relationships(batch, members.__contains__, stored)
+
+    assert [(issue.kind, issue.ids) for issue in issues] == [
+        ("self_loop", [str(c)]),
+        ("dangling", [str(outsider)]),
+        ("duplicate", [str(a), str(b)]),
+        ("duplicate", [str(a), str(b)]),
+        ("mirrored", [str(c), str(d)]),
+    ]
+
+
+def test_clean_batch_has_no_issues() -> None:
+    a, b, c = ObjectId(), ObjectId(), ObjectId()
+    batch = [rel(a, b, "child"), rel(a, c, "child"), rel(b, c, "other")]
+    assert check_new_relationships(batch, lambda _: True, []) == []